@@ -0,0 +1,80 @@
+"""
+    bench_carving
+    ~~~~~~~~~~~~~
+
+    This module measures the throughput of carving WebAssembly modules out of a
+    synthetic image, scanning it by a single process and by a process pool.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateParser
+from binalyzer_template_provider.carving import SignatureCarver
+from binalyzer_wasm import WebAssemblyExtension
+
+from synthetic import random_bytes
+
+RESOURCES_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "resources")
+TEMPLATE_PATH = os.path.join(RESOURCES_PATH, "wasm_module_format.xml")
+DATA_PATH = os.path.join(RESOURCES_PATH, "wasm_module.wasm")
+
+
+def create_image(path, size, modules):
+    with open(DATA_PATH, "rb") as data_file:
+        module = data_file.read()
+    rng = random.Random(0)
+    offsets = sorted(rng.randrange(0, size - len(module)) for _ in range(modules))
+    with open(path, "wb") as image_file:
+        position = 0
+        for offset in offsets:
+            if offset < position:
+                continue
+            image_file.write(random_bytes(rng, offset - position))
+            image_file.write(module)
+            position = offset + len(module)
+        image_file.write(random_bytes(rng, size - position))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=256, help="image size in MB")
+    parser.add_argument("--modules", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=16, help="chunk size in MB")
+    arguments = parser.parse_args()
+
+    binalyzer = Binalyzer()
+    WebAssemblyExtension(binalyzer)
+    with open(TEMPLATE_PATH, "r") as template_file:
+        template = XMLTemplateParser(template_file.read(), binalyzer=binalyzer).parse()
+    carver = SignatureCarver([template])
+
+    with tempfile.TemporaryDirectory() as directory:
+        image_path = os.path.join(directory, "image.bin")
+        create_image(image_path, arguments.size * 1000000, arguments.modules)
+
+        started = time.perf_counter()
+        hits = carver.scan_file(image_path)
+        duration = time.perf_counter() - started
+        print(
+            f"{'single process':16} {len(hits)} hits, "
+            f"{arguments.size / duration:10.1f} MB/s"
+        )
+
+        report = carver.scan_file_parallel(
+            image_path,
+            processes=arguments.processes,
+            chunk_size=arguments.chunk_size * 1000000,
+        )
+        print(
+            f"{'process pool':16} {len(report.hits)} hits, "
+            f"{report.throughput:10.1f} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
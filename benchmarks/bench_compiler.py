@@ -0,0 +1,84 @@
+"""
+    bench_compiler
+    ~~~~~~~~~~~~~~
+
+    This module compares the interpreted resolution of the WebAssembly template
+    with its compiled counterpart.
+"""
+import argparse
+import io
+import os
+import tempfile
+import timeit
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension
+from binalyzer_template_provider.compiler import TemplateCompiler
+from binalyzer_wasm import WebAssemblyExtension
+
+RESOURCES_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "resources")
+TEMPLATE_PATH = os.path.join(RESOURCES_PATH, "wasm_module_format.xml")
+DATA_PATH = os.path.join(RESOURCES_PATH, "wasm_module.wasm")
+
+
+def create_binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    WebAssemblyExtension(binalyzer)
+    return binalyzer
+
+
+def resolve(template):
+    for child in template.children:
+        child.absolute_address, child.size
+        resolve(child)
+
+
+def interpreted(binalyzer, template, data):
+    binalyzer.data = io.BytesIO(data)
+    binalyzer.template = template
+    resolve(binalyzer.template)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=20)
+    arguments = parser.parse_args()
+
+    with open(TEMPLATE_PATH, "r") as template_file:
+        template_text = template_file.read()
+    with open(DATA_PATH, "rb") as data_file:
+        data = data_file.read()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        compiler = TemplateCompiler(create_binalyzer(), cache_dir)
+        compiled = compiler.compile_str(template_text)
+        compile_time = timeit.timeit(
+            lambda: compiler.compile_str(template_text), number=arguments.number
+        )
+        decode_time = timeit.timeit(
+            lambda: compiled.decode(data), number=arguments.number
+        )
+
+    binalyzer = create_binalyzer()
+    parse_time = timeit.timeit(
+        lambda: binalyzer.xml.from_str(template_text, data), number=arguments.number
+    )
+    template = binalyzer.template_provider.template
+    interpreted_time = timeit.timeit(
+        lambda: interpreted(binalyzer, template, data), number=arguments.number
+    )
+
+    results = [
+        ("interpreted (parse)", parse_time),
+        ("interpreted (bind and resolve)", interpreted_time),
+        ("compiled (load from cache)", compile_time),
+        ("compiled (decode)", decode_time),
+    ]
+    for name, duration in results:
+        print(f"{name:32} {duration / arguments.number * 1e3:10.3f} ms")
+    print(f"{'speedup (decode)':32} {interpreted_time / decode_time:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+    bench_daemon
+    ~~~~~~~~~~~~
+
+    This module compares the latency of dissecting a file with a fresh
+    process to the latency of a request to a running dissection server,
+    both through the command line client and through an open connection.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from binalyzer_template_provider.client import DissectionClient
+
+from synthetic import Shape, SyntheticTemplate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(command):
+    start = time.perf_counter()
+    subprocess.run(command, check=True, cwd=ROOT, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def wait_for_server(socket_path, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with DissectionClient(socket_path, timeout=timeout) as client:
+                client.ping()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def report(name, timings):
+    print(
+        f"{name:32} {statistics.median(timings) * 1e3:10.3f} ms "
+        f"(min {min(timings) * 1e3:.3f} ms)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=10)
+    arguments = parser.parse_args()
+
+    shape = Shape(depth=2, breadth=8, binding_density=0.25, count=1, text_size=0)
+    text, data = SyntheticTemplate(shape).generate()
+    with tempfile.TemporaryDirectory() as directory:
+        template_path = os.path.join(directory, "template.xml")
+        data_path = os.path.join(directory, "data.bin")
+        socket_path = os.path.join(directory, "daemon.sock")
+        with open(template_path, "w") as template_file:
+            template_file.write(text)
+        with open(data_path, "wb") as data_file:
+            data_file.write(data)
+
+        python = [sys.executable, "-m"]
+        cold = python + ["binalyzer_template_provider.daemon", "dissect"]
+        cold += [template_path, data_path]
+        cold_timings = [run(cold) for _ in range(arguments.number)]
+
+        server = subprocess.Popen(
+            python
+            + ["binalyzer_template_provider.daemon", "serve", socket_path]
+            + ["--template", f"bench={template_path}"],
+            cwd=ROOT,
+        )
+        try:
+            wait_for_server(socket_path)
+            client = python + ["binalyzer_template_provider.client", socket_path]
+            client += ["dissect", "bench", data_path]
+            client_timings = [run(client) for _ in range(arguments.number)]
+            request_timings = []
+            with DissectionClient(socket_path) as connection:
+                for _ in range(arguments.number):
+                    start = time.perf_counter()
+                    connection.dissect("bench", data_path)
+                    request_timings.append(time.perf_counter() - start)
+                connection.shutdown()
+            server.wait(30)
+        finally:
+            if server.poll() is None:
+                server.kill()
+
+    report("cold process", cold_timings)
+    report("client process", client_timings)
+    report("request", request_timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+    bench_integer_decoders
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    This module measures the decoding of length prefixes of a template with
+    length-prefixed records.
+
+    The prefixes of all records are decoded directly from the data provider.
+    Binding resolves offsets through the chain of preceding records, so the
+    bound template is measured with fewer records.
+"""
+import argparse
+import io
+import sys
+import timeit
+
+from binalyzer_core import BindingContext, DataProvider, TemplateProvider
+from binalyzer_core import TemplateValueProvider
+from binalyzer_template_provider import XMLTemplateParser, xml
+from binalyzer_template_provider.data_provider import IntegerCachingDataProvider
+
+TEMPLATE = """
+<template>
+    <field name="num" size="4"></field>
+    <record name="record" count="{num}">
+        <field name="length" size="2"></field>
+        <field name="payload" size="{length}"></field>
+    </record>
+</template>
+"""
+
+
+def create_data(records):
+    payload = b"abc"
+    record = len(payload).to_bytes(2, "little") + payload
+    return records.to_bytes(4, "little") + record * records
+
+
+def prefix_addresses(data):
+    addresses = []
+    address = 4
+    while address < len(data):
+        addresses.append(address)
+        address += 2 + int.from_bytes(data[address : address + 2], "little")
+    return addresses
+
+
+def read_prefixes(data_provider, addresses):
+    for address in addresses:
+        template = _PrefixTemplate(address)
+        int.from_bytes(data_provider.read(template), "little")
+
+
+def read_cached_prefixes(data_provider, addresses):
+    for address in addresses:
+        data_provider.read_integer(address, 2, "little")
+
+
+def resolve(data, providers):
+    template_value_providers = xml.TEMPLATE_VALUE_PROVIDERS
+    xml.TEMPLATE_VALUE_PROVIDERS = providers
+    try:
+        template = XMLTemplateParser(TEMPLATE).parse()
+    finally:
+        xml.TEMPLATE_VALUE_PROVIDERS = template_value_providers
+    binding_context = BindingContext(
+        TemplateProvider(template), IntegerCachingDataProvider(io.BytesIO(data))
+    )
+    for record in binding_context.template.record:
+        record.payload.size
+
+
+class _PrefixTemplate(object):
+    def __init__(self, absolute_address):
+        self.absolute_address = absolute_address
+        self.size = 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--bound-records", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=5)
+    arguments = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20 * arguments.bound_records))
+
+    data = create_data(arguments.records)
+    addresses = prefix_addresses(data)
+    caching_data_provider = IntegerCachingDataProvider(io.BytesIO(data))
+    read_cached_prefixes(caching_data_provider, addresses)
+
+    bound_data = create_data(arguments.bound_records)
+    results = [
+        (
+            "read and int.from_bytes",
+            timeit.timeit(
+                lambda: read_prefixes(DataProvider(io.BytesIO(data)), addresses),
+                number=arguments.number,
+            ),
+        ),
+        (
+            "precompiled decoder (first read)",
+            timeit.timeit(
+                lambda: read_cached_prefixes(
+                    IntegerCachingDataProvider(io.BytesIO(data)), addresses
+                ),
+                number=arguments.number,
+            ),
+        ),
+        (
+            "precompiled decoder (cached)",
+            timeit.timeit(
+                lambda: read_cached_prefixes(caching_data_provider, addresses),
+                number=arguments.number,
+            ),
+        ),
+        (
+            "bound (core provider)",
+            timeit.timeit(
+                lambda: resolve(
+                    bound_data,
+                    {"little": TemplateValueProvider, "big": TemplateValueProvider},
+                ),
+                number=arguments.number,
+            ),
+        ),
+        (
+            "bound (precompiled provider)",
+            timeit.timeit(
+                lambda: resolve(bound_data, xml.TEMPLATE_VALUE_PROVIDERS),
+                number=arguments.number,
+            ),
+        ),
+    ]
+    print(f"{arguments.records} records, {arguments.bound_records} bound records")
+    for name, duration in results:
+        print(f"{name:32} {duration / arguments.number * 1e3:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+    bench_layout_cache
+    ~~~~~~~~~~~~~~~~~~
+
+    This module measures the resolution of length-prefixed records for
+    buffers sharing the same lengths, with and without a layout cache.
+"""
+import argparse
+import sys
+import timeit
+
+from binalyzer_template_provider import XMLTemplateParser
+from binalyzer_template_provider.layout_cache import LayoutCache
+
+TEMPLATE = """
+<template>
+    <field name="num" size="4"></field>
+    <record name="record" count="{num}">
+        <field name="length" size="2"></field>
+        <field name="payload" size="{length}"></field>
+    </record>
+</template>
+"""
+
+
+def create_data(records, fill):
+    payload = bytes([fill]) * 3
+    record = len(payload).to_bytes(2, "little") + payload
+    return records.to_bytes(4, "little") + record * records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=200)
+    parser.add_argument("--number", type=int, default=5)
+    arguments = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20 * arguments.records))
+
+    template = XMLTemplateParser(TEMPLATE).parse()
+    buffers = [create_data(arguments.records, fill) for fill in range(8)]
+    cache = LayoutCache(template)
+    cache.resolve(buffers[0])
+
+    results = [
+        (
+            "resolve",
+            timeit.timeit(
+                lambda: LayoutCache(template).resolve(buffers[1]),
+                number=arguments.number,
+            ),
+        ),
+        (
+            "cached layout",
+            timeit.timeit(
+                lambda: [cache.resolve(buffer) for buffer in buffers],
+                number=arguments.number,
+            )
+            / len(buffers),
+        ),
+    ]
+    print(f"{arguments.records} records")
+    for name, duration in results:
+        print(f"{name:32} {duration / arguments.number * 1e3:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+    bench_serializer
+    ~~~~~~~~~~~~~~~~
+
+    This module measures the generation of data from a template with fixed
+    size fields, either by assigning the value of every field and reading the
+    value of the template or by serializing all values at once.
+"""
+import argparse
+import io
+import sys
+import timeit
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension
+from binalyzer_template_provider.serializer import Serializer
+
+
+def create_template(fields):
+    lines = ["<template>"]
+    for i in range(fields):
+        lines.append(f'    <field name="field-{i}" size="8" padding-after="8"></field>')
+    lines.append("</template>")
+    return "\n".join(lines)
+
+
+def create_binalyzer(text):
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    binalyzer.xml.from_str(text)
+    return binalyzer
+
+
+def assign(text, values):
+    template = create_binalyzer(text).template
+    for child, value in zip(template.children, values.values()):
+        child.value = value
+    return template.value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fields", type=int, default=200)
+    parser.add_argument("--number", type=int, default=5)
+    arguments = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20 * arguments.fields))
+
+    text = create_template(arguments.fields)
+    values = {
+        f"field-{i}": i.to_bytes(8, "little") for i in range(arguments.fields)
+    }
+    serializer = Serializer(create_binalyzer(text).template)
+    assert assign(text, values) == serializer.serialize(values)
+
+    results = [
+        (
+            "assign values",
+            timeit.timeit(lambda: assign(text, values), number=arguments.number),
+        ),
+        (
+            "serializer (layout and values)",
+            timeit.timeit(
+                lambda: Serializer(create_binalyzer(text).template).serialize(values),
+                number=arguments.number,
+            ),
+        ),
+        (
+            "serializer (values)",
+            timeit.timeit(
+                lambda: serializer.serialize(values), number=arguments.number
+            ),
+        ),
+        (
+            "serializer (stream)",
+            timeit.timeit(
+                lambda: serializer.write(io.BytesIO(), values),
+                number=arguments.number,
+            ),
+        ),
+    ]
+    print(f"{arguments.fields} fields")
+    for name, duration in results:
+        print(f"{name:32} {duration / arguments.number * 1e3:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
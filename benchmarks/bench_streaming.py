@@ -0,0 +1,69 @@
+"""
+    bench_streaming
+    ~~~~~~~~~~~~~~~
+
+    This module measures the peak memory and the time of parsing a template
+    file with large hex texts, either read at once and parsed by the
+    generated parser or parsed by the streaming parser while it is read.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from binalyzer_template_provider import XMLTemplateParser
+from binalyzer_template_provider.streaming import StreamingXMLTemplateParser
+
+from synthetic import generate
+
+
+def parse(path):
+    with open(path, "r") as template_file:
+        return XMLTemplateParser(template_file.read()).parse()
+
+
+def parse_streaming(path):
+    return StreamingXMLTemplateParser(path).parse()
+
+
+def measure(function, path):
+    tracemalloc.start()
+    started = time.perf_counter()
+    template = function(path)
+    duration = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del template
+    return peak, duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fields", type=int, default=64)
+    parser.add_argument("--text-size", type=int, default=32 * 1024)
+    arguments = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+    text, _ = generate(
+        depth=1,
+        breadth=arguments.fields,
+        binding_density=0.0,
+        text_size=arguments.text_size,
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "template.xml")
+        with open(path, "w") as template_file:
+            template_file.write(text)
+        print(f"{os.path.getsize(path) / 2 ** 20:.1f} MiB template file")
+        for name, function in (
+            ("generated parser", parse),
+            ("streaming", parse_streaming),
+        ):
+            peak, duration = measure(function, path)
+            print(f"{name:20} {peak / 2 ** 20:10.1f} MiB {duration * 1e3:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
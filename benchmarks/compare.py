@@ -0,0 +1,170 @@
+"""
+    compare
+    ~~~~~~~
+
+    This module implements a performance regression gate. It runs the
+    benchmark suite, compares the results with the committed baseline and
+    exits with a non-zero status if parse time, resolution time or peak memory
+    regress beyond the tolerance of a benchmark, or if a benchmark of the
+    baseline is missing from the results unless ``--allow-missing`` is given.
+
+    Run ``python benchmarks/compare.py`` to check for regressions and
+    ``python benchmarks/compare.py --update`` to record a new baseline.
+"""
+import argparse
+import json
+import os
+import sys
+
+import suite
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+#: Allowed relative increase per metric unless a benchmark overrides it
+DEFAULT_TOLERANCES = {"time": 0.5, "peak_memory": 0.25}
+
+#: Values of the suite's results compared per metric
+METRICS = {"time": "min", "peak_memory": "peak_memory"}
+
+
+def tolerance(baseline, name, metric):
+    tolerances = baseline.get("tolerances", {})
+    benchmark_tolerances = tolerances.get("benchmarks", {}).get(name, {})
+    if metric in benchmark_tolerances:
+        return benchmark_tolerances[metric]
+    return tolerances.get("default", DEFAULT_TOLERANCES).get(
+        metric, DEFAULT_TOLERANCES[metric]
+    )
+
+
+def compare(baseline, results, allow_missing=False):
+    """Returns a row per benchmark and metric and whether any of them
+    regressed. A benchmark of the baseline missing from the results counts
+    as a regression unless missing benchmarks are allowed.
+    """
+    rows = []
+    regressed = False
+    for name, expected in sorted(baseline["benchmarks"].items()):
+        actual = results["benchmarks"].get(name)
+        if actual is None:
+            status = "missing" if allow_missing else "MISSING"
+            rows.append((name, "", "", "", "", "", status))
+            regressed = regressed or not allow_missing
+            continue
+        for metric, key in METRICS.items():
+            if key not in expected or key not in actual:
+                continue
+            limit = tolerance(baseline, name, metric)
+            change = actual[key] / expected[key] - 1 if expected[key] else 0.0
+            status = "ok"
+            if change > limit:
+                status = "REGRESSED"
+                regressed = True
+            rows.append(
+                (
+                    name,
+                    metric,
+                    _format(metric, expected[key]),
+                    _format(metric, actual[key]),
+                    f"{change * 100:+.1f} %",
+                    f"{limit * 100:.0f} %",
+                    status,
+                )
+            )
+    return rows, regressed
+
+
+def format_table(rows):
+    header = ("benchmark", "metric", "baseline", "current", "change", "limit", "")
+    widths = [
+        max(len(str(row[column])) for row in [header] + rows)
+        for column in range(len(header))
+    ]
+    lines = []
+    for row in [header] + rows:
+        lines.append(
+            "  ".join(
+                str(value).ljust(width) if column < 2 else str(value).rjust(width)
+                for column, (value, width) in enumerate(zip(row, widths))
+            ).rstrip()
+        )
+    return "\n".join(lines)
+
+
+def _format(metric, value):
+    if metric == "time":
+        return f"{value * 1e3:.3f} ms"
+    return f"{value / 1024:.1f} KiB"
+
+
+def _shapes_and_scenarios(baseline):
+    shapes = set()
+    scenarios = set()
+    for name in baseline["benchmarks"]:
+        scenario, shape = name.rstrip("]").split("[")
+        scenarios.add(scenario)
+        shapes.add(shape)
+    return (
+        [shape for shape in suite.SHAPES if shape in shapes],
+        [scenario for scenario in suite.Benchmark.SCENARIOS if scenario in scenarios],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--results", help="compare stored results of the suite")
+    parser.add_argument("--update", action="store_true", help="record a baseline")
+    parser.add_argument(
+        "--allow-missing",
+        action="store_true",
+        help="ignore benchmarks of the baseline missing from the results",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=1)
+    arguments = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+    baseline = None
+    if os.path.exists(arguments.baseline):
+        with open(arguments.baseline, "r") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    if arguments.results:
+        with open(arguments.results, "r") as results_file:
+            results = json.load(results_file)
+    else:
+        shapes, scenarios = None, None
+        if baseline is not None and not arguments.update:
+            shapes, scenarios = _shapes_and_scenarios(baseline)
+        results = suite.run(shapes, scenarios, arguments.repeat, arguments.number)
+
+    if arguments.update:
+        tolerances = {"default": dict(DEFAULT_TOLERANCES), "benchmarks": {}}
+        if baseline is not None:
+            tolerances = baseline.get("tolerances", tolerances)
+        results["tolerances"] = tolerances
+        with open(arguments.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"Recorded baseline of {len(results['benchmarks'])} benchmarks.")
+        return 0
+
+    if baseline is None:
+        print(f"Unable to find baseline '{arguments.baseline}'.", file=sys.stderr)
+        return 2
+
+    rows, regressed = compare(baseline, results, arguments.allow_missing)
+    print(format_table(rows))
+    if regressed:
+        print(
+            f"\nPerformance regressed or benchmarks are missing compared to "
+            f"baseline of commit {baseline.get('commit')}.",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+    loadtest
+    ~~~~~~~~
+
+    This module implements a load test of the template provider. Parsing and
+    dissection of mixed synthetic templates are driven from several threads
+    in each of several processes. Every result is compared with the result of
+    a single-threaded run, so mismatched template trees and exceptions under
+    contention are reported together with throughput and latency percentiles.
+
+    Run ``python benchmarks/loadtest.py --threads 8 --processes 2``. With
+    ``--shared``, all threads of a process use a single
+    :class:`~binalyzer_template_provider.XMLTemplateProviderExtension`, so
+    ``dissect`` is expected to fail while ``session`` must not.
+"""
+import argparse
+import concurrent.futures
+import random
+import sys
+import threading
+import time
+import traceback
+
+from anytree import PreOrderIter
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension, XMLTemplateParser
+
+from synthetic import Shape, SyntheticTemplate
+
+#: Synthetic templates used by the operations
+SHAPES = {
+    "small": Shape(depth=2, breadth=4, binding_density=0.25, count=1, text_size=0),
+    "deep": Shape(depth=4, breadth=2, binding_density=0.5, count=1, text_size=0),
+    "bindings": Shape(depth=2, breadth=8, binding_density=1.0, count=1, text_size=0),
+    "counted": Shape(depth=2, breadth=3, binding_density=0.25, count=8, text_size=0),
+}
+
+#: Names of the operations
+OPERATIONS = ("parse", "dissect", "session")
+
+#: Reported latency percentiles
+PERCENTILES = (50, 95, 99)
+
+
+def create_binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    return binalyzer
+
+
+def template_path(template, root):
+    return ".".join(node.name or "" for node in template.path[len(root.path) :])
+
+
+def tree(template):
+    """Returns the structure of a parsed template tree."""
+    return [
+        (
+            template_path(node, template),
+            type(node.offset_property).__name__,
+            type(node.size_property).__name__,
+            type(node.count_property).__name__,
+            len(node.children),
+        )
+        for node in PreOrderIter(template)
+    ]
+
+
+def layout(template):
+    """Returns the resolved layout of a bound template tree."""
+    return [
+        (template_path(node, template), node.absolute_address, node.size)
+        for node in PreOrderIter(template)
+    ]
+
+
+class Workload(object):
+    """Synthetic templates, their data and the expected results of the
+    operations.
+    """
+
+    def __init__(self):
+        self.templates = {}
+        self.expected = {}
+        for name, shape in SHAPES.items():
+            text, data = SyntheticTemplate(shape).generate()
+            self.templates[name] = (text, data)
+            self.expected[("parse", name)] = tree(XMLTemplateParser(text).parse())
+            binalyzer = create_binalyzer()
+            binalyzer.xml.from_str(text, data)
+            self.expected[("dissect", name)] = layout(binalyzer.template)
+            self.expected[("session", name)] = self.expected[("dissect", name)]
+
+    def execute(self, operation, name, binalyzer):
+        text, data = self.templates[name]
+        if operation == "parse":
+            return tree(XMLTemplateParser(text).parse())
+        if operation == "session":
+            return layout(binalyzer.xml.session(text, data).template)
+        binalyzer.xml.from_str(text, data)
+        return layout(binalyzer.template)
+
+
+def run_threads(threads, iterations, shared, seed):
+    """Runs the workload in ``threads`` threads and returns a sample per
+    operation as ``(operation, template, latency, error)`` tuples. The error
+    is :const:`None`, ``"mismatch"`` or a formatted exception.
+    """
+    workload = Workload()
+    shared_binalyzer = create_binalyzer() if shared else None
+    barrier = threading.Barrier(threads)
+    samples = []
+    lock = threading.Lock()
+
+    def worker(index):
+        generator = random.Random(seed * 1000 + index)
+        binalyzer = shared_binalyzer or create_binalyzer()
+        local_samples = []
+        barrier.wait()
+        for _ in range(iterations):
+            operation = generator.choice(OPERATIONS)
+            name = generator.choice(sorted(workload.templates))
+            error = None
+            start = time.perf_counter()
+            try:
+                result = workload.execute(operation, name, binalyzer)
+                if result != workload.expected[(operation, name)]:
+                    error = "mismatch"
+            except Exception:  # pylint: disable=broad-except
+                error = traceback.format_exc(limit=4)
+            latency = time.perf_counter() - start
+            local_samples.append((operation, name, latency, error))
+        with lock:
+            samples.extend(local_samples)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return samples
+
+
+def run(threads=4, processes=1, iterations=50, shared=False):
+    """Runs the load test and returns the samples of all processes and the
+    wall time.
+    """
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+    start = time.perf_counter()
+    if processes == 1:
+        samples = run_threads(threads, iterations, shared, 0)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            futures = [
+                executor.submit(run_threads, threads, iterations, shared, seed)
+                for seed in range(processes)
+            ]
+            samples = [sample for future in futures for sample in future.result()]
+    return samples, time.perf_counter() - start
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+    return values[index]
+
+
+def report(samples, duration):
+    """Returns the report of a load test as text and whether it failed."""
+    lines = [
+        f"{len(samples)} operations in {duration:.2f} s, "
+        f"{len(samples) / duration:.1f} operations/s"
+    ]
+    header = "operation  " + "".join(f"{f'p{p}':>12}" for p in PERCENTILES)
+    lines.append(header + f"{'errors':>10}{'mismatches':>12}")
+    failed = False
+    for operation in OPERATIONS:
+        operation_samples = [sample for sample in samples if sample[0] == operation]
+        if not operation_samples:
+            continue
+        latencies = [sample[2] for sample in operation_samples]
+        mismatches = sum(1 for sample in operation_samples if sample[3] == "mismatch")
+        errors = sum(
+            1 for sample in operation_samples if sample[3] not in (None, "mismatch")
+        )
+        failed = failed or bool(errors or mismatches)
+        lines.append(
+            f"{operation:11}"
+            + "".join(
+                f"{percentile(latencies, p) * 1e3:9.3f} ms" for p in PERCENTILES
+            )
+            + f"{errors:>10}{mismatches:>12}"
+        )
+    tracebacks = sorted(
+        {sample[3] for sample in samples if sample[3] not in (None, "mismatch")}
+    )
+    for text in tracebacks[:3]:
+        lines.append("")
+        lines.append(text.rstrip())
+    return "\n".join(lines), failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=50, help="per thread")
+    parser.add_argument("--shared", action="store_true")
+    arguments = parser.parse_args()
+    samples, duration = run(
+        arguments.threads, arguments.processes, arguments.iterations, arguments.shared
+    )
+    text, failed = report(samples, duration)
+    print(text)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+    suite
+    ~~~~~
+
+    This module implements a benchmark suite for the template provider. Every
+    scenario is run for a set of synthetic templates and the results are
+    stored as JSON to compare them between commits.
+
+    Run ``python benchmarks/suite.py --output results.json``.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+from anytree import PreOrderIter
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension, XMLTemplateParser
+
+from synthetic import Shape, SyntheticTemplate
+
+#: Synthetic templates the scenarios are run for
+SHAPES = {
+    "small": Shape(depth=2, breadth=4, binding_density=0.25, count=1, text_size=0),
+    "deep": Shape(depth=6, breadth=2, binding_density=0.25, count=1, text_size=0),
+    "wide": Shape(depth=2, breadth=16, binding_density=0.25, count=1, text_size=0),
+    "bindings": Shape(depth=2, breadth=12, binding_density=1.0, count=1, text_size=0),
+    "counted": Shape(depth=2, breadth=4, binding_density=0.25, count=64, text_size=0),
+    "text": Shape(depth=2, breadth=8, binding_density=0.25, count=1, text_size=256),
+}
+
+
+def create_binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    return binalyzer
+
+
+def resolve(template):
+    for node in PreOrderIter(template):
+        node.absolute_address, node.size
+        if not node.children:
+            node.value
+
+
+class Benchmark(object):
+    """A synthetic template and the scenarios measured for it.
+
+    :param name: name of the synthetic template
+    :param shape: the :class:`~synthetic.Shape` of the template
+    :param directory: directory to store the template and data files in
+    """
+
+    #: Names of the measured scenarios
+    SCENARIOS = ("parse", "from_str", "from_file", "resolve")
+
+    def __init__(self, name, shape, directory):
+        self.name = name
+        self.shape = shape
+        synthetic = SyntheticTemplate(shape)
+        self.text, self.data = synthetic.generate()
+        self.nodes = synthetic.nodes
+        self.template_path = os.path.join(directory, f"{name}.xml")
+        self.data_path = os.path.join(directory, f"{name}.bin")
+        with open(self.template_path, "w") as template_file:
+            template_file.write(self.text)
+        with open(self.data_path, "wb") as data_file:
+            data_file.write(self.data)
+
+    def parse(self):
+        XMLTemplateParser(self.text).parse()
+
+    def from_str(self):
+        create_binalyzer().xml.from_str(self.text, self.data)
+
+    def from_file(self):
+        create_binalyzer().xml.from_file(self.template_path, self.data_path)
+
+    def resolve(self):
+        binalyzer = create_binalyzer()
+        binalyzer.xml.from_str(self.text, self.data)
+        resolve(binalyzer.template)
+
+
+def measure(fn, repeat, number):
+    timings = [
+        duration / number
+        for duration in timeit.repeat(fn, repeat=repeat, number=number)
+    ]
+    return {
+        "mean": statistics.mean(timings),
+        "min": min(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def measure_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(shapes=None, scenarios=None, repeat=5, number=3, progress=None, memory=True):
+    """Runs the suite and returns the results as a JSON serializable dict.
+    Peak memory is measured in a separate run of each scenario.
+    """
+    shapes = shapes or list(SHAPES)
+    scenarios = scenarios or list(Benchmark.SCENARIOS)
+    results = {
+        "commit": commit(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for shape_name in shapes:
+            benchmark = Benchmark(shape_name, SHAPES[shape_name], directory)
+            for scenario in scenarios:
+                name = f"{scenario}[{shape_name}]"
+                fn = getattr(benchmark, scenario)
+                result = measure(fn, repeat, number)
+                if memory:
+                    result["peak_memory"] = measure_memory(fn)
+                result["params"] = benchmark.shape._asdict()
+                result["nodes"] = benchmark.nodes
+                results["benchmarks"][name] = result
+                if progress:
+                    progress(name, result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", help="path of the JSON results")
+    parser.add_argument("--shape", action="append", choices=sorted(SHAPES))
+    parser.add_argument("--scenario", action="append", choices=Benchmark.SCENARIOS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=3)
+    parser.add_argument("--no-memory", dest="memory", action="store_false")
+    arguments = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+    def progress(name, result):
+        print(f"{name:24} {result['mean'] * 1e3:10.3f} ms", file=sys.stderr)
+
+    results = run(
+        arguments.shape,
+        arguments.scenario,
+        arguments.repeat,
+        arguments.number,
+        progress,
+        arguments.memory,
+    )
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
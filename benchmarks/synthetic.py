@@ -0,0 +1,115 @@
+"""
+    synthetic
+    ~~~~~~~~~
+
+    This module generates synthetic templates together with matching data.
+
+    A template consists of a ``num`` field followed by a ``record`` counted by
+    it. Records are trees of sections of the given depth and breadth. The
+    leaves are static fields; a share of them, the binding density, is
+    replaced by a length field and a field whose size is bound to it. Every
+    leaf may carry a text payload.
+"""
+import random
+
+from collections import namedtuple
+
+#: Parameters of a synthetic template
+Shape = namedtuple(
+    "Shape", ["depth", "breadth", "binding_density", "count", "text_size"]
+)
+
+
+class SyntheticTemplate(object):
+    """Generates the XML description and data of a synthetic template.
+
+    :param shape: the :class:`Shape` of the template
+    :param seed: seed of the pseudo random generator
+    """
+
+    def __init__(self, shape: Shape, seed: int = 0):
+        self.shape = shape
+        self._random = random.Random(seed)
+        self._names = 0
+        self._lines = []
+        self._leaves = []
+
+        #: Number of templates once the records are expanded by their count
+        self.nodes = 0
+
+    def generate(self):
+        """Returns the template text and data."""
+        self._lines = [
+            "<template>",
+            '    <field name="num" size="2"></field>',
+            '    <record name="record" count="{num}">',
+        ]
+        self.nodes = 0
+        self._section(self.shape.depth, 2)
+        self._lines.extend(["    </record>", "</template>"])
+        self.nodes = 2 + self.shape.count * (1 + self.nodes)
+
+        data = bytearray(self.shape.count.to_bytes(2, "little"))
+        for _ in range(self.shape.count):
+            for size in self._leaves:
+                if size is None:
+                    size = self._random.randint(1, 8)
+                    data.append(size)
+                data.extend(random_bytes(self._random, size))
+        return "\n".join(self._lines), bytes(data)
+
+    def _section(self, depth, indent):
+        for _ in range(self.shape.breadth):
+            if depth > 1:
+                self._emit(indent, f'<section name="{self._name("section")}">')
+                self.nodes += 1
+                self._section(depth - 1, indent + 1)
+                self._emit(indent, "</section>")
+            elif self._random.random() < self.shape.binding_density:
+                length_name = self._name("length")
+                self._emit(indent, f'<field name="{length_name}" size="1"></field>')
+                self._field(indent, "{" + length_name + "}")
+                self._leaves.append(None)
+                self.nodes += 2
+            else:
+                size = self._random.choice((1, 2, 4, 8))
+                self._field(indent, str(size))
+                self._leaves.append(size)
+                self.nodes += 1
+
+    def _field(self, indent, size):
+        text = ""
+        if self.shape.text_size:
+            text = random_bytes(self._random, self.shape.text_size).hex()
+        self._emit(
+            indent, f'<field name="{self._name("field")}" size="{size}">{text}</field>'
+        )
+
+    def _name(self, prefix):
+        self._names += 1
+        return f"{prefix}{self._names}"
+
+    def _emit(self, indent, line):
+        self._lines.append("    " * indent + line)
+
+
+def random_bytes(rng: random.Random, size: int):
+    """Returns ``size`` pseudo random bytes, the same as
+    ``Random.randbytes`` of Python 3.9 and later.
+    """
+    if not size:
+        return b""
+    return rng.getrandbits(8 * size).to_bytes(size, "little")
+
+
+def generate(
+    depth: int = 2,
+    breadth: int = 4,
+    binding_density: float = 0.25,
+    count: int = 1,
+    text_size: int = 0,
+    seed: int = 0,
+):
+    """Returns the text and data of a synthetic template."""
+    shape = Shape(depth, breadth, binding_density, count, text_size)
+    return SyntheticTemplate(shape, seed).generate()
@@ -8,6 +8,7 @@
     :copyright: 2020 Denis Vasilík
     :license: MIT, see LICENSE for details.
 """
+import sys
 
 name = "binalyzer_template_provider"
 
@@ -16,5 +17,27 @@ __build__ = 0
 __version__ = "{}".format(__tag__)
 __commit__ = "0000000"
 
-from .extension import XMLTemplateProviderExtension
-from .xml import XMLTemplateParser
+#: Modules of the public names, imported on first access
+_EXPORTS = {
+    "XMLTemplateProviderExtension": ".extension",
+    "XMLTemplateParser": ".xml",
+}
+
+if sys.version_info < (3, 7):
+    # Module attribute hooks need Python 3.7
+    from .extension import XMLTemplateProviderExtension
+    from .xml import XMLTemplateParser
+
+
+def __getattr__(attribute):
+    if attribute not in _EXPORTS:
+        raise AttributeError(f"module '{__name__}' has no attribute '{attribute}'")
+    import importlib
+
+    value = getattr(importlib.import_module(_EXPORTS[attribute], __name__), attribute)
+    globals()[attribute] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
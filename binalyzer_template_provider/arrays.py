@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.arrays
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements vectorized access to counted templates whose
+    elements have a static layout. NumPy is used if it is installed, otherwise
+    the values are provided using :class:`memoryview` and :mod:`array`.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import array
+import sys
+
+from .layout import static_layout, BYTEORDER_PREFIXES
+from .utils import lazy_import
+
+#: NumPy, imported on first use, or :const:`None` if it isn't installed
+numpy = lazy_import("numpy")
+
+TYPECODES = {
+    array.array(typecode).itemsize: typecode for typecode in ("Q", "L", "I", "H", "B")
+}
+
+
+def read_array(templates, byteorder: str = "little"):
+    """Reads the values of all elements of a counted template at once.
+
+    The elements are given as the list a counted template is expanded to during
+    binding, e.g. ``binalyzer.template.params.param``. A single template is
+    treated as a list containing one element.
+
+    With NumPy installed, a NumPy array is returned that shares its memory with
+    the bound data. Elements consisting of a single field of 1, 2, 4 or 8 bytes
+    are mapped to unsigned integers, all other elements to a structured dtype
+    that contains one field per leaf template.
+
+    Without NumPy, single field elements are returned as :class:`memoryview`
+    or, if the byteorder does not match the native one, as
+    :class:`array.array`. Other elements are returned as a two-dimensional
+    :class:`memoryview` of bytes, which is a copy unless the elements are
+    contiguous.
+
+    .. note:: A view prevents the underlying :class:`io.BytesIO` from being
+              resized as long as it is referenced.
+
+    :param templates: the elements of a counted template
+    :param byteorder: the byteorder of integer fields, either ``little`` or
+                      ``big``
+    """
+    if not isinstance(templates, (list, tuple)):
+        templates = [templates]
+    if not templates:
+        raise RuntimeError("Unable to read an array without elements.")
+    if byteorder not in BYTEORDER_PREFIXES:
+        raise RuntimeError("Expected 'little' or 'big'.")
+
+    layout = static_layout(templates[0])
+    start = templates[0].absolute_address
+    stride = _get_stride(templates, layout.size)
+    count = len(templates)
+
+    data = templates[0].binding_context.data_provider.data
+    if hasattr(data, "getbuffer"):
+        buffer = data.getbuffer()
+    else:
+        buffer = memoryview(data)
+
+    if start + stride * (count - 1) + layout.size > len(buffer):
+        raise RuntimeError("Unable to read an array beyond the end of data.")
+
+    if numpy is not None:
+        return _read_numpy_array(buffer, layout, start, stride, count, byteorder)
+    return _read_memoryview(buffer, layout, start, stride, count, byteorder)
+
+
+def _get_stride(templates, size):
+    if len(templates) == 1:
+        return size
+    start = templates[0].absolute_address
+    stride = templates[1].absolute_address - start
+    end = templates[-1].absolute_address
+    if stride < size or end != start + stride * (len(templates) - 1):
+        raise RuntimeError("Elements of an array must be evenly spaced.")
+    return stride
+
+
+def _is_scalar(layout):
+    return (
+        not layout.template.children
+        and len(layout.fields) == 1
+        and layout.size in TYPECODES
+    )
+
+
+def _read_numpy_array(buffer, layout, start, stride, count, byteorder):
+    if _is_scalar(layout):
+        dtype = numpy.dtype(f"{BYTEORDER_PREFIXES[byteorder]}u{layout.size}")
+    else:
+        dtype = layout.dtype(byteorder)
+        start -= layout.padding_before
+
+    if stride == dtype.itemsize:
+        return numpy.frombuffer(buffer, dtype=dtype, count=count, offset=start)
+    return numpy.ndarray(
+        shape=(count,), dtype=dtype, buffer=buffer, offset=start, strides=(stride,)
+    )
+
+
+def _read_memoryview(buffer, layout, start, stride, count, byteorder):
+    if _is_scalar(layout) and stride == layout.size:
+        view = buffer[start : start + stride * count]
+        typecode = TYPECODES[layout.size]
+        if byteorder == sys.byteorder:
+            return view.cast(typecode)
+        values = array.array(typecode)
+        values.frombytes(view)
+        values.byteswap()
+        return values
+
+    if stride == layout.size:
+        view = buffer[start : start + stride * count]
+    else:
+        view = memoryview(
+            b"".join(
+                buffer[offset : offset + layout.size]
+                for offset in range(start, start + stride * count, stride)
+            )
+        )
+    return view.cast("B", (count, layout.size))
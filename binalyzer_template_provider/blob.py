@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.blob
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements the decoding of texts and the binary files texts
+    may reference instead of embedding their bytes. A referenced file is
+    memory-mapped on first access, so parsing a template never reads it.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import base64
+import mmap
+import os
+
+#: Encodings of texts between the tags of an element
+TEXT_ENCODINGS = ("hex", "base64")
+
+#: Encoding of texts without a ``text-encoding`` attribute
+DEFAULT_TEXT_ENCODING = "hex"
+
+
+def decode_text(text: str, encoding: str = DEFAULT_TEXT_ENCODING):
+    """Decodes a text between the tags of an element, ignoring whitespace."""
+    text = "".join(text.split())
+    if encoding == "hex":
+        return bytes.fromhex(text)
+    if encoding == "base64":
+        return base64.b64decode(text, validate=True)
+    raise RuntimeError("Expected 'hex' or 'base64'.")
+
+
+def text_file_blob(path: str, ctx, base_path: str = None):
+    """Returns the :class:`MappedBlob` of a ``text-file`` attribute. Its
+    offset and length are taken from the ``text-offset`` and ``text-length``
+    attributes of the element.
+    """
+    offset = 0
+    length = None
+    for attribute in ctx.attribute():
+        name = attribute.Name().getText()
+        if name in ("text-offset", "text-length"):
+            if attribute.binding() is not None:
+                raise RuntimeError(
+                    f"Using a reference for a {name} attribute is not allowed."
+                )
+            value = int(attribute.value().getText()[1:-1], base=0)
+            if name == "text-offset":
+                offset = value
+            else:
+                length = value
+    return MappedBlob(os.path.join(base_path or "", path), offset, length)
+
+
+class MappedBlob(object):
+    """Bytes of a file that are memory-mapped on first access.
+
+    A blob supports :func:`len`, indexing, slicing, :class:`bytes` and
+    comparison with bytes-like objects. Its length is known without mapping
+    the file.
+
+    :param path: path of the file
+    :param offset: offset of the bytes within the file
+    :param length: number of bytes, defaults to the rest of the file
+    """
+
+    def __init__(self, path: str, offset: int = 0, length: int = None):
+        if not os.path.isfile(path):
+            raise RuntimeError(f"Unable to find text file '{path}'.")
+        size = os.path.getsize(path)
+        if length is None:
+            length = size - offset
+        if offset < 0 or length < 0 or offset + length > size:
+            raise RuntimeError(
+                f"Text of {length} bytes at offset {offset} exceeds '{path}'."
+            )
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self._mmap = None
+        self._buffer = None
+        self._view = None
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return bytes(self.view[key])
+        return self.view[key]
+
+    def __bytes__(self):
+        return bytes(self.view)
+
+    def __eq__(self, other):
+        if isinstance(other, MappedBlob):
+            other = other.view
+        try:
+            return self.view == memoryview(other)
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (
+            f"MappedBlob({self.path!r}, offset={self.offset}, "
+            f"length={self.length})"
+        )
+
+    @property
+    def mapped(self):
+        """Whether the file has been mapped."""
+        return self._view is not None
+
+    @property
+    def view(self):
+        """A read-only :class:`memoryview` of the bytes."""
+        if self._view is None:
+            if not self.length:
+                self._view = memoryview(b"")
+                return self._view
+            start = self.offset - self.offset % mmap.ALLOCATIONGRANULARITY
+            with open(self.path, "rb") as blob_file:
+                self._mmap = mmap.mmap(
+                    blob_file.fileno(),
+                    self.offset + self.length - start,
+                    access=mmap.ACCESS_READ,
+                    offset=start,
+                )
+            self._buffer = memoryview(self._mmap)
+            offset = self.offset - start
+            self._view = self._buffer[offset : offset + self.length]
+        return self._view
+
+    def close(self):
+        """Unmaps the file. It is mapped again on the next access."""
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._buffer.release()
+            self._mmap.close()
+            self._buffer = None
+            self._mmap = None
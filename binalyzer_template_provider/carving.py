@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.carving
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements the carving of embedded structures from large
+    binaries. The leading signatures of a set of templates are searched in a
+    single pass and every hit is checked against the remaining signatures of
+    the template's header. Hits are not bound, fields whose offset or size
+    depends on data are not checked.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import concurrent.futures
+import mmap
+import os
+import re
+import time
+
+from collections import namedtuple
+
+from binalyzer_core import ValueProperty, RelativeOffsetValueProperty
+
+from .layout import static_layout
+from .signature import SignatureTable
+
+#: An occurrence of a template whose header signatures match the scanned data
+Hit = namedtuple("Hit", ["offset", "template"])
+
+#: A signature of a template header at a static offset
+HeaderSignature = namedtuple("HeaderSignature", ["offset", "signature"])
+
+#: Default number of bytes scanned by a worker process at once
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+class SignatureCarver(object):
+    """Finds occurrences of templates in binary data by their signatures.
+
+    The header of a template consists of the leading children of the root
+    whose offsets are known without reading any data. The first signature of
+    the header anchors the search, all others have to match as well. Only
+    these static signatures are compared: a hit is not bound to the data, so
+    fields of the header whose size or offset is a binding are not checked.
+    Bind a :class:`Hit` to confirm it.
+
+    :param templates: parsed templates to search for
+    """
+
+    def __init__(self, templates):
+        self.templates = list(templates)
+
+        #: Header signatures per template
+        self.headers = [header_signatures(template) for template in self.templates]
+
+        for template, header in zip(self.templates, self.headers):
+            if not header:
+                raise RuntimeError(
+                    f"Unable to carve '{template.name}': no signature at a static "
+                    "offset."
+                )
+
+        self._scanner = _Scanner(self.headers)
+
+        #: Length of the longest anchor signature
+        self.max_signature_length = self._scanner.max_signature_length
+
+    def scan(self, data, start: int = 0, end: int = None):
+        """Yields a :class:`Hit` for every matching occurrence of a template
+        whose anchor signature starts within ``data[start:end]``.
+        """
+        for offset, index in self._scanner.scan(data, start, end):
+            yield Hit(offset, self.templates[index])
+
+    def scan_file(self, path: str):
+        """Memory-maps the given file and returns a list of all hits."""
+        with open(path, "rb") as data_file:
+            data_file.seek(0, 2)
+            if data_file.tell() == 0:
+                return []
+            with mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return list(self.scan(data))
+
+    def scan_file_parallel(
+        self,
+        path: str,
+        processes: int = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        """Scans a file in chunks using a pool of worker processes and returns
+        a :class:`CarvingReport`.
+
+        Every worker memory-maps the file when it scans its first chunk.
+        Chunks overlap by the length of the longest anchor signature minus one
+        byte, and a hit belongs to the chunk its anchor starts in, so hits at
+        chunk borders are reported once.
+        """
+        if chunk_size <= 0:
+            raise RuntimeError("Expected a positive chunk size.")
+        size = os.path.getsize(path)
+        started = time.perf_counter()
+        chunks = [
+            (path, self.headers, start, min(start + chunk_size, size))
+            for start in range(0, size, chunk_size)
+        ]
+        hits = set()
+        if chunks:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=processes
+            ) as executor:
+                for chunk_hits in executor.map(_scan_chunk, chunks):
+                    hits.update(chunk_hits)
+        duration = time.perf_counter() - started
+        return CarvingReport(
+            [Hit(offset, self.templates[index]) for offset, index in sorted(hits)],
+            size,
+            duration,
+        )
+
+
+class CarvingReport(object):
+    """Hits of a parallel scan together with its throughput.
+
+    :param hits: list of :class:`Hit` ordered by offset
+    :param size: number of bytes scanned
+    :param duration: wall time of the scan in seconds
+    """
+
+    def __init__(self, hits, size, duration):
+        self.hits = hits
+        self.size = size
+        self.duration = duration
+
+    @property
+    def throughput(self):
+        """Scan throughput in MB/s."""
+        if not self.duration:
+            return 0.0
+        return self.size / 1e6 / self.duration
+
+    def __str__(self):
+        return (
+            f"{len(self.hits)} hits in {self.size / 1e6:.1f} MB, "
+            f"{self.duration:.3f} s, {self.throughput:.1f} MB/s"
+        )
+
+
+class _Scanner(object):
+    def __init__(self, headers):
+        self.headers = headers
+        self._anchors = SignatureTable(
+            [_Anchor(header[0].signature) for header in headers]
+        )
+        signatures = sorted(
+            {header[0].signature for header in headers}, key=len, reverse=True
+        )
+        self._pattern = re.compile(
+            b"(?=" + b"|".join(re.escape(signature) for signature in signatures) + b")"
+        )
+        self.max_signature_length = self._anchors.max_length
+
+    def scan(self, data, start=0, end=None):
+        if end is None:
+            end = len(data)
+        overlap_end = min(end + self.max_signature_length - 1, len(data))
+        for match in self._pattern.finditer(data, start, overlap_end):
+            position = match.start()
+            if position >= end:
+                break
+            for index in self._anchors.lookup_all(data, position):
+                offset = position - self.headers[index][0].offset
+                if offset >= 0 and self._validate(data, offset, index):
+                    yield offset, index
+
+    def _validate(self, data, offset, index):
+        for header_signature in self.headers[index][1:]:
+            address = offset + header_signature.offset
+            signature = header_signature.signature
+            if data[address : address + len(signature)] != signature:
+                return False
+        return True
+
+
+_worker = None
+
+
+def _scan_chunk(chunk):
+    global _worker
+    path, headers, start, end = chunk
+    if _worker is None or _worker[0] != (path, headers):
+        if _worker is not None:
+            _worker[2].close()
+        with open(path, "rb") as data_file:
+            data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        _worker = ((path, headers), _Scanner(headers), data)
+    _, scanner, data = _worker
+    return list(scanner.scan(data, start, end))
+
+
+class _Anchor(object):
+    def __init__(self, signature):
+        self.signature = signature
+        self.parent = None
+
+
+def header_signatures(template):
+    """Returns the signatures of the given template's header ordered by
+    offset.
+
+    The header ends at the first child that is optional, counted or placed
+    at an offset depending on data.
+    """
+    signatures = []
+    if template.signature:
+        signatures.append(HeaderSignature(0, bytes(template.signature)))
+    cursor = 0
+    for child in template.children:
+        offset = _static_offset(child, cursor)
+        if offset is None or child.hint:
+            break
+        if type(child.count_property) is not ValueProperty or child.count > 1:
+            break
+        if child.count == 0:
+            continue
+        if child.signature:
+            signatures.append(HeaderSignature(offset, bytes(child.signature)))
+        try:
+            layout = static_layout(child)
+        except RuntimeError:
+            break
+        cursor = offset + layout.size + layout.padding_after
+    signatures.sort(key=lambda header_signature: header_signature.offset)
+    return signatures
+
+
+def _static_offset(template, cursor):
+    if not isinstance(template.offset_property, RelativeOffsetValueProperty):
+        return None
+    properties = (template.padding_before_property, template.boundary_property)
+    if any(type(value_property) is not ValueProperty for value_property in properties):
+        return None
+    offset = template.padding_before + cursor
+    boundary = template.boundary
+    if boundary and cursor % boundary:
+        offset += boundary - cursor % boundary
+    return offset
+
+
+def carve_file(templates, path: str):
+    """Returns the hits of the given templates within a file."""
+    return SignatureCarver(templates).scan_file(path)
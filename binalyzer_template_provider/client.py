@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.client
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements a client of the dissection server of
+    :mod:`~binalyzer_template_provider.daemon`. It only depends on the
+    standard library.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import argparse
+import json
+import socket
+import sys
+
+
+class DissectionClient(object):
+    """A connection to a dissection server.
+
+    :param socket_path: path of the server's Unix domain socket
+    :param timeout: timeout of socket operations in seconds
+    """
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(socket_path)
+        self._file = self._socket.makefile("rwb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def request(self, message: dict):
+        """Sends a request and returns the response. A :class:`RuntimeError`
+        is raised if the request failed.
+        """
+        self._file.write(json.dumps(message).encode() + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise RuntimeError("Connection closed by the dissection server.")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def ping(self):
+        self.request({"method": "ping"})
+
+    def register(self, text: str, template_id: str = None):
+        """Registers a template and returns its id."""
+        message = {"method": "register", "template": text}
+        if template_id is not None:
+            message["id"] = template_id
+        return self.request(message)["id"]
+
+    def dissect(self, template_id: str, path: str):
+        """Returns ``(path, absolute address, size)`` tuples of all templates
+        bound to a data file.
+        """
+        fields = self.request({"method": "dissect", "id": template_id, "path": path})
+        return [tuple(field) for field in fields["fields"]]
+
+    def shutdown(self):
+        self.request({"method": "shutdown"})
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog="binalyzer_template_provider.client")
+    parser.add_argument("socket", help="path of the Unix domain socket")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    commands.add_parser("ping")
+    commands.add_parser("shutdown")
+    register = commands.add_parser("register")
+    register.add_argument("template", help="path of the template file")
+    register.add_argument("--id", help="id of the template")
+    dissect = commands.add_parser("dissect")
+    dissect.add_argument("id", help="id of the template")
+    dissect.add_argument("data", help="path of the data file")
+    arguments = parser.parse_args(arguments)
+
+    with DissectionClient(arguments.socket) as client:
+        if arguments.command == "ping":
+            client.ping()
+        elif arguments.command == "shutdown":
+            client.shutdown()
+        elif arguments.command == "register":
+            with open(arguments.template, "r") as template_file:
+                print(client.register(template_file.read(), arguments.id))
+        else:
+            json.dump(client.dissect(arguments.id, arguments.data), sys.stdout)
+            sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
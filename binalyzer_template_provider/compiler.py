@@ -0,0 +1,430 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.compiler
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements a compiler that turns templates into Python modules
+    containing a specialized decode function. The generated code resolves
+    offsets and sizes using straight-line arithmetic instead of evaluating the
+    properties of a template tree.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import importlib.util
+import io
+import os
+
+from anytree import findall_by_attr
+
+from binalyzer_core import (
+    Binalyzer,
+    ValueProperty,
+    ReferenceProperty,
+    AutoSizeValueProperty,
+    StretchSizeProperty,
+    OffsetValueProperty,
+    RelativeOffsetValueProperty,
+    RelativeOffsetReferenceProperty,
+)
+
+from .utils import template_hash
+from .xml import XMLTemplateParser
+
+STRUCT_FORMATS = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+BYTEORDER_PREFIXES = {"little": "<", "big": ">"}
+
+MAX_NESTED_BLOCKS = 18
+
+
+class TemplateCompiler(object):
+    """Compiles XML template descriptions into Python modules.
+
+    Generated modules are cached on disk using the hash of the template
+    description. Loading a cached module neither requires parsing nor code
+    generation.
+
+    :param binalyzer: a :class:`~binalyzer_core.Binalyzer` providing the
+                      extensions referenced by ``provider`` bindings
+    :param cache_dir: directory of the module cache, defaults to the
+                      ``BINALYZER_CACHE_DIR`` environment variable or
+                      ``~/.cache/binalyzer``
+    """
+
+    #: Version of the generated code, part of the cache key
+    VERSION = 1
+
+    def __init__(self, binalyzer: Binalyzer = None, cache_dir: str = None):
+        self._binalyzer = binalyzer
+        if cache_dir is None:
+            cache_dir = os.environ.get(
+                "BINALYZER_CACHE_DIR",
+                os.path.join(os.path.expanduser("~"), ".cache", "binalyzer"),
+            )
+        self.cache_dir = cache_dir
+
+    def compile_file(self, template_file_path: str):
+        with open(template_file_path, "r") as template_file:
+            return self.compile_str(template_file.read())
+
+    def compile_str(self, text: str):
+        """Compiles an XML string and returns a :class:`CompiledTemplate`."""
+        key = template_hash(f"{self.VERSION}\n{text}")
+        module_path = os.path.join(self.cache_dir, f"template_{key}.py")
+        if not os.path.exists(module_path):
+            template = XMLTemplateParser(text, binalyzer=self._binalyzer).parse()
+            source = self.generate(template)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temporary_path = f"{module_path}.{os.getpid()}.tmp"
+            with open(temporary_path, "w") as module_file:
+                module_file.write(source)
+            os.replace(temporary_path, module_path)
+        return CompiledTemplate(self._load(key, module_path), self._binalyzer)
+
+    def generate(self, template):
+        """Returns the source code of a module decoding the given template."""
+        return _CodeGenerator(template).generate()
+
+    def _load(self, key, module_path):
+        spec = importlib.util.spec_from_file_location(f"template_{key}", module_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+
+class CompiledTemplate(object):
+    """A template compiled into a Python module.
+
+    :param module: the generated module
+    :param binalyzer: a :class:`~binalyzer_core.Binalyzer` providing the
+                      extensions referenced by ``provider`` bindings
+    """
+
+    def __init__(self, module, binalyzer: Binalyzer = None):
+        self.module = module
+        self._providers = [
+            self._get_provider(binalyzer, name) for name in module.PROVIDERS
+        ]
+
+    def decode(self, data: bytes):
+        """Decodes the given data and returns the resolved template tree as
+        nested dictionaries. Leaves map to the bytes they are bound to and
+        counted templates to lists. Siblings sharing a name overwrite each
+        other just like attributes of a template do.
+        """
+        stream = io.BytesIO(data) if self._providers else None
+        return self.module.decode(data, stream, self._providers)
+
+    def _get_provider(self, binalyzer, name):
+        extension_name, provider_name = name.split(".")
+        if binalyzer is None or not binalyzer.has_extension(extension_name):
+            raise RuntimeError(f"Unable to find value provider '{name}'.")
+        extension = binalyzer.extension(extension_name)
+        factory = extension.__class__.__dict__[provider_name]
+
+        def provide(stream, address, size):
+            template = _ProviderTemplate(stream, address, size)
+            return factory(extension, _ProviderProperty(template)).get_value()
+
+        return provide
+
+
+class _ProviderDataProvider(object):
+    def __init__(self, data):
+        self.data = data
+
+
+class _ProviderTemplate(object):
+    """Stands in for a bound template when a compiled template calls a custom
+    value provider.
+    """
+
+    def __init__(self, stream, absolute_address, size):
+        self.binding_context = _ProviderDataProvider(stream)
+        self.binding_context.data_provider = self.binding_context
+        self.absolute_address = absolute_address
+        self.size = size
+
+    @property
+    def value(self):
+        data = self.binding_context.data
+        data.seek(self.absolute_address)
+        return data.read(self.size)
+
+
+class _ProviderProperty(object):
+    def __init__(self, template):
+        self.template = template
+
+
+class _CodeGenerator(object):
+    def __init__(self, root):
+        self._root = root
+        self._ids = {}
+        self._placed = set()
+        self._sized = set()
+        self._structs = {}
+        self._providers = []
+        self._lines = []
+
+    def generate(self):
+        self._node(self._root, None, 1, 1)
+        header = [
+            "# Generated by binalyzer_template_provider.compiler, do not edit.",
+            "import struct",
+            "",
+            f"PROVIDERS = {tuple(self._providers)!r}",
+        ]
+        for format, name in self._structs.items():
+            header.append(f"{name} = struct.Struct({format!r})")
+        header.extend(
+            [
+                "",
+                "",
+                "def _bnd(offset, boundary):",
+                "    if boundary and offset % boundary:",
+                "        return boundary - offset % boundary",
+                "    return 0",
+                "",
+                "",
+                "def decode(data, stream, providers):",
+            ]
+        )
+        for index in range(len(self._providers)):
+            header.append(f"    P{index} = providers[{index}]")
+        self._emit(1, "return r0")
+        return "\n".join(header + self._lines) + "\n"
+
+    def _node(self, template, index, indent, depth):
+        if depth > MAX_NESTED_BLOCKS:
+            raise RuntimeError(
+                f"Unable to compile '{template.name}': nested too deeply."
+            )
+        k = self._id(template)
+        parent = template.parent if template is not self._root else None
+        key = template.name or str(index)
+
+        counted = False
+        if parent is not None:
+            count_property = template.count_property
+            if type(count_property) is ValueProperty and count_property.value == 0:
+                return
+            if type(count_property) is not ValueProperty or count_property.value > 1:
+                counted = True
+                count = self._int(count_property, template, "count")
+                p = self._id(parent)
+                self._emit(indent, f"l{k} = r{p}[{key!r}] = []")
+                self._emit(indent, f"for _ in range({count}):")
+                indent += 1
+                depth += 1
+
+        self._offset(template, parent, indent)
+        self._placed.add(template)
+
+        if template.signature:
+            signature = bytes(template.signature)
+            window = f"data[a{k}:a{k} + {len(signature)}]"
+            if template.hint:
+                self._emit(indent, f"if {window} == {signature!r}:")
+                indent += 1
+                depth += 1
+            else:
+                message = f"Signature validation failed for '{template.name}'."
+                self._emit(indent, f"if {window} != {signature!r}:")
+                self._emit(indent + 1, f"raise RuntimeError({message!r})")
+
+        auto_size = isinstance(template.size_property, AutoSizeValueProperty)
+        if not auto_size:
+            self._emit(indent, f"s{k} = {self._size(template, parent)}")
+            self._sized.add(template)
+
+        if template.children:
+            self._emit(indent, f"r{k} = {{}}")
+            self._emit(indent, f"c{k} = 0")
+            for child_index, child in enumerate(template.children):
+                self._node(child, child_index, indent, depth)
+
+        if auto_size:
+            boundary = self._int(template.boundary_property, template, "boundary")
+            if template.children and boundary == "0":
+                self._emit(indent, f"s{k} = c{k}")
+            elif template.children:
+                self._emit(indent, f"s{k} = c{k} + _bnd(c{k}, {boundary})")
+            else:
+                self._emit(indent, f"s{k} = 0")
+            self._sized.add(template)
+
+        if not template.children:
+            self._emit(indent, f"r{k} = bytes(data[a{k}:a{k} + s{k}])")
+
+        if parent is not None:
+            p = self._id(parent)
+            padding_after = self._int(
+                template.padding_after_property, template, "padding-after"
+            )
+            if padding_after == "0":
+                self._emit(indent, f"c{p} = o{k} + s{k}")
+            else:
+                self._emit(indent, f"c{p} = o{k} + s{k} + {padding_after}")
+            if counted:
+                self._emit(indent, f"l{k}.append(r{k})")
+            else:
+                self._emit(indent, f"r{p}[{key!r}] = r{k}")
+
+    def _offset(self, template, parent, indent):
+        k = self._id(template)
+        p = self._id(parent) if parent is not None else None
+        parent_address = f"a{p}" if parent is not None else "0"
+        offset_property = template.offset_property
+        boundary = self._int(template.boundary_property, template, "boundary")
+
+        if isinstance(offset_property, RelativeOffsetValueProperty):
+            padding_before = self._int(
+                template.padding_before_property, template, "padding-before"
+            )
+            terms = []
+            if padding_before != "0":
+                terms.append(padding_before)
+            if parent is not None:
+                if boundary != "0":
+                    terms.append(f"_bnd(o{p}, {boundary})")
+                terms.append(f"c{p}")
+                if boundary != "0":
+                    terms.append(f"_bnd(c{p}, {boundary})")
+            self._emit(indent, f"o{k} = {' + '.join(terms) or '0'}")
+            self._emit(indent, f"a{k} = {parent_address} + o{k}")
+        elif isinstance(offset_property, OffsetValueProperty):
+            offset = offset_property.value_provider._value
+            self._emit(indent, f"a{k} = {parent_address} + {offset}")
+            if boundary != "0":
+                self._emit(indent, f"a{k} += _bnd(a{k}, {boundary})")
+            self._emit(indent, f"o{k} = a{k} - {parent_address}")
+        elif isinstance(offset_property, RelativeOffsetReferenceProperty):
+            offset = self._int(offset_property, template, "offset")
+            self._emit(indent, f"o{k} = {offset}")
+            self._emit(indent, f"a{k} = {parent_address} + o{k}")
+        elif type(offset_property) is ValueProperty:
+            self._emit(indent, f"a{k} = o{k} = {offset_property.value}")
+        else:
+            raise RuntimeError(
+                f"Unable to compile offset of '{template.name}': unsupported "
+                f"{type(offset_property).__name__}."
+            )
+
+    def _size(self, template, parent):
+        k = self._id(template)
+        size_property = template.size_property
+        if not isinstance(size_property, StretchSizeProperty):
+            return self._int(size_property, template, "size", size=None)
+
+        if parent is None:
+            return "len(data)"
+        if type(template.count_property) is not ValueProperty:
+            raise RuntimeError(
+                f"Unable to compile stretched size of counted '{template.name}'."
+            )
+
+        p = self._id(parent)
+        siblings = parent.children[parent.children.index(template) + 1 :]
+        parent_auto_size = isinstance(parent.size_property, AutoSizeValueProperty)
+        if siblings and isinstance(siblings[0].offset_property, OffsetValueProperty):
+            self._static_sibling(siblings[0], template)
+            offset = siblings[0].offset_property.value_provider._value
+            boundary = siblings[0].boundary_property.value
+            if boundary:
+                return f"{offset} + _bnd(a{p} + {offset}, {boundary}) - o{k}"
+            return f"{offset} - o{k}"
+        if siblings and not parent_auto_size:
+            size = sum(self._static_sibling(sibling, template) for sibling in siblings)
+            return f"s{p} - {size} - o{k}"
+        if not parent_auto_size:
+            return f"s{p} - o{k}"
+        boundary = self._int(parent.boundary_property, parent, "boundary")
+        if boundary != "0":
+            return f"{boundary} - o{k} if {boundary} > 0 else len(data)"
+        return "len(data)"
+
+    def _static_sibling(self, sibling, template):
+        properties = (
+            sibling.count_property,
+            sibling.size_property,
+            sibling.padding_before_property,
+            sibling.padding_after_property,
+            sibling.boundary_property,
+        )
+        if (
+            any(
+                type(value_property) is not ValueProperty
+                for value_property in properties
+            )
+            or sibling.hint
+        ):
+            raise RuntimeError(
+                f"Unable to compile stretched size of '{template.name}': the "
+                f"size of '{sibling.name}' is not static."
+            )
+        return sibling.count * (
+            sibling.padding_before + sibling.size + sibling.padding_after
+        )
+
+    def _int(self, value_property, template, attribute, size=""):
+        k = self._id(template)
+        if type(value_property) is ValueProperty:
+            return repr(value_property.value)
+
+        provider_name = getattr(value_property, "provider_name", None)
+        if provider_name is not None:
+            if provider_name not in self._providers:
+                self._providers.append(provider_name)
+            provider = f"P{self._providers.index(provider_name)}"
+
+        if isinstance(value_property, ReferenceProperty):
+            target = self._resolve(value_property, template)
+            j = self._id(target)
+            if provider_name is not None:
+                return f"{provider}(stream, a{j}, s{j})"
+            return self._decode(target, value_property.value_provider.byteorder)
+
+        if provider_name is not None and template in self._placed:
+            if size == "":
+                size = f"s{k}" if template in self._sized else None
+            return f"{provider}(stream, a{k}, {size})"
+
+        raise RuntimeError(
+            f"Unable to compile {attribute} of '{template.name}': unsupported "
+            f"{type(value_property).__name__}."
+        )
+
+    def _decode(self, template, byteorder):
+        j = self._id(template)
+        size_property = template.size_property
+        if (
+            type(size_property) is ValueProperty
+            and size_property.value in STRUCT_FORMATS
+        ):
+            format = BYTEORDER_PREFIXES[byteorder] + STRUCT_FORMATS[size_property.value]
+            name = self._structs.setdefault(format, f"_S{len(self._structs)}")
+            return f"{name}.unpack_from(data, a{j})[0]"
+        return f"int.from_bytes(data[a{j}:a{j} + s{j}], {byteorder!r})"
+
+    def _resolve(self, value_property, template):
+        name = value_property.reference_name
+        origin = value_property.origin
+        while origin.parent:
+            result = findall_by_attr(origin.parent, name)
+            if result:
+                if result[0] not in self._sized:
+                    raise RuntimeError(
+                        f"Unable to compile '{template.name}': forward "
+                        f"reference to '{name}'."
+                    )
+                return result[0]
+            origin = origin.parent
+        raise RuntimeError(f'Unable to find referenced template "{name}".')
+
+    def _id(self, template):
+        return self._ids.setdefault(template, len(self._ids))
+
+    def _emit(self, indent, line):
+        self._lines.append("    " * indent + line)
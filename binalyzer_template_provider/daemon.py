@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.daemon
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements a local dissection server. It keeps parsed
+    templates and their layout caches in memory and answers requests on a
+    Unix domain socket, so short-lived clients avoid importing the parser and
+    parsing templates on every invocation.
+
+    Requests and responses are JSON objects, one per line:
+
+    - ``{"method": "ping"}``
+    - ``{"method": "register", "template": <text>, "id": <optional id>}``
+      returns ``{"id": <id>}``
+    - ``{"method": "dissect", "id": <id>, "path": <data file>}`` returns
+      ``{"fields": [[<path>, <absolute address>, <size>], ...]}``
+    - ``{"method": "shutdown"}``
+
+    Failed requests return ``{"error": <message>}``.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import argparse
+import json
+import os
+import socketserver
+import stat
+import sys
+
+from .data_provider import MappedFile
+from .layout_cache import LayoutCache
+from .utils import template_hash
+from .xml import XMLTemplateParser
+
+
+class DissectionServer(socketserver.UnixStreamServer):
+    """Serves dissection requests on a Unix domain socket.
+
+    Connections are handled one after another by :meth:`serve`. A client
+    holding its connection open delays all other clients, clients therefore
+    close their connection once they have their responses.
+
+    The socket is accessible by the owner only.
+
+    :param socket_path: path of the socket, replaced if it is a socket
+    :param templates: template texts to register by id
+    """
+
+    def __init__(self, socket_path: str, templates: dict = None):
+        #: Layout caches of the registered templates by id
+        self.layout_caches = {}
+
+        self._running = False
+        if os.path.exists(socket_path):
+            if not _is_socket(socket_path):
+                raise RuntimeError(
+                    f"Unable to replace '{socket_path}': it is not a socket."
+                )
+            os.unlink(socket_path)
+        super(DissectionServer, self).__init__(socket_path, _RequestHandler)
+        for template_id, text in (templates or {}).items():
+            self.register(text, template_id)
+
+    def serve(self):
+        """Handles requests until a shutdown is requested."""
+        self._running = True
+        while self._running:
+            self.handle_request()
+
+    def server_bind(self):
+        super(DissectionServer, self).server_bind()
+        os.chmod(self.server_address, 0o600)
+
+    def server_close(self):
+        super(DissectionServer, self).server_close()
+        if _is_socket(self.server_address):
+            os.unlink(self.server_address)
+
+    def register(self, text: str, template_id: str = None):
+        """Parses a template and returns its id. The id defaults to the hash
+        of the template text.
+        """
+        if template_id is None:
+            template_id = template_hash(text)
+        if template_id not in self.layout_caches:
+            self.layout_caches[template_id] = LayoutCache(
+                XMLTemplateParser(text).parse()
+            )
+        return template_id
+
+    def dissect(self, template_id: str, path: str):
+        """Returns the dotted path, absolute address and size of all
+        templates bound to a data file.
+        """
+        layout_cache = self.layout_caches.get(template_id)
+        if layout_cache is None:
+            raise RuntimeError(f"Unable to find template '{template_id}'.")
+        return dissect(layout_cache, path)
+
+    def process(self, message: dict):
+        """Returns the response to a request."""
+        method = message.get("method")
+        if method == "ping":
+            return {}
+        if method == "register":
+            return {"id": self.register(message["template"], message.get("id"))}
+        if method == "dissect":
+            return {"fields": self.dissect(message["id"], message["path"])}
+        if method == "shutdown":
+            self._running = False
+            return {}
+        raise RuntimeError(f"Unknown method '{method}'.")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                response = self.server.process(json.loads(line))
+            except Exception as error:  # pylint: disable=broad-except
+                response = {"error": str(error) or type(error).__name__}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+def _is_socket(path):
+    try:
+        return stat.S_ISSOCK(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+def dissect(layout_cache: LayoutCache, path: str):
+    """Returns the dotted path, absolute address and size of all templates
+    of a layout cache's template bound to a data file.
+    """
+    if os.path.getsize(path):
+        mapped_file = MappedFile(path, writable=False)
+        try:
+            layout = layout_cache.resolve(mapped_file.getvalue())
+        finally:
+            mapped_file.close()
+    else:
+        layout = layout_cache.resolve(b"")
+    return [
+        [template_path, address, size]
+        for template_path, address, size in zip(
+            layout.paths, layout.addresses, layout.sizes
+        )
+    ]
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog="binalyzer_template_provider.daemon")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+    serve = commands.add_parser("serve", help="serve dissection requests")
+    serve.add_argument("socket", help="path of the Unix domain socket")
+    serve.add_argument(
+        "--template",
+        action="append",
+        default=[],
+        metavar="ID=PATH",
+        help="register a template file",
+    )
+    cold = commands.add_parser("dissect", help="dissect a file in this process")
+    cold.add_argument("template", help="path of the template file")
+    cold.add_argument("data", help="path of the data file")
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == "dissect":
+        with open(arguments.template, "r") as template_file:
+            text = template_file.read()
+        fields = dissect(LayoutCache(XMLTemplateParser(text).parse()), arguments.data)
+        json.dump(fields, sys.stdout)
+        sys.stdout.write("\n")
+        return 0
+
+    templates = {}
+    for template in arguments.template:
+        template_id, _, path = template.partition("=")
+        with open(path, "r") as template_file:
+            templates[template_id] = template_file.read()
+    server = DissectionServer(arguments.socket, templates)
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
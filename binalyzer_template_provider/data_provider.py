@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.data_provider
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements a data provider caching decoded integers and a
+    data provider patching memory-mapped files in place.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import mmap
+import os
+
+from anytree import PreOrderIter
+from binalyzer_core import DataProvider
+
+from .patch import PatchTransaction
+from .value_provider import integer_decoder
+
+
+class IntegerCachingDataProvider(DataProvider):
+    """A :class:`~binalyzer.DataProvider` that caches integers decoded from
+    its data buffer.
+
+    The cache is keyed by size, byteorder and address and is dropped whenever
+    the data is written through the provider or replaced. Writes bypassing
+    the provider, e.g. to :attr:`~binalyzer_core.Binalyzer.data` or to the
+    buffer returned by ``getbuffer()``, aren't noticed: call
+    :meth:`clear_cache` after them.
+    """
+
+    def __init__(self, data):
+        self._integers = {}
+        super(IntegerCachingDataProvider, self).__init__(data)
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self.clear_cache()
+
+    def clear_cache(self):
+        """Drops all cached integers."""
+        self._integers = {}
+
+    def read_integer(self, address: int, size: int, byteorder: str = "little"):
+        """Returns the unsigned integer of ``size`` bytes stored at
+        ``address``.
+        """
+        integers = self._integers.get((size, byteorder))
+        if integers is None:
+            integers = self._integers[(size, byteorder)] = {}
+        integer = integers.get(address)
+        if integer is None:
+            integer = integers[address] = self._read_integer(address, size, byteorder)
+        return integer
+
+    def _read_integer(self, address, size, byteorder):
+        decode = integer_decoder(size, byteorder)
+        if not hasattr(self._data, "getbuffer"):
+            self._data.seek(address)
+            value = self._data.read(size)
+            self._data.seek(0)
+            if len(value) != size:
+                return int.from_bytes(value, byteorder)
+            return decode(value)
+        with self._data.getbuffer() as buffer:
+            if address + size > len(buffer):
+                return int.from_bytes(buffer[address : address + size], byteorder)
+            return decode(buffer, address)
+
+    def write(self, template, value):
+        self.clear_cache()
+        super(IntegerCachingDataProvider, self).write(template, value)
+
+
+class MappedFile(object):
+    """A binary stream backed by a memory-mapped file.
+
+    Writes go directly into the mapping and can't change the size of the
+    file. :meth:`getvalue` returns the mapping itself instead of a copy.
+
+    :param path: path of the file to map
+    :param writable: map the file for writing
+    :param copy_on_write: keep writes in memory instead of writing them to
+        the file
+    """
+
+    def __init__(self, path: str, writable: bool = True, copy_on_write: bool = False):
+        self.path = path
+        self.writable = writable
+        access = mmap.ACCESS_READ
+        if writable:
+            access = mmap.ACCESS_COPY if copy_on_write else mmap.ACCESS_WRITE
+        with open(path, "r+b" if access == mmap.ACCESS_WRITE else "rb") as mapped_file:
+            if not os.fstat(mapped_file.fileno()).st_size:
+                raise RuntimeError(f"Unable to map empty file '{path}'.")
+            self._mmap = mmap.mmap(mapped_file.fileno(), 0, access=access)
+
+    def __len__(self):
+        return len(self._mmap)
+
+    @property
+    def closed(self):
+        return self._mmap.closed
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET):
+        self._mmap.seek(offset, whence)
+        return self._mmap.tell()
+
+    def tell(self):
+        return self._mmap.tell()
+
+    def read(self, size: int = -1):
+        return self._mmap.read(size)
+
+    def write(self, value):
+        if not self.writable:
+            raise RuntimeError(f"Unable to write to read-only mapping '{self.path}'.")
+        if self._mmap.tell() + len(value) > len(self._mmap):
+            raise RuntimeError(
+                f"Unable to write beyond the end of mapped file '{self.path}'."
+            )
+        return self._mmap.write(value)
+
+    def getvalue(self):
+        return self._mmap
+
+    def getbuffer(self):
+        return memoryview(self._mmap)
+
+    def flush(self, offset: int = 0, size: int = None):
+        if size is None:
+            size = len(self._mmap) - offset
+        self._mmap.flush(offset, size)
+
+    def close(self):
+        self._mmap.close()
+
+
+class MappedFileDataProvider(IntegerCachingDataProvider):
+    """A data provider writing template values directly into a memory-mapped
+    file.
+
+    The pages touched by writes are recorded and :meth:`flush` writes only
+    those pages back to the file. Values of a different size than their
+    template are rejected with a :class:`RuntimeError`.
+
+    :param path: path of the file to map
+    :param writable: map the file for writing
+    :param copy_on_write: keep writes in memory instead of writing them to
+        the file
+    """
+
+    #: Granularity of the recorded pages
+    PAGE_SIZE = mmap.ALLOCATIONGRANULARITY
+
+    def __init__(self, path: str, writable: bool = True, copy_on_write: bool = False):
+        self._dirty_pages = set()
+        self._size_properties = {}
+        super(MappedFileDataProvider, self).__init__(
+            MappedFile(path, writable, copy_on_write)
+        )
+
+    @property
+    def dirty_pages(self):
+        """Sorted indices of the pages written since the last flush."""
+        return sorted(self._dirty_pages)
+
+    def track(self, template):
+        """Records the size properties of a bound template tree.
+
+        Assigning a template value resizes the template before the value is
+        written. :meth:`write` compares values against the recorded sizes,
+        since the mapped file can't grow or shrink.
+        """
+        for node in PreOrderIter(template):
+            self._size_properties[node] = node.size_property
+
+    def write(self, template, value):
+        size_property = self._size_properties.get(template, template.size_property)
+        size = size_property.value
+        if len(value) != size:
+            if size_property is not template.size_property:
+                template.size_property = size_property
+            raise RuntimeError(
+                f"Value of '{template.name}' has {len(value)} bytes, expected "
+                f"{size}."
+            )
+        self.write_at(template.absolute_address, value)
+
+    def write_at(self, address: int, value: bytes):
+        """Writes ``value`` at ``address`` of the mapped file."""
+        self.clear_cache()
+        self._data.seek(address)
+        self._data.write(value)
+        self._data.seek(0)
+        if value:
+            self._dirty_pages.update(
+                range(
+                    address // self.PAGE_SIZE,
+                    (address + len(value) - 1) // self.PAGE_SIZE + 1,
+                )
+            )
+
+    def flush(self):
+        """Writes the touched pages back to the file and returns their
+        number.
+        """
+        pages = self.dirty_pages
+        size = len(self._data)
+        start = 0
+        while start < len(pages):
+            end = start
+            while end + 1 < len(pages) and pages[end + 1] == pages[end] + 1:
+                end += 1
+            offset = pages[start] * self.PAGE_SIZE
+            self._data.flush(
+                offset, min((pages[end] + 1) * self.PAGE_SIZE, size) - offset
+            )
+            start = end + 1
+        self._dirty_pages = set()
+        return len(pages)
+
+    def close(self):
+        """Flushes the touched pages and unmaps the file."""
+        if not self._data.closed:
+            self.flush()
+            self._data.close()
+
+    def transaction(self):
+        """Returns a :class:`~binalyzer_template_provider.patch.PatchTransaction`
+        collecting patches of this file.
+        """
+        return PatchTransaction(self)
@@ -5,32 +5,145 @@
     This module implements the Binalyzer Template Provider extension.
 """
 import io
-import requests
+import os
 
 from typing import Optional
 from binalyzer_core import Binalyzer, BinalyzerExtension
 
-from .xml import XMLTemplateParser
+from .data_provider import IntegerCachingDataProvider, MappedFileDataProvider
+from .fragments import FragmentCache
+from .index import FieldIndex, index_key, load_index, sidecar_path
+from .session import Session
+from .utils import lazy_import, load, template_hash
+
+#: Imported on first use, ANTLR and requests dominate the start-up time
+requests = lazy_import("requests")
+xml = lazy_import("binalyzer_template_provider.xml")
+streaming_parser = lazy_import("binalyzer_template_provider.streaming")
 
 
 class XMLTemplateProviderExtension(BinalyzerExtension):
-    def __init__(self, binalyzer=None):
+    """Creates templates from XML descriptions.
+
+    :meth:`from_str`, :meth:`from_file` and :meth:`from_url` bind the template
+    to the extension's :class:`~binalyzer_core.Binalyzer` and must not be
+    called from several threads at once. :meth:`session` leaves the extension
+    unchanged and may be called concurrently: parsed templates are cached and
+    only read afterwards, while every
+    :class:`~binalyzer_template_provider.session.Session` binds a copy of its
+    own. Sessions and parsers belong to a single thread; lexing and parsing
+    are serialized by :data:`~binalyzer_template_provider.xml.ANTLR_LOCK`.
+    """
+
+    def __init__(self, binalyzer=None, profile: Optional[bool] = None):
+        #: Turns profiling on or off for this extension, :const:`None` follows
+        #: the global setting of :mod:`~binalyzer_template_provider.profiling`.
+        self.profiling = profile
+
+        #: The profile of the last parse if profiling has been turned on.
+        self.profile = None
+
+        #: The :class:`~binalyzer_template_provider.index.FieldIndex` of the
+        #: last data file loaded with an index.
+        self.index = None
+
+        #: Fragments included by the templates of this extension, see
+        #: :class:`~binalyzer_template_provider.fragments.FragmentCache`.
+        self.fragments = FragmentCache()
+
+        self._templates = {}
+
         super(XMLTemplateProviderExtension, self).__init__(binalyzer, "xml")
 
     def init_extension(self):
         super(XMLTemplateProviderExtension, self).init_extension()
 
-    def from_file(self, template_file_path: str, data_file_path: Optional[str] = None):
+    def from_file(
+        self,
+        template_file_path: str,
+        data_file_path: Optional[str] = None,
+        mapped: bool = False,
+        index: bool = False,
+        streaming: bool = False,
+    ):
+        """Reads an XML file and creates a template object model.
+
+        With ``mapped`` set, the data file is memory-mapped for writing
+        instead of being read. Template values are then written directly
+        into the file, see
+        :class:`~binalyzer_template_provider.data_provider.MappedFileDataProvider`.
+
+        With ``index`` set, the addresses and sizes of all templates are
+        taken from the sidecar index of the data file. If the index is
+        missing or has been built for another template or data file, all
+        templates are resolved and the index is written anew, unless the
+        directory of the data file is read-only. A data file holding the
+        whole template is memory-mapped copy-on-write instead of being read,
+        template values are written to memory only.
+
+        With ``streaming`` set, the template file is parsed while it is read
+        instead of being read at once, see
+        :class:`~binalyzer_template_provider.streaming.StreamingXMLTemplateParser`.
+        The sidecar index is keyed by the template text, so it can't be used
+        together with ``streaming``.
+
+        Relative ``text-file`` paths of the template are resolved against the
+        directory of the template file.
+        """
+        if (mapped or index) and not data_file_path:
+            raise RuntimeError("Expected a data file.")
+
+        if streaming and index:
+            raise RuntimeError("Unable to index a streamed template.")
+
         template_text = ""
-        with open(template_file_path, "r") as template_file:
-            template_text = template_file.read()
+        if streaming:
+            parser = streaming_parser.StreamingXMLTemplateParser(
+                template_file_path,
+                binalyzer=self.binalyzer,
+                profile=self.profiling,
+                fragments=self.fragments,
+            )
+        else:
+            with open(template_file_path, "r") as template_file:
+                template_text = template_file.read()
+            parser = self._parser(
+                template_text, os.path.dirname(template_file_path)
+            )
+
+        key = None
+        field_index = None
+        if index:
+            key = index_key(template_text, data_file_path)
+            field_index = load_index(data_file_path, key)
 
-        data = bytes()
-        if data_file_path:
-            with open(data_file_path, "rb") as data_file:
-                data = data_file.read()
+        if mapped:
+            data_provider = MappedFileDataProvider(data_file_path)
+            template = self._load(parser, data_provider)
+            data_provider.track(self.binalyzer.template)
+        elif index and os.path.getsize(data_file_path):
+            data_provider = MappedFileDataProvider(data_file_path, copy_on_write=True)
+            template = self._load(parser, data_provider)
+            if template.binding_context.template.size > len(data_provider.data):
+                # The template is padded with zeros, which a mapping can't hold
+                data_provider.close()
+                self._bind(template, self._read(data_file_path))
+            else:
+                data_provider.track(self.binalyzer.template)
+        else:
+            data_provider = None
+            if data_file_path:
+                data_provider = self._read(data_file_path)
+            self._load(parser, data_provider)
 
-        return self.from_str(template_text, data)
+        if index and field_index is None:
+            field_index = FieldIndex.from_template(self.binalyzer.template, key)
+            try:
+                field_index.save(sidecar_path(data_file_path))
+            except OSError:
+                field_index = None
+        self.index = field_index
+        return self.binalyzer
 
     def from_url(self, template_url: str, data_url: Optional[str] = None, **kwargs):
         template_response = requests.get(template_url, **kwargs)
@@ -43,8 +156,69 @@ class XMLTemplateProviderExtension(BinalyzerExtension):
     def from_str(self, text: str, data: Optional[bytes] = None):
         """Reads an XML string and creates a template object model.
         """
-        template = XMLTemplateParser(text, binalyzer=self.binalyzer).parse()
+        data_provider = None
         if data:
-            self.binalyzer.data = io.BytesIO(data)
-        self.binalyzer.template = template
+            data_provider = IntegerCachingDataProvider(io.BytesIO(data))
+        self._load(self._parser(text), data_provider)
         return self.binalyzer
+
+    def session(self, text: str, data: Optional[bytes] = None):
+        """Returns a :class:`~binalyzer_template_provider.session.Session`
+        binding the template described by an XML string to data, without
+        changing the extension's binalyzer. Parsed templates are cached by
+        the hash of their description and parsed anew if a fragment they
+        include has changed.
+        """
+        key = template_hash(text)
+        entry = self._templates.get(key)
+        if entry is None or self.fragments.changed(entry[1]):
+            parser = load(xml).XMLTemplateParser(
+                text, binalyzer=self.binalyzer, fragments=self.fragments
+            )
+            entry = self._templates[key] = (parser.parse(), parser.dependencies)
+        return Session(entry[0], data)
+
+    def locate(self, path: str):
+        """Returns the absolute address and size of the template at a dotted
+        path relative to the root template. The :attr:`index` answers if it
+        contains the path, otherwise the template is resolved.
+        """
+        if self.index is not None and path in self.index:
+            return self.index[path]
+        template = self.binalyzer.template
+        for name in path.split(".") if path else ():
+            for index, child in enumerate(template.children):
+                if (child.name or str(index)) == name:
+                    template = child
+                    break
+            else:
+                raise RuntimeError(f"Unable to find template '{path}'.")
+        return template.absolute_address, template.size
+
+    def _parser(self, text, base_path=None):
+        return xml.XMLTemplateParser(
+            text,
+            binalyzer=self.binalyzer,
+            profile=self.profiling,
+            base_path=base_path,
+            fragments=self.fragments,
+        )
+
+    def _load(self, parser, data_provider):
+        template = parser.parse()
+        self.profile = parser.profile
+        self._bind(template, data_provider)
+        return template
+
+    def _bind(self, template, data_provider):
+        self.index = None
+        if data_provider is not None:
+            self.binalyzer.data_provider = data_provider
+        self.binalyzer.template = template
+
+    def _read(self, data_file_path):
+        with open(data_file_path, "rb") as data_file:
+            data = data_file.read()
+        if not data:
+            return None
+        return IntegerCachingDataProvider(io.BytesIO(data))
@@ -0,0 +1,491 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.flat
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements a compact, array-backed representation of template
+    descriptions. Every template is a row of parallel :class:`array.array`
+    columns instead of a node with property objects, which reduces the memory
+    of large templates by more than an order of magnitude. Names and tags are
+    interned in a string table, signatures and texts in a blob table.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+from array import array
+from collections import namedtuple
+
+from .blob import TEXT_ENCODINGS, DEFAULT_TEXT_ENCODING, decode_text, text_file_blob
+from .fragments import INCLUDE_TAG, include_attributes
+from .generated import XMLParserListener
+from .utils import lazy_import
+
+#: NumPy, imported on first use, or :const:`None` if it isn't installed
+numpy = lazy_import("numpy")
+
+#: Index used for missing parents, children, strings, blobs and bindings
+NONE = -1
+
+#: Sizing modes of the ``sizing`` column
+AUTO, FIX, STRETCH = range(3)
+
+#: Addressing modes of the ``addressing`` column
+RELATIVE, ABSOLUTE = range(2)
+
+#: A binding of an attribute to a template or a value provider
+Binding = namedtuple("Binding", ["reference_name", "byteorder", "provider_name"])
+
+#: Numeric attributes stored as a value and a binding column each
+ATTRIBUTES = ("offset", "size", "count", "boundary", "padding_before", "padding_after")
+
+DEFAULTS = {
+    "offset": 0,
+    "size": 0,
+    "count": 1,
+    "boundary": 0,
+    "padding_before": 0,
+    "padding_after": 0,
+}
+
+SIZINGS = {"auto": AUTO, "fix": FIX, "stretch": STRETCH}
+
+ADDRESSING_MODES = {"relative": RELATIVE, "absolute": ABSOLUTE}
+
+
+class FlatTemplate(object):
+    """A table of templates in document order.
+
+    The columns ``parent``, ``first_child`` and ``next_sibling`` link the
+    rows, ``tag``, ``name`` and ``hint`` index the string table and
+    ``signature`` and ``text`` the blob table. Each numeric attribute has a
+    value column and a ``<attribute>_binding`` column indexing
+    :attr:`bindings`; the value of a bound attribute is meaningless.
+    """
+
+    #: Names of the index columns
+    INDEX_COLUMNS = (
+        ("parent", "first_child", "next_sibling", "tag", "name", "hint")
+        + ("signature", "text")
+        + tuple(attribute + "_binding" for attribute in ATTRIBUTES)
+    )
+
+    #: Names of the value columns
+    VALUE_COLUMNS = ATTRIBUTES
+
+    #: Names of the mode columns
+    MODE_COLUMNS = ("sizing", "addressing")
+
+    def __init__(self):
+        #: Columns by name
+        self.columns = {}
+        for name in self.INDEX_COLUMNS:
+            self.columns[name] = array("i")
+        for name in self.VALUE_COLUMNS:
+            self.columns[name] = array("q")
+        for name in self.MODE_COLUMNS:
+            self.columns[name] = array("B")
+
+        #: Interned strings
+        self.strings = []
+
+        #: Signatures and texts
+        self.blobs = []
+
+        #: Distinct bindings
+        self.bindings = []
+
+        self._string_ids = {}
+        self._binding_ids = {}
+
+    def __len__(self):
+        return len(self.columns["parent"])
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get("columns")
+        if columns is not None and name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    @property
+    def root(self):
+        """The :class:`FlatTemplateView` of the root template."""
+        if not len(self):
+            return None
+        return FlatTemplateView(self, 0)
+
+    def view(self, index: int):
+        """Returns the :class:`FlatTemplateView` of a row."""
+        return FlatTemplateView(self, index)
+
+    def string(self, index: int):
+        """Returns an interned string or :const:`None`."""
+        if index == NONE:
+            return None
+        return self.strings[index]
+
+    def blob(self, index: int):
+        """Returns a signature or text or :const:`None`."""
+        if index == NONE:
+            return None
+        return self.blobs[index]
+
+    def binding(self, index: int):
+        """Returns a :class:`Binding` or :const:`None`."""
+        if index == NONE:
+            return None
+        return self.bindings[index]
+
+    def to_numpy(self):
+        """Returns the columns as NumPy arrays sharing memory with the
+        table.
+        """
+        if numpy is None:
+            raise RuntimeError("Unable to export columns: NumPy is not installed.")
+        return {
+            name: numpy.frombuffer(column, dtype=column.typecode)
+            for name, column in self.columns.items()
+        }
+
+    @property
+    def nbytes(self):
+        """Size of the columns in bytes."""
+        return sum(column.itemsize * len(column) for column in self.columns.values())
+
+    def append(self, parent: int, tag: str):
+        """Appends a row with default attributes and returns its index."""
+        index = len(self)
+        columns = self.columns
+        for name in self.INDEX_COLUMNS:
+            columns[name].append(NONE)
+        for name in self.VALUE_COLUMNS:
+            columns[name].append(DEFAULTS[name])
+        columns["sizing"].append(AUTO)
+        columns["addressing"].append(RELATIVE)
+        columns["parent"][index] = parent
+        columns["tag"][index] = self.intern(tag)
+        return index
+
+    def intern(self, string: str):
+        """Returns the index of the given string in the string table."""
+        index = self._string_ids.get(string)
+        if index is None:
+            index = self._string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return index
+
+    def extend(self, table, parent: int):
+        """Appends the rows of another table as a child of ``parent`` and
+        returns the index of its root. Its siblings aren't linked.
+        """
+        offset = len(self)
+        strings = [self.intern(string) for string in table.strings]
+        blobs = [self.add_blob(blob) for blob in table.blobs]
+        bindings = [self.add_binding(binding) for binding in table.bindings]
+        mappings = {"tag": strings, "name": strings, "hint": strings}
+        mappings.update(signature=blobs, text=blobs)
+        for attribute in ATTRIBUTES:
+            mappings[attribute + "_binding"] = bindings
+        for name, column in table.columns.items():
+            if name in ("parent", "first_child", "next_sibling"):
+                mapping = range(offset, offset + len(table))
+            else:
+                mapping = mappings.get(name)
+            if mapping is None:
+                self.columns[name].extend(column)
+            else:
+                self.columns[name].extend(
+                    NONE if value == NONE else mapping[value] for value in column
+                )
+        self.columns["parent"][offset] = parent
+        return offset
+
+    def add_blob(self, blob: bytes):
+        self.blobs.append(blob)
+        return len(self.blobs) - 1
+
+    def add_binding(self, binding: Binding):
+        index = self._binding_ids.get(binding)
+        if index is None:
+            index = self._binding_ids[binding] = len(self.bindings)
+            self.bindings.append(binding)
+        return index
+
+
+class FlatTemplateView(object):
+    """A row of a :class:`FlatTemplate` offering the attribute navigation of
+    a template. Children are accessible by their names, hyphens replaced by
+    underscores.
+
+    :param table: the :class:`FlatTemplate`
+    :param index: the row
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: FlatTemplate, index: int):
+        self.table = table
+        self.index = index
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, FlatTemplateView)
+            and other.table is self.table
+            and other.index == self.index
+        )
+
+    def __hash__(self):
+        return hash((id(self.table), self.index))
+
+    def __repr__(self):
+        return f"FlatTemplateView({self.name!r}, index={self.index})"
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        for child in self.children:
+            child_name = child.name
+            if child_name is not None and child_name.replace("-", "_") == name:
+                return child
+        raise AttributeError(name)
+
+    @property
+    def name(self):
+        return self.table.string(self.table.columns["name"][self.index])
+
+    @property
+    def tag(self):
+        return self.table.string(self.table.columns["tag"][self.index])
+
+    @property
+    def hint(self):
+        return self.table.string(self.table.columns["hint"][self.index])
+
+    @property
+    def signature(self):
+        return self.table.blob(self.table.columns["signature"][self.index])
+
+    @property
+    def text(self):
+        return self.table.blob(self.table.columns["text"][self.index])
+
+    @property
+    def sizing(self):
+        return self.table.columns["sizing"][self.index]
+
+    @property
+    def addressing(self):
+        return self.table.columns["addressing"][self.index]
+
+    @property
+    def parent(self):
+        parent = self.table.columns["parent"][self.index]
+        if parent == NONE:
+            return None
+        return FlatTemplateView(self.table, parent)
+
+    @property
+    def children(self):
+        children = []
+        next_sibling = self.table.columns["next_sibling"]
+        child = self.table.columns["first_child"][self.index]
+        while child != NONE:
+            children.append(FlatTemplateView(self.table, child))
+            child = next_sibling[child]
+        return children
+
+    def value(self, attribute: str):
+        """Returns the static value of a numeric attribute or :const:`None`
+        if it is bound.
+        """
+        if self.binding(attribute) is not None:
+            return None
+        return self.table.columns[attribute][self.index]
+
+    def binding(self, attribute: str):
+        """Returns the :class:`Binding` of a numeric attribute or
+        :const:`None`.
+        """
+        return self.table.binding(
+            self.table.columns[attribute + "_binding"][self.index]
+        )
+
+    @property
+    def offset(self):
+        return self.value("offset")
+
+    @property
+    def size(self):
+        """The static size or :const:`None` if the size is bound, automatic
+        or stretched.
+        """
+        if self.sizing != FIX:
+            return None
+        return self.value("size")
+
+    @property
+    def count(self):
+        return self.value("count")
+
+    @property
+    def boundary(self):
+        return self.value("boundary")
+
+    @property
+    def padding_before(self):
+        return self.value("padding_before")
+
+    @property
+    def padding_after(self):
+        return self.value("padding_after")
+
+
+class FlatTemplateBuilder(XMLParserListener):
+    """Builds a :class:`FlatTemplate` while walking a parse tree of the XML
+    grammar.
+
+    :param base_path: directory relative ``text-file`` and ``include``
+        paths are resolved against
+    :param fragment: returns the :class:`FlatTemplate` of the fragment at a
+        path, if includes are supported
+    """
+
+    def __init__(self, base_path: str = None, fragment=None):
+        self.table = FlatTemplate()
+        self.base_path = base_path
+        self._fragment = fragment
+        self._stack = []
+        self._last_children = []
+        self._text_encodings = []
+
+    def enterElement(self, ctx):
+        table = self.table
+        columns = table.columns
+        parent = self._stack[-1] if self._stack else NONE
+        tag = ctx.Name(0).getText()
+        if tag == INCLUDE_TAG:
+            index = self._include(parent, ctx)
+        else:
+            index = table.append(parent, tag)
+        if parent != NONE:
+            last_child = self._last_children[-1]
+            if last_child == NONE:
+                columns["first_child"][parent] = index
+            else:
+                columns["next_sibling"][last_child] = index
+            self._last_children[-1] = index
+        self._stack.append(index)
+        self._last_children.append(NONE)
+        if tag == INCLUDE_TAG:
+            self._last_children[-1] = self._last_child(index)
+            self._text_encodings.append(DEFAULT_TEXT_ENCODING)
+            return
+
+        sizing = "auto"
+        text_encoding = DEFAULT_TEXT_ENCODING
+        for attribute in ctx.attribute():
+            name = attribute.Name().getText()
+            if name == "sizing":
+                sizing = attribute.value().getText()[1:-1]
+            elif name == "text-encoding":
+                text_encoding = attribute.value().getText()[1:-1]
+                if text_encoding not in TEXT_ENCODINGS:
+                    raise RuntimeError("Expected 'hex' or 'base64'.")
+            elif name == "addressing-mode":
+                addressing = attribute.value().getText()[1:-1]
+                if addressing not in ADDRESSING_MODES:
+                    raise RuntimeError("Expected 'absolute' or 'relative'.")
+                columns["addressing"][index] = ADDRESSING_MODES[addressing]
+        if sizing not in SIZINGS:
+            raise RuntimeError("Expected 'auto', 'fix' or 'stretch'.")
+        columns["sizing"][index] = SIZINGS[sizing]
+        self._text_encodings.append(text_encoding)
+
+        for attribute in ctx.attribute():
+            name = attribute.Name().getText()
+            value = None
+            if attribute.value() is not None:
+                value = attribute.value().getText()[1:-1]
+            if name == "name":
+                if value is None:
+                    raise RuntimeError(
+                        "Using a reference for a name attribute is not allowed."
+                    )
+                columns["name"][index] = table.intern(value)
+            elif name == "hint":
+                columns["hint"][index] = table.intern(value)
+            elif name in ("signature", "text"):
+                if value is None:
+                    raise RuntimeError(
+                        f"Using a reference for a {name} attribute is not allowed."
+                    )
+                columns[name][index] = table.add_blob(bytes.fromhex(value[2:]))
+            elif name == "text-file":
+                if value is None:
+                    raise RuntimeError(
+                        "Using a reference for a text-file attribute is not allowed."
+                    )
+                columns["text"][index] = table.add_blob(
+                    text_file_blob(value, ctx, self.base_path)
+                )
+            elif name.replace("-", "_") in ATTRIBUTES:
+                self._numeric_attribute(index, name.replace("-", "_"), attribute)
+
+    def exitElement(self, ctx):
+        self._stack.pop()
+        self._last_children.pop()
+        self._text_encodings.pop()
+
+    def enterText(self, ctx):
+        text = "".join(ctx.children[0].children[0].symbol.text.split())
+        if text:
+            self._add_text(decode_text(text, self._text_encodings[-1]))
+
+    def _add_text(self, value):
+        if self._stack:
+            self.table.columns["text"][self._stack[-1]] = self.table.add_blob(value)
+
+    def _include(self, parent, ctx):
+        if self._fragment is None:
+            raise RuntimeError("Unable to include fragments.")
+        path, name = include_attributes(ctx, self.base_path)
+        index = self.table.extend(self._fragment(path), parent)
+        if name is not None:
+            self.table.columns["name"][index] = self.table.intern(name)
+        return index
+
+    def _last_child(self, index):
+        columns = self.table.columns
+        last_child = columns["first_child"][index]
+        while last_child != NONE and columns["next_sibling"][last_child] != NONE:
+            last_child = columns["next_sibling"][last_child]
+        return last_child
+
+    def _numeric_attribute(self, index, attribute_name, attribute):
+        columns = self.table.columns
+        if attribute_name == "size":
+            columns["sizing"][index] = FIX
+        if attribute.value() is not None:
+            columns[attribute_name][index] = int(
+                attribute.value().getText()[1:-1], base=0
+            )
+            return
+        columns[attribute_name + "_binding"][index] = self.table.add_binding(
+            _parse_binding(attribute)
+        )
+
+
+def _parse_binding(attribute):
+    names = [name.getText() for name in attribute.binding().sequence().BRACKET_NAME()]
+    reference_name = None
+    if "name" not in names and names[0] not in ("byteorder", "provider"):
+        reference_name = names[0]
+    byteorder = "little"
+    provider_name = None
+    for i, name in enumerate(names):
+        if name == "name":
+            reference_name = names[i + 1]
+        elif name == "byteorder":
+            byteorder = names[i + 1]
+        elif name == "provider":
+            provider_name = names[i + 1]
+    return Binding(reference_name, byteorder, provider_name)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.fragments
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements the cache of template fragments. A fragment is a
+    template file included by other templates using
+    ``<include href="fragment.xml"/>``. Each fragment is parsed once and
+    included as a copy, so templates sharing fragments load in time
+    proportional to their distinct content.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import hashlib
+import os
+import threading
+
+from binalyzer_core import TemplateFactory
+
+#: Tag of elements including a fragment
+INCLUDE_TAG = "include"
+
+#: Number of bytes hashed at once
+CHUNK_SIZE = 64 * 1024
+
+#: Properties copied by :func:`instantiate`
+PROPERTIES = (
+    "offset_property",
+    "size_property",
+    "boundary_property",
+    "padding_before_property",
+    "padding_after_property",
+    "count_property",
+)
+
+
+class FragmentCache(object):
+    """Parsed fragments by kind, path and content hash.
+
+    The content hash of a file is reused as long as its size and
+    modification time are unchanged. Fragments of a file whose content has
+    changed are dropped. A fragment is parsed anew if a fragment it includes,
+    directly or transitively, has changed.
+    """
+
+    def __init__(self):
+        self._fragments = {}
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+        #: Number of fragments taken from the cache
+        self.hits = 0
+
+        #: Number of fragments parsed
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._fragments)
+
+    def fragment(self, path: str, kind: str, parse, dependencies: dict = None):
+        """Returns the fragment of the given kind parsed from a file, parsing
+        it with ``parse(path)`` if it isn't cached. ``parse`` returns the
+        fragment and the content hashes of the fragments it includes by path.
+
+        The content hashes of the file and of the fragments it includes are
+        added to ``dependencies``.
+        """
+        key = (kind, path, self.file_hash(path))
+        with self._lock:
+            entry = self._fragments.get(key)
+        if entry is not None and not self.changed(entry[1]):
+            with self._lock:
+                self.hits += 1
+        else:
+            with self._lock:
+                self.misses += 1
+            fragment, includes = parse(path)
+            entry = (fragment, dict(includes))
+            with self._lock:
+                self._fragments[key] = entry
+        if dependencies is not None:
+            dependencies[path] = key[2]
+            dependencies.update(entry[1])
+        return entry[0]
+
+    def changed(self, dependencies: dict):
+        """Returns whether a file has changed or vanished since its content
+        hash has been taken, given the content hashes by path.
+        """
+        for path, file_hash in dependencies.items():
+            try:
+                if self.file_hash(path) != file_hash:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def file_hash(self, path: str):
+        """Returns a hex digest of the content of a file."""
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(path, "rb") as fragment_file:
+            for chunk in iter(lambda: fragment_file.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()
+        with self._lock:
+            if cached is not None and cached[1] != file_hash:
+                for key in [key for key in self._fragments if key[1] == path]:
+                    del self._fragments[key]
+            self._hashes[path] = (signature, file_hash)
+        return file_hash
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+            self._hashes.clear()
+
+
+def include_attributes(ctx, base_path: str = None):
+    """Returns the absolute path of the fragment of an include element and
+    the name overriding the name of the fragment's root or :const:`None`.
+    """
+    href = None
+    name = None
+    for attribute in ctx.attribute():
+        attribute_name = attribute.Name().getText()
+        if attribute_name not in ("href", "name"):
+            continue
+        if attribute.binding() is not None:
+            raise RuntimeError(
+                f"Using a reference for a {attribute_name} attribute is not allowed."
+            )
+        if attribute_name == "href":
+            href = attribute.value().getText()[1:-1]
+        else:
+            name = attribute.value().getText()[1:-1]
+    if href is None:
+        raise RuntimeError("Expected an href attribute.")
+    return os.path.realpath(os.path.join(base_path or "", href)), name
+
+
+def instantiate(prototype, template_factory: TemplateFactory = None):
+    """Returns a copy of a parsed fragment.
+
+    Unlike :meth:`~binalyzer_core.TemplateFactory.clone`, the properties of
+    each copy are set before it is attached to its parent. Setting a property
+    clears the caches of the whole tree it is attached to, which makes
+    cloning quadratic in the size of the fragment.
+    """
+    if template_factory is None:
+        template_factory = TemplateFactory()
+    property_factory = template_factory.property_factory
+    duplicate = type(prototype)()
+    duplicate.name = prototype.name
+    for name in PROPERTIES:
+        setattr(
+            duplicate,
+            name,
+            property_factory.clone(getattr(prototype, name), duplicate),
+        )
+    duplicate.signature = prototype.signature
+    duplicate.hint = prototype.hint
+    duplicate.text = prototype.text
+    for child in prototype.children:
+        instantiate(child, template_factory).parent = duplicate
+    return duplicate
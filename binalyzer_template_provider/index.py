@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.index
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements a persisted index of resolved template addresses
+    and sizes. The index is stored as a sidecar of a data file and is only
+    used while the template and the data file are unchanged.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+from array import array
+from collections import namedtuple
+
+from .utils import template_hash
+
+#: Identifies the template and data file an index has been built for
+IndexKey = namedtuple(
+    "IndexKey", ["template_hash", "data_size", "data_mtime", "data_hash"]
+)
+
+#: File name extension of sidecar indices
+SIDECAR_EXTENSION = ".bzindex"
+
+#: Number of bytes hashed at the start and at the end of a data file
+SAMPLE_SIZE = 1024 * 1024
+
+_MAGIC = b"BZIX"
+_VERSION = 2
+_HEADER = struct.Struct("<4sII")
+
+
+def index_key(template_text: str, data_file_path: str):
+    """Returns the :class:`IndexKey` of a template and a data file.
+
+    The data hash covers the size of the file and :data:`SAMPLE_SIZE` bytes
+    at its start and end, so computing the key doesn't read the whole file.
+    """
+    stat = os.stat(data_file_path)
+    data_hash = hashlib.sha256(str(stat.st_size).encode())
+    with open(data_file_path, "rb") as data_file:
+        data_hash.update(data_file.read(SAMPLE_SIZE))
+        if stat.st_size > SAMPLE_SIZE:
+            data_file.seek(max(stat.st_size - SAMPLE_SIZE, SAMPLE_SIZE))
+            data_hash.update(data_file.read(SAMPLE_SIZE))
+    return IndexKey(
+        template_hash(template_text),
+        stat.st_size,
+        stat.st_mtime_ns,
+        data_hash.hexdigest(),
+    )
+
+
+def sidecar_path(data_file_path: str):
+    """Returns the path of the sidecar index of a data file."""
+    return data_file_path + SIDECAR_EXTENSION
+
+
+class FieldIndex(object):
+    """Absolute addresses and sizes of templates by dotted path relative to
+    the root template, which has the empty path. Unnamed templates are
+    named by their position among their siblings.
+
+    :param key: the :class:`IndexKey` the index has been built for
+    :param paths: dotted paths in document order
+    :param addresses: absolute addresses in the order of ``paths``
+    :param sizes: sizes in the order of ``paths``
+    """
+
+    def __init__(self, key: IndexKey, paths, addresses, sizes):
+        self.key = key
+        self.paths = list(paths)
+        self.addresses = array("q", addresses)
+        self.sizes = array("q", sizes)
+        self._indices = {path: index for index, path in enumerate(self.paths)}
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, path):
+        return path in self._indices
+
+    def __getitem__(self, path):
+        index = self._indices[path]
+        return self.addresses[index], self.sizes[index]
+
+    def absolute_address(self, path: str):
+        return self.addresses[self._indices[path]]
+
+    def size(self, path: str):
+        return self.sizes[self._indices[path]]
+
+    @classmethod
+    def from_template(cls, template, key: IndexKey):
+        """Resolves all templates of a bound template tree."""
+        paths = []
+        addresses = []
+        sizes = []
+        nodes = [(template, "")]
+        while nodes:
+            node, path = nodes.pop()
+            paths.append(path)
+            addresses.append(node.absolute_address)
+            sizes.append(node.size)
+            children = node.children
+            for index in range(len(children) - 1, -1, -1):
+                name = children[index].name or str(index)
+                nodes.append((children[index], f"{path}.{name}" if path else name))
+        return cls(key, paths, addresses, sizes)
+
+    def save(self, path: str):
+        """Writes the index to a file."""
+        header = json.dumps(self.key._asdict(), sort_keys=True).encode()
+        paths = zlib.compress("\n".join(self.paths).encode())
+        addresses = zlib.compress(self.addresses.tobytes())
+        sizes = zlib.compress(self.sizes.tobytes())
+        with open(path, "wb") as index_file:
+            index_file.write(_HEADER.pack(_MAGIC, _VERSION, len(self.paths)))
+            for block in (header, paths, addresses, sizes):
+                index_file.write(struct.pack("<Q", len(block)))
+                index_file.write(block)
+
+    @classmethod
+    def load(cls, path: str):
+        """Reads an index written by :meth:`save`."""
+        with open(path, "rb") as index_file:
+            magic, version, count = _HEADER.unpack(index_file.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                raise RuntimeError(f"Unable to read index '{path}'.")
+            blocks = []
+            for _ in range(4):
+                (size,) = struct.unpack("<Q", index_file.read(8))
+                blocks.append(index_file.read(size))
+        header, paths, addresses, sizes = blocks
+        addresses_array = array("q")
+        addresses_array.frombytes(zlib.decompress(addresses))
+        sizes_array = array("q")
+        sizes_array.frombytes(zlib.decompress(sizes))
+        paths_list = zlib.decompress(paths).decode().split("\n")
+        if len(addresses_array) != count or len(paths_list) != count:
+            raise RuntimeError(f"Unable to read index '{path}'.")
+        return cls(
+            IndexKey(**json.loads(header)), paths_list, addresses_array, sizes_array
+        )
+
+
+def template_path(template, root):
+    """Returns the dotted path of a template relative to ``root``, see
+    :class:`FieldIndex`.
+    """
+    names = []
+    for node in template.path[len(root.path) :]:
+        if node.name:
+            names.append(node.name)
+        else:
+            siblings = [id(sibling) for sibling in node.parent.children]
+            names.append(str(siblings.index(id(node))))
+    return ".".join(names)
+
+
+def load_index(data_file_path: str, key: IndexKey):
+    """Returns the sidecar index of a data file if it has been built for
+    ``key``, otherwise :const:`None`.
+    """
+    path = sidecar_path(data_file_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        index = FieldIndex.load(path)
+    except (OSError, ValueError, TypeError, struct.error, zlib.error, RuntimeError):
+        return None
+    if index.key != key:
+        return None
+    return index
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.layout
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements the static layout analysis of templates. A layout is
+    static if the offsets and sizes of all fields are known without reading any
+    data, i.e. the template does not depend on runtime bindings. Static layouts
+    can be exported as NumPy structured dtypes and :class:`struct.Struct`
+    objects to read records without creating templates.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import struct
+
+from collections import namedtuple
+
+from binalyzer_core import (
+    ValueProperty,
+    AutoSizeValueProperty,
+    StretchSizeProperty,
+    OffsetValueProperty,
+    RelativeOffsetValueProperty,
+)
+
+from .utils import lazy_import
+
+#: NumPy, imported on first use, or :const:`None` if it isn't installed
+numpy = lazy_import("numpy")
+
+#: A leaf of a static layout. The offset is relative to the start of the
+#: template the layout has been computed for.
+Field = namedtuple("Field", ["path", "offset", "size", "template"])
+
+BYTEORDER_PREFIXES = {"little": "<", "big": ">"}
+
+STRUCT_FORMATS = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+
+class StaticLayout(object):
+    """Computes the static layout of a template and its descendants.
+
+    Offsets are computed relative to the start of the given template assuming
+    that the template itself starts at an address that satisfies all
+    boundaries. A :class:`RuntimeError` is raised, naming the offending
+    template and attribute, if the layout depends on data.
+
+    :param template: the :class:`~binalyzer_core.Template` to analyze
+    """
+
+    def __init__(self, template):
+        self.template = template
+
+        #: Leaf fields ordered by their position in the template tree
+        self.fields = []
+
+        #: Size of the template
+        self.size = self._size(template, "", 0, 0)
+
+        #: Padding before the template
+        self.padding_before = self._value(template, "", "padding_before")
+
+        #: Padding after the template
+        self.padding_after = self._value(template, "", "padding_after")
+
+    @property
+    def itemsize(self):
+        """Size of a record including the padding before and after the
+        template, i.e. the distance between two consecutive records.
+        """
+        return self.padding_before + self.size + self.padding_after
+
+    def dtype(self, byteorder: str = "little"):
+        """Returns a NumPy structured dtype with one field per leaf template.
+
+        Fields of 1, 2, 4 or 8 bytes are mapped to unsigned integers of the
+        given byteorder, all other fields to raw bytes. Field names are the
+        dotted paths of the leaf templates.
+        """
+        if numpy is None:
+            raise RuntimeError("NumPy is required to create a dtype.")
+        prefix = self._prefix(byteorder)
+        return numpy.dtype(
+            {
+                "names": [field.path or "value" for field in self.fields],
+                "formats": [
+                    f"{prefix}u{field.size}"
+                    if field.size in STRUCT_FORMATS
+                    else f"V{field.size}"
+                    for field in self.fields
+                ],
+                "offsets": [
+                    self.padding_before + field.offset for field in self.fields
+                ],
+                "itemsize": self.itemsize,
+            }
+        )
+
+    def struct_format(self, byteorder: str = "little"):
+        """Returns a :mod:`struct` format string describing a record.
+
+        Gaps between fields are expressed using pad bytes. Fields of 1, 2, 4
+        or 8 bytes are mapped to unsigned integers, all other fields to
+        :class:`bytes`. Overlapping fields cannot be expressed.
+        """
+        format = self._prefix(byteorder)
+        position = 0
+        previous = None
+        for field in sorted(self.fields, key=lambda field: field.offset):
+            offset = self.padding_before + field.offset
+            if offset < position:
+                raise RuntimeError(
+                    f"Unable to express overlapping fields '{previous.path}' "
+                    f"and '{field.path}' as struct format."
+                )
+            if offset > position:
+                format += f"{offset - position}x"
+            format += STRUCT_FORMATS.get(field.size, f"{field.size}s")
+            position = offset + field.size
+            previous = field
+        if self.itemsize > position:
+            format += f"{self.itemsize - position}x"
+        return format
+
+    def _prefix(self, byteorder):
+        if byteorder not in BYTEORDER_PREFIXES:
+            raise RuntimeError("Expected 'little' or 'big'.")
+        return BYTEORDER_PREFIXES[byteorder]
+
+    def _size(self, template, path, address, offset):
+        extent = self._place_children(template, path, address, offset)
+
+        size_property = template.size_property
+        if isinstance(size_property, AutoSizeValueProperty):
+            boundary = self._value(template, path, "boundary")
+            size = self._round_up(extent, boundary)
+        elif isinstance(size_property, StretchSizeProperty):
+            raise RuntimeError(
+                f"Layout of '{self._label(path)}' is not static: stretched "
+                "size depends on its surroundings."
+            )
+        else:
+            size = self._value(template, path, "size")
+
+        if not template.children and size:
+            self.fields.append(Field(path, address, size, template))
+        return size
+
+    def _place_children(self, parent, parent_path, parent_address, parent_offset):
+        cursor = 0
+        for index, child in enumerate(parent.children):
+            child_path = self._join(parent_path, child.name or str(index))
+            if child.hint and child.signature:
+                raise RuntimeError(
+                    f"Layout of '{child_path}' is not static: presence of an "
+                    "optional template depends on data."
+                )
+            count = self._value(child, child_path, "count")
+            for duplicate in range(count):
+                path = child_path
+                if count > 1:
+                    path = f"{child_path}-{duplicate}"
+                offset = self._offset(
+                    child, path, parent_address, parent_offset, cursor
+                )
+                size = self._size(child, path, parent_address + offset, offset)
+                padding_after = self._value(child, path, "padding_after")
+                cursor = offset + size + padding_after
+        return cursor
+
+    def _offset(self, template, path, parent_address, parent_offset, cursor):
+        offset_property = template.offset_property
+        padding_before = self._value(template, path, "padding_before")
+        boundary = self._value(template, path, "boundary")
+
+        if isinstance(offset_property, RelativeOffsetValueProperty):
+            return (
+                padding_before
+                + self._boundary_offset(parent_offset, boundary)
+                + cursor
+                + self._boundary_offset(cursor, boundary)
+            )
+        if isinstance(offset_property, OffsetValueProperty):
+            return offset_property.value
+        if type(offset_property) is ValueProperty and self.template.parent is None:
+            return offset_property.value - parent_address
+
+        raise RuntimeError(
+            f"Layout of '{self._label(path)}' is not static: offset depends on "
+            f"{self._describe(offset_property)}."
+        )
+
+    def _value(self, template, path, attribute):
+        value_property = getattr(template, attribute + "_property")
+        if type(value_property) is ValueProperty:
+            return value_property.value
+        attribute_name = attribute.replace("_", "-")
+        raise RuntimeError(
+            f"Layout of '{self._label(path)}' is not static: {attribute_name} "
+            f"depends on {self._describe(value_property)}."
+        )
+
+    def _describe(self, value_property):
+        reference_name = getattr(value_property, "reference_name", None)
+        if reference_name:
+            return f"a runtime binding to '{reference_name}'"
+        provider_name = type(value_property.value_provider).__name__
+        return f"a runtime binding ({provider_name})"
+
+    def _label(self, path):
+        return path or self.template.name or ""
+
+    def _join(self, parent_path, name):
+        if parent_path:
+            return parent_path + "." + name
+        return name
+
+    def _round_up(self, value, boundary):
+        if boundary and value % boundary:
+            return value + boundary - value % boundary
+        return value
+
+    def _boundary_offset(self, offset, boundary):
+        if boundary and offset % boundary:
+            return boundary - offset % boundary
+        return 0
+
+
+def static_layout(template):
+    """Returns the :class:`StaticLayout` of the given template."""
+    return StaticLayout(template)
+
+
+def to_dtype(template, byteorder: str = "little"):
+    """Returns a NumPy structured dtype equivalent to the static layout of the
+    given template. The itemsize includes the padding before and after the
+    template. Raises a :class:`RuntimeError` if the layout is not static.
+
+    :param template: the :class:`~binalyzer_core.Template` to export
+    :param byteorder: the byteorder of integer fields, either ``little`` or
+                      ``big``
+    """
+    return static_layout(template).dtype(byteorder)
+
+
+def to_struct(template, byteorder: str = "little"):
+    """Returns a :class:`struct.Struct` equivalent to the static layout of the
+    given template. Raises a :class:`RuntimeError` if the layout is not static.
+
+    :param template: the :class:`~binalyzer_core.Template` to export
+    :param byteorder: the byteorder of integer fields, either ``little`` or
+                      ``big``
+    """
+    return struct.Struct(static_layout(template).struct_format(byteorder))
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.layout_cache
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements a cache of resolved layouts. Resolving a layout
+    records every area of the data that has been read, e.g. referenced sizes,
+    counts and signatures. Data holding the same bytes in all of these areas
+    has the same layout, so its resolution is replaced by comparing them.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import io
+import os
+import threading
+
+from binalyzer_core import BindingContext, TemplateFactory, TemplateProvider
+
+from .data_provider import IntegerCachingDataProvider
+from .index import FieldIndex
+
+
+class LayoutCache(object):
+    """Resolves the layout of a template for data buffers and reuses layouts
+    of previously resolved buffers.
+
+    A layout is reused if the data holds the same bytes in all areas read
+    while resolving it and, if its resolution depended on the size of the
+    data, has the same size. The least recently used layout is dropped if
+    more than ``max_entries`` layouts are cached.
+
+    Every resolution binds a private copy of the template, the template
+    itself is only read, so several threads may resolve layouts at once.
+
+    :param template: an unbound :class:`~binalyzer_core.Template`
+    :param max_entries: maximum number of cached layouts
+    """
+
+    def __init__(self, template, max_entries: int = 16):
+        self.template = template
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        #: Cached layouts, most recently used first
+        self.entries = []
+
+        #: Number of buffers whose layout has been reused
+        self.hits = 0
+
+        #: Number of buffers whose layout has been resolved
+        self.misses = 0
+
+    def resolve(self, data):
+        """Returns the :class:`~binalyzer_template_provider.index.FieldIndex`
+        holding the absolute addresses and sizes of all templates bound to
+        ``data``.
+        """
+        with memoryview(data) as buffer:
+            with self._lock:
+                for position, entry in enumerate(self.entries):
+                    if entry.matches(buffer):
+                        self.hits += 1
+                        if position:
+                            del self.entries[position]
+                            self.entries.insert(0, entry)
+                        return entry.layout
+                self.misses += 1
+
+            stream = _RecordingStream(buffer)
+            binding_context = BindingContext(
+                TemplateProvider(TemplateFactory().clone(self.template)),
+                IntegerCachingDataProvider(stream),
+            )
+            layout = FieldIndex.from_template(binding_context.template, None)
+            entry = LayoutCacheEntry(
+                stream.reads, stream.size_read, len(buffer), layout
+            )
+            stream.close()
+
+        with self._lock:
+            self.entries.insert(0, entry)
+            del self.entries[self.max_entries :]
+        return layout
+
+
+class LayoutCacheEntry(object):
+    """A resolved layout and the data it has been resolved from.
+
+    :param reads: bytes read while resolving by address and size
+    :param size_read: whether resolving depended on the size of the data
+    :param size: size of the data
+    :param layout: the resolved
+        :class:`~binalyzer_template_provider.index.FieldIndex`
+    """
+
+    def __init__(self, reads: dict, size_read: bool, size: int, layout):
+        self.reads = reads
+        self.size_read = size_read
+        self.size = size
+        self.layout = layout
+
+    def matches(self, buffer):
+        """Returns whether ``buffer`` has the layout of this entry."""
+        if self.size_read and len(buffer) != self.size:
+            return False
+        for (address, size), value in self.reads.items():
+            if buffer[address : address + size] != value:
+                return False
+        return True
+
+
+class _RecordingStream(io.RawIOBase):
+    """A read-only binary stream over a buffer recording all reads."""
+
+    def __init__(self, buffer):
+        super(_RecordingStream, self).__init__()
+        self._buffer = buffer
+        self._position = 0
+
+        #: Bytes read by address and size
+        self.reads = {}
+
+        #: Whether the end of the stream has been queried
+        self.size_read = False
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            self.size_read = True
+            offset += len(self._buffer)
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+    def read(self, size=-1):
+        start = self._position
+        if size is None or size < 0:
+            self.size_read = True
+            size = len(self._buffer) - start
+        value = bytes(self._buffer[start : start + size])
+        self.reads[(start, size)] = value
+        self._position = start + len(value)
+        return value
+
+    def getvalue(self):
+        self.size_read = True
+        return bytes(self._buffer)
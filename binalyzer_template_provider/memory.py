@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.memory
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements the measurement of the memory retained by template
+    trees using :mod:`tracemalloc`.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import gc
+import os
+import tracemalloc
+
+from anytree import PreOrderIter
+
+from .flat import FlatTemplate
+from .xml import XMLTemplateParser
+
+#: Template attributes backed by properties
+PROPERTIES = (
+    "offset_property",
+    "size_property",
+    "count_property",
+    "boundary_property",
+    "padding_before_property",
+    "padding_after_property",
+)
+
+#: Modules allocating properties and their value providers
+PROPERTY_MODULES = (
+    os.path.join("binalyzer_core", "properties.py"),
+    os.path.join("binalyzer_core", "value_provider.py"),
+    os.path.join("binalyzer_template_provider", "value_provider.py"),
+)
+
+
+class MemoryReport(object):
+    """Memory retained by a template tree or a
+    :class:`~binalyzer_template_provider.flat.FlatTemplate`.
+
+    :param template: the measured template
+    :param statistics: :class:`tracemalloc.StatisticDiff` objects grouped by
+                       file name
+    """
+
+    def __init__(self, template, statistics):
+        self.template = template
+
+        #: Number of templates in the tree
+        self.nodes = 0
+
+        #: Number of distinct property objects in the tree
+        self.properties = 0
+
+        properties = set()
+        if isinstance(template, FlatTemplate):
+            self.nodes = len(template)
+        else:
+            for node in PreOrderIter(template):
+                self.nodes += 1
+                for name in PROPERTIES:
+                    properties.add(id(getattr(node, name)))
+        self.properties = len(properties)
+
+        #: Retained bytes per file name of the allocating code
+        self.by_file = {
+            statistic.traceback[0].filename: statistic.size_diff
+            for statistic in statistics
+            if statistic.size_diff
+        }
+
+        #: Retained bytes in total
+        self.total = sum(self.by_file.values())
+
+        #: Retained bytes allocated by properties and value providers
+        self.property_bytes = sum(
+            size
+            for filename, size in self.by_file.items()
+            if filename.endswith(PROPERTY_MODULES)
+        )
+
+    @property
+    def bytes_per_node(self):
+        """Retained bytes per template including its properties."""
+        return self.total / self.nodes
+
+    @property
+    def bytes_per_property(self):
+        """Retained bytes per property object including its value provider."""
+        if not self.properties:
+            return 0.0
+        return self.property_bytes / self.properties
+
+    def report(self):
+        """Returns the report as a dictionary of plain values."""
+        return {
+            "nodes": self.nodes,
+            "properties": self.properties,
+            "total": self.total,
+            "bytes_per_node": self.bytes_per_node,
+            "bytes_per_property": self.bytes_per_property,
+            "by_file": dict(self.by_file),
+        }
+
+    def __str__(self):
+        lines = [
+            f"{self.nodes} templates, {self.properties} properties, "
+            f"{self.total / 1024:.1f} KiB",
+            f"{self.bytes_per_node:.1f} bytes per template, "
+            f"{self.bytes_per_property:.1f} bytes per property",
+        ]
+        for filename, size in sorted(
+            self.by_file.items(), key=lambda item: item[1], reverse=True
+        ):
+            lines.append(f"{size / 1024:10.1f} KiB  {filename}")
+        return "\n".join(lines)
+
+
+def measure(create):
+    """Calls ``create`` and returns the :class:`MemoryReport` of the template
+    it returns. Only memory that is still allocated after ``create`` returned
+    is accounted.
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        gc.collect()
+        before = tracemalloc.take_snapshot()
+        template = create()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+    after = after.filter_traces(filters)
+    before = before.filter_traces(filters)
+    return MemoryReport(template, after.compare_to(before, "filename"))
+
+
+def measure_template_memory(text: str, binalyzer=None):
+    """Parses the given XML string and returns the :class:`MemoryReport` of
+    the template tree.
+    """
+    return measure(lambda: XMLTemplateParser(text, binalyzer=binalyzer).parse())
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.overlay
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements a copy-on-write overlay over large binary data.
+    Writes are recorded as sparse extents on top of the unmodified base data,
+    reads merge both and the result can be materialized in a single
+    sequential pass.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import io
+import os
+
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from binalyzer_core import AutoSizeValueProperty, ValueProperty
+
+from .data_provider import IntegerCachingDataProvider, MappedFile
+
+#: A contiguous area of the overlay, either taken from the base data at
+#: ``offset`` or from the written ``value``
+Extent = namedtuple("Extent", ["address", "size", "offset", "value"])
+
+#: Default number of bytes copied at once when materializing
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class Overlay(object):
+    """A binary stream recording writes on top of a base stream.
+
+    The content is a sorted list of extents searched by bisection. Extents
+    without a value refer to the base stream, which is never written.
+    :meth:`getvalue` returns the overlay itself, so the merged content is
+    only built if it is converted to :class:`bytes`.
+
+    :param base: a readable and seekable binary stream
+    """
+
+    def __init__(self, base):
+        self.base = base
+        size = base.seek(0, os.SEEK_END)
+        if size is None:
+            size = base.tell()
+        base.seek(0)
+        self._size = size
+        self._position = 0
+        self._starts = []
+        self._extents = []
+        if size:
+            self._starts.append(0)
+            self._extents.append(Extent(0, size, 0, None))
+
+    def __len__(self):
+        return self._size
+
+    def __bytes__(self):
+        self._position = 0
+        value = self.read()
+        self._position = 0
+        return value
+
+    @property
+    def extents(self):
+        """Written extents as ``(address, size)`` tuples."""
+        return [
+            (extent.address, extent.size)
+            for extent in self._extents
+            if extent.value is not None
+        ]
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self._size
+        if offset < 0:
+            raise RuntimeError("Unable to seek before the start of the overlay.")
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+    def read(self, size: int = -1):
+        start = min(self._position, self._size)
+        end = self._size if size is None or size < 0 else min(start + size, self._size)
+        chunks = []
+        index = max(bisect_right(self._starts, start) - 1, 0)
+        while start < end:
+            extent = self._extents[index]
+            begin = start - extent.address
+            length = min(extent.size - begin, end - start)
+            if extent.value is None:
+                self.base.seek(extent.offset + begin)
+                chunks.append(self.base.read(length))
+            else:
+                chunks.append(extent.value[begin : begin + length])
+            start += length
+            index += 1
+        self._position = end
+        return b"".join(chunks)
+
+    def write(self, value):
+        """Overwrites the content at the current position, extending the
+        overlay if needed.
+        """
+        value = bytes(value)
+        if self._position > self._size:
+            self.replace(self._size, 0, bytes(self._position - self._size))
+        size = min(len(value), self._size - self._position)
+        self.replace(self._position, size, value)
+        self._position += len(value)
+        return len(value)
+
+    def getvalue(self):
+        return self
+
+    def replace(self, address: int, size: int, value: bytes):
+        """Replaces ``size`` bytes at ``address`` with ``value``. The content
+        behind the replaced area moves if the sizes differ.
+        """
+        if address < 0 or size < 0 or address + size > self._size:
+            raise RuntimeError("Unable to replace bytes beyond the overlay.")
+        self._split(address)
+        self._split(address + size)
+        first = bisect_left(self._starts, address)
+        last = bisect_left(self._starts, address + size)
+        extents = []
+        if value:
+            extents.append(Extent(address, len(value), 0, bytes(value)))
+        self._extents[first:last] = extents
+        self._starts[first:last] = [extent.address for extent in extents]
+        delta = len(value) - size
+        if delta:
+            for index in range(first + len(extents), len(self._extents)):
+                extent = self._extents[index]._replace(
+                    address=self._extents[index].address + delta
+                )
+                self._extents[index] = extent
+                self._starts[index] = extent.address
+        self._size += delta
+
+    def materialize(self, stream, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Writes the merged content to a binary stream in a single
+        sequential pass and returns the number of bytes written.
+        """
+        for extent in self._extents:
+            if extent.value is not None:
+                stream.write(extent.value)
+                continue
+            self.base.seek(extent.offset)
+            remaining = extent.size
+            while remaining:
+                chunk = self.base.read(min(remaining, chunk_size))
+                if not chunk:
+                    raise RuntimeError("Unable to read beyond the base data.")
+                stream.write(chunk)
+                remaining -= len(chunk)
+        return self._size
+
+    def _split(self, address):
+        index = bisect_right(self._starts, address) - 1
+        if index < 0:
+            return
+        extent = self._extents[index]
+        begin = address - extent.address
+        if begin <= 0 or begin >= extent.size:
+            return
+        if extent.value is None:
+            head = extent._replace(size=begin)
+            tail = Extent(address, extent.size - begin, extent.offset + begin, None)
+        else:
+            head = extent._replace(size=begin, value=extent.value[:begin])
+            tail = Extent(address, extent.size - begin, 0, extent.value[begin:])
+        self._extents[index : index + 1] = [head, tail]
+        self._starts.insert(index + 1, address)
+
+
+class OverlayDataProvider(IntegerCachingDataProvider):
+    """A data provider recording writes in an :class:`Overlay` instead of
+    modifying the original data.
+
+    Assigning a template value overwrites the bound area, :meth:`edit`
+    replaces it and moves the data behind it if the size changes.
+
+    :param base: a path to map read-only, a bytes-like object or a readable
+                 and seekable binary stream
+    """
+
+    def __init__(self, base):
+        if isinstance(base, str):
+            base = MappedFile(base, writable=False)
+        elif isinstance(base, (bytes, bytearray, memoryview)):
+            base = io.BytesIO(base)
+        super(OverlayDataProvider, self).__init__(Overlay(base))
+
+    @property
+    def extents(self):
+        """Written extents as ``(address, size)`` tuples."""
+        return self._data.extents
+
+    def edit(self, template, value: bytes):
+        """Replaces the area of a template with ``value``.
+
+        If the size changes, the data behind the template moves and the
+        template gets a fixed size. Templates with a bound size can't be
+        resized.
+        """
+        size = template.size
+        if len(value) != size and not isinstance(
+            template.size_property, (ValueProperty, AutoSizeValueProperty)
+        ):
+            raise RuntimeError(
+                f"Unable to resize '{template.name}': its size is bound."
+            )
+        self._integers = {}
+        self._data.replace(template.absolute_address, size, value)
+        if len(value) != size:
+            template.size = len(value)
+        else:
+            template.clear_cache(template.root)
+
+    def materialize(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Writes the edited data to a new file and returns its size."""
+        with open(path, "wb") as output_file:
+            return self._data.materialize(output_file, chunk_size)
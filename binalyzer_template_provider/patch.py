@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.patch
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements transactions patching fields of memory-mapped
+    files in place.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+from collections import namedtuple
+
+#: A value to write to an address of a mapped file
+Patch = namedtuple("Patch", ["name", "address", "value", "template"])
+
+
+class PatchTransaction(object):
+    """Collects patches of fixed-size fields and writes them at once.
+
+    Every patch must match the size of its template. On :meth:`commit` all
+    patches are validated against the size of the mapped file before the
+    first one is written, afterwards only the touched pages are flushed. Used
+    as a context manager, the transaction is committed unless an exception
+    is raised.
+
+    :param data_provider: a
+        :class:`~binalyzer_template_provider.data_provider.MappedFileDataProvider`
+    """
+
+    def __init__(self, data_provider):
+        if not hasattr(data_provider, "write_at"):
+            raise RuntimeError("Expected a data provider of a memory-mapped file.")
+        self.data_provider = data_provider
+
+        #: Collected patches in order
+        self.patches = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def patch(self, template, value: bytes):
+        """Adds a patch writing ``value`` to the area of ``template``."""
+        size = template.size
+        if len(value) != size:
+            raise RuntimeError(
+                f"Value of '{template.name}' has {len(value)} bytes, expected "
+                f"{size}."
+            )
+        self.patches.append(
+            Patch(template.name, template.absolute_address, bytes(value), template)
+        )
+
+    def validate(self):
+        """Raises a :class:`RuntimeError` if a patch exceeds the mapped
+        file.
+        """
+        size = len(self.data_provider.data)
+        for patch in self.patches:
+            if patch.address + len(patch.value) > size:
+                raise RuntimeError(
+                    f"Unable to patch '{patch.name}': it exceeds the mapped file."
+                )
+
+    def commit(self):
+        """Writes and flushes all patches and returns the number of flushed
+        pages.
+        """
+        self.validate()
+        roots = {}
+        for patch in self.patches:
+            self.data_provider.write_at(patch.address, patch.value)
+            roots[id(patch.template.root)] = patch.template.root
+        for root in roots.values():
+            root.clear_cache()
+        self.patches = []
+        return self.data_provider.flush()
+
+    def rollback(self):
+        """Discards all patches."""
+        self.patches = []
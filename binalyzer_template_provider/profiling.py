@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.profiling
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements the profiling of template parsing. A profile records
+    the wall time spent in each phase of a parse and counts the processed
+    tokens, elements, attributes and bindings.
+
+    Profiling is turned off by default. It is turned on for all parsers using
+    :func:`enable` or the ``BINALYZER_PROFILE`` environment variable, and for a
+    single parser using its ``profile`` argument.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import os
+
+_enabled = os.environ.get("BINALYZER_PROFILE", "") not in ("", "0")
+
+
+def enable():
+    """Turns profiling on for all parsers created afterwards."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    """Turns profiling off for all parsers created afterwards."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    """Returns :const:`True` if profiling is turned on globally."""
+    return _enabled
+
+
+class ParseProfile(object):
+    """Wall times and counts of a single parse.
+
+    Durations of the phases are exclusive, e.g. the time spent resolving
+    custom value providers is not part of the time spent decoding attributes.
+    """
+
+    #: Phases of a parse in the order they are run
+    PHASES = ("lexing", "parsing", "walking", "attributes", "providers")
+
+    #: Counted items
+    COUNTS = ("tokens", "elements", "attributes", "bindings", "providers")
+
+    def __init__(self):
+        self._durations = dict.fromkeys(self.PHASES, 0.0)
+
+        #: Number of items processed per kind
+        self.counts = dict.fromkeys(self.COUNTS, 0)
+
+    def add(self, phase: str, duration: float):
+        """Adds the inclusive wall time of a phase."""
+        self._durations[phase] += duration
+
+    @property
+    def durations(self):
+        """Exclusive wall time per phase in seconds."""
+        durations = dict(self._durations)
+        durations["attributes"] -= durations["providers"]
+        durations["walking"] -= self._durations["attributes"]
+        return durations
+
+    @property
+    def total(self):
+        """Wall time of the parse in seconds."""
+        return sum(self.durations.values())
+
+    def report(self):
+        """Returns the profile as a dictionary of plain values."""
+        return {
+            "total": self.total,
+            "durations": self.durations,
+            "counts": dict(self.counts),
+        }
+
+    def __str__(self):
+        lines = []
+        total = self.total
+        for phase, duration in self.durations.items():
+            share = duration / total * 100 if total else 0.0
+            lines.append(f"{phase:12} {duration * 1e3:10.3f} ms {share:6.1f} %")
+        lines.append(f"{'total':12} {total * 1e3:10.3f} ms")
+        for name, count in self.counts.items():
+            lines.append(f"{name:12} {count:10d}")
+        return "\n".join(lines)
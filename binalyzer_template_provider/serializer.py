@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.serializer
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements the bulk serialization of bound templates. The
+    layout of the leaves is resolved once, afterwards field values are written
+    into a single preallocated buffer or streamed to a file object in address
+    order. Gaps between fields, e.g. paddings, are zero-filled.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+from collections import Counter, namedtuple
+
+#: A leaf of a bound template at an address relative to the template
+SerializedField = namedtuple("SerializedField", ["path", "address", "size", "template"])
+
+#: Default number of zero bytes written at once when streaming
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class Serializer(object):
+    """Serializes a bound template.
+
+    Field values are taken from the ``values`` given to :meth:`serialize` or
+    :meth:`write`, keyed by dotted path relative to the template, and
+    otherwise from the data the template is bound to. With ``texts`` set, the
+    text of a leaf is used instead of its bound data unless a value is given.
+
+    Unnamed templates are named by their position among their siblings.
+    Siblings sharing a name are told apart by their occurrence, e.g.
+    ``header.field[1]`` is the second child of ``header`` named ``field``.
+
+    :param template: a :class:`~binalyzer_core.Template` bound to data
+    :param texts: use the texts of leaves as their default values
+    """
+
+    def __init__(self, template, texts: bool = False):
+        self.template = template
+        self.texts = texts
+
+        #: Size of the serialized template
+        self.size = template.size
+
+        base_address = template.absolute_address
+        fields = []
+        nodes = [(template, "")]
+        while nodes:
+            node, path = nodes.pop()
+            children = node.children
+            if not children:
+                if node is template:
+                    continue
+                address = node.absolute_address - base_address
+                size = node.size
+                if address < 0 or address + size > self.size:
+                    raise RuntimeError(
+                        f"Unable to serialize '{path}': it exceeds the template."
+                    )
+                fields.append(SerializedField(path, address, size, node))
+                continue
+            names = _child_names(children)
+            for index in range(len(children) - 1, -1, -1):
+                name = names[index]
+                nodes.append((children[index], f"{path}.{name}" if path else name))
+        fields.sort(key=lambda field: field.address)
+
+        #: Leaves ordered by address
+        self.fields = fields
+        self._paths = {field.path for field in fields}
+        self._base_address = base_address
+
+    def serialize(self, values: dict = None):
+        """Returns a :class:`bytearray` of the template's size holding all
+        field values.
+        """
+        self._check(values)
+        buffer = bytearray(self.size)
+        with _DataSource(self.template, self._base_address) as source:
+            for field in self.fields:
+                buffer[field.address : field.address + field.size] = self._value(
+                    field, values, source
+                )
+        return buffer
+
+    def write(self, stream, values: dict = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Writes the serialized template to a binary stream in a single
+        sequential pass and returns the number of bytes written.
+        """
+        self._check(values)
+        position = 0
+        with _DataSource(self.template, self._base_address) as source:
+            for field in self.fields:
+                if field.address < position:
+                    raise RuntimeError(
+                        f"Unable to stream '{field.path}': it overlaps another field."
+                    )
+                _zero_fill(stream, field.address - position, chunk_size)
+                stream.write(self._value(field, values, source))
+                position = field.address + field.size
+        _zero_fill(stream, self.size - position, chunk_size)
+        return self.size
+
+    def _check(self, values):
+        for path in values or ():
+            if path not in self._paths:
+                raise RuntimeError(f"Unable to find field '{path}'.")
+
+    def _value(self, field, values, source):
+        if values and field.path in values:
+            value = values[field.path]
+            if len(value) != field.size:
+                raise RuntimeError(
+                    f"Value of '{field.path}' has {len(value)} bytes, expected "
+                    f"{field.size}."
+                )
+            return value
+        text = field.template.text
+        if self.texts and text:
+            return text[: field.size].ljust(field.size, b"\x00")
+        return source.read(field.address, field.size)
+
+
+class _DataSource(object):
+    """Reads fields from the data a template is bound to, through a memory
+    view if the data supports it.
+    """
+
+    def __init__(self, template, base_address):
+        self._data = template.binding_context.data_provider.data
+        self._base_address = base_address
+        self._buffer = None
+
+    def __enter__(self):
+        if hasattr(self._data, "getbuffer"):
+            self._buffer = self._data.getbuffer()
+        return self
+
+    def __exit__(self, *args):
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+
+    def read(self, address, size):
+        address += self._base_address
+        if self._buffer is not None:
+            value = self._buffer[address : address + size]
+        else:
+            self._data.seek(address)
+            value = self._data.read(size)
+            self._data.seek(0)
+        if len(value) < size:
+            return bytes(value) + bytes(size - len(value))
+        return value
+
+
+def _child_names(children):
+    counts = Counter(child.name for child in children if child.name)
+    occurrences = Counter()
+    names = []
+    for index, child in enumerate(children):
+        name = child.name
+        if not name:
+            names.append(str(index))
+        elif counts[name] > 1:
+            names.append(f"{name}[{occurrences[name]}]")
+            occurrences[name] += 1
+        else:
+            names.append(name)
+    return names
+
+
+def _zero_fill(stream, size, chunk_size):
+    zeros = bytes(min(size, chunk_size))
+    while size > 0:
+        stream.write(zeros[:size])
+        size -= len(zeros)
+
+
+def serialize(template, values: dict = None, texts: bool = False):
+    """Returns the serialization of a bound template as :class:`bytearray`."""
+    return Serializer(template, texts).serialize(values)
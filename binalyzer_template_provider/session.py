@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.session
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements sessions binding a template to data independently
+    of other sessions, so each thread can use its own session.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import io
+
+from typing import Optional
+
+from binalyzer_core import Binalyzer, TemplateFactory
+
+from .data_provider import IntegerCachingDataProvider
+
+
+class Session(object):
+    """A template bound to data.
+
+    The session binds a private copy of the given template, the template
+    itself is only read. A session must not be used by several threads at
+    once.
+
+    :param template: an unbound :class:`~binalyzer_core.Template`
+    :param data: the data to bind the template to
+    """
+
+    def __init__(self, template, data: Optional[bytes] = None):
+        #: The :class:`~binalyzer_core.Binalyzer` of this session
+        self.binalyzer = Binalyzer(TemplateFactory().clone(template))
+        if data:
+            self.binalyzer.data_provider = IntegerCachingDataProvider(
+                io.BytesIO(data)
+            )
+
+    @property
+    def template(self):
+        """The bound :class:`~binalyzer_core.Template`."""
+        return self.binalyzer.template
+
+    @property
+    def data(self):
+        """The binary stream the template is bound to."""
+        return self.binalyzer.data
+
+    @property
+    def data_provider(self):
+        return self.binalyzer.data_provider
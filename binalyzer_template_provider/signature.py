@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.signature
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements lookup tables for runs of optional siblings that
+    are told apart by their signatures.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+
+
+class _TrieNode(object):
+
+    __slots__ = ("children", "indices")
+
+    def __init__(self):
+        self.children = {}
+        self.indices = []
+
+
+class SignatureTable(object):
+    """A trie of the signatures of a run of optional siblings.
+
+    Signatures may differ in length. Looking up the data at an address walks
+    the trie byte by byte, so choosing the matching sibling takes time
+    proportional to the signature length instead of the number of siblings.
+
+    :param templates: consecutive sibling templates having a signature and a
+                      hint
+    """
+
+    def __init__(self, templates):
+        self.templates = list(templates)
+        self.parent = self.templates[0].parent if self.templates else None
+        self.max_length = 0
+        self._root = _TrieNode()
+        for index, template in enumerate(self.templates):
+            signature = bytes(template.signature)
+            node = self._root
+            for byte in signature:
+                node = node.children.setdefault(byte, _TrieNode())
+            node.indices.append(index)
+            self.max_length = max(self.max_length, len(signature))
+
+    def lookup(self, data, offset: int = 0, start: int = 0):
+        """Returns the index of the first sibling at or after ``start`` whose
+        signature matches ``data`` at ``offset``, or :const:`None`.
+
+        Siblings before the returned index are the ones the binding engine
+        drops, because their signatures do not match.
+        """
+        result = None
+        node = self._root
+        for byte in data[offset : offset + self.max_length]:
+            node = node.children.get(byte)
+            if node is None:
+                break
+            for index in node.indices:
+                if index >= start:
+                    if result is None or index < result:
+                        result = index
+                    break
+        return result
+
+    def lookup_all(self, data, offset: int = 0):
+        """Returns the indices of all siblings whose signatures match
+        ``data`` at ``offset``, shorter signatures first.
+        """
+        result = []
+        node = self._root
+        for byte in data[offset : offset + self.max_length]:
+            node = node.children.get(byte)
+            if node is None:
+                break
+            result.extend(node.indices)
+        return result
+
+    def match(self, data, offset: int = 0, start: int = 0):
+        """Returns the first sibling at or after ``start`` whose signature
+        matches ``data`` at ``offset``, or :const:`None`.
+        """
+        index = self.lookup(data, offset, start)
+        if index is None:
+            return None
+        return self.templates[index]
+
+    def __len__(self):
+        return len(self.templates)
+
+
+def signature_tables(template):
+    """Returns a :class:`SignatureTable` for every run of optional siblings
+    within the given template tree. Tables are grouped by their parent,
+    parents are visited in pre-order.
+    """
+    tables = []
+    run = []
+    for child in template.children:
+        if child.signature and child.hint:
+            run.append(child)
+            continue
+        if run:
+            tables.append(SignatureTable(run))
+            run = []
+    if run:
+        tables.append(SignatureTable(run))
+    for child in template.children:
+        tables.extend(signature_tables(child))
+    return tables
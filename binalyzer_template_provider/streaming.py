@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.streaming
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements a streaming parser of template descriptions. The
+    description is read in chunks and parsed by expat, which calls the
+    listener of :class:`~binalyzer_template_provider.xml.XMLTemplateParser`
+    with lightweight stand-ins for the contexts of the generated parser.
+    Neither the description nor its parse tree is held in memory, only the
+    open elements and the text of the current element.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import os
+import re
+import time
+
+from typing import Optional
+from xml.parsers import expat
+
+from binalyzer_core import Binalyzer
+
+from .blob import TEXT_ENCODINGS, DEFAULT_TEXT_ENCODING, decode_text
+from .flat import FlatTemplateBuilder
+from .fragments import FragmentCache
+from .profiling import ParseProfile, is_enabled as is_profiling_enabled
+from .xml import XMLTemplateParser
+
+#: Number of characters or bytes read from a template file at once
+CHUNK_SIZE = 64 * 1024
+
+_BRACKET_NAME = re.compile(r"[a-zA-Z0-9_.-]+")
+
+
+class StreamingXMLTemplateParser(XMLTemplateParser):
+    """Creates a template tree from an XML description read in chunks.
+
+    Texts are decoded while they are read. Each call of :meth:`parse` or
+    :meth:`parse_flat` reads the description anew, a file object is read
+    from its current position. Unlike the generated parser, expat rejects
+    malformed descriptions with a :class:`RuntimeError` instead of
+    recovering from them.
+
+    :param template_file: path or file object of the description
+    :param chunk_size: number of characters or bytes read at once
+    :param base_path: directory relative ``text-file`` and ``include`` paths
+        are resolved against, defaults to the directory of ``template_file``
+        if it is a path
+    """
+
+    def __init__(
+        self,
+        template_file,
+        data: Optional[bytes] = None,
+        binalyzer: Optional[Binalyzer] = None,
+        profile: Optional[bool] = None,
+        chunk_size: int = CHUNK_SIZE,
+        base_path: Optional[str] = None,
+        fragments: Optional[FragmentCache] = None,
+        includes: tuple = (),
+    ):
+        if profile is None:
+            profile = is_profiling_enabled()
+
+        #: The :class:`~binalyzer_template_provider.profiling.ParseProfile` of
+        #: the parse if profiling is turned on; otherwise :const:`None`.
+        self.profile = ParseProfile() if profile else None
+
+        self._template_file = template_file
+        self._chunk_size = chunk_size
+        self._root = None
+        self._templates = []
+        self._text_encodings = []
+        self._data = data
+        self._binalyzer = binalyzer
+
+        #: Directory relative ``text-file`` and ``include`` paths are
+        #: resolved against, the working directory if :const:`None`
+        self.base_path = base_path
+        if base_path is None and isinstance(template_file, str):
+            self.base_path = os.path.dirname(template_file)
+
+        #: The :class:`~binalyzer_template_provider.fragments.FragmentCache`
+        #: of included fragments
+        self.fragments = FragmentCache() if fragments is None else fragments
+
+        #: Paths of the fragments being included, outermost first
+        self.includes = includes
+
+        #: Content hashes of the fragments included so far by path,
+        #: including the fragments they include
+        self.dependencies = {}
+
+        self._signature_tables = None
+
+    def parse(self):
+        if self.profile is None:
+            self._walk(self)
+        else:
+            started = time.perf_counter()
+            self._walk(self)
+            self.profile.add("walking", time.perf_counter() - started)
+        self._signature_tables = None
+        return self._root
+
+    def parse_flat(self):
+        """Returns a :class:`~binalyzer_template_provider.flat.FlatTemplate`
+        instead of a template tree.
+        """
+        builder = self._flat_template_builder()
+        self._walk(builder)
+        return builder.table
+
+    def enterText(self, ctx):
+        if isinstance(ctx, _TextContext):
+            self._templates[-1].text = ctx.value
+        else:
+            super(StreamingXMLTemplateParser, self).enterText(ctx)
+
+    def _fragment_parser(self, path):
+        if path in self.includes:
+            raise RuntimeError(f"Unable to include '{path}' recursively.")
+        return StreamingXMLTemplateParser(
+            path,
+            binalyzer=self._binalyzer,
+            profile=False,
+            chunk_size=self._chunk_size,
+            fragments=self.fragments,
+            includes=self.includes + (path,),
+        )
+
+    def _flat_template_builder(self):
+        return _StreamingFlatTemplateBuilder(self.base_path, self._flat_fragment)
+
+    def _walk(self, listener):
+        walker = _ExpatWalker(listener)
+        if isinstance(self._template_file, str):
+            with open(self._template_file, "rb") as template_file:
+                walker.feed(template_file, self._chunk_size)
+        else:
+            walker.feed(self._template_file, self._chunk_size)
+
+
+class _ExpatWalker(object):
+    """Calls the element and text callbacks of a listener for the events of
+    an expat parser.
+    """
+
+    def __init__(self, listener):
+        self._listener = listener
+
+        #: Contexts of the open elements
+        self._elements = []
+
+        #: Decoder of the text of the innermost open element, :const:`None`
+        #: once the text has ended
+        self._text = None
+
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.ordered_attributes = True
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+        self._parser.CharacterDataHandler = self._character_data
+        self._parser.CommentHandler = self._end_text
+        self._parser.StartCdataSectionHandler = self._end_text
+        self._parser.ProcessingInstructionHandler = self._end_text
+
+    def feed(self, template_file, chunk_size):
+        """Parses a description read from a file object in chunks."""
+        started = False
+        try:
+            chunk = template_file.read(chunk_size)
+            while chunk:
+                if not started:
+                    chunk = chunk.lstrip()
+                    started = bool(chunk)
+                self._parser.Parse(chunk, False)
+                chunk = template_file.read(chunk_size)
+            self._parser.Parse(b"", True)
+        except expat.ExpatError as error:
+            raise RuntimeError(f"Unable to parse template: {error}.")
+
+    def _start_element(self, name, attributes):
+        self._end_text()
+        ctx = _ElementContext(name, attributes)
+        self._elements.append(ctx)
+        self._listener.enterElement(ctx)
+        self._text = _TextDecoder(ctx.text_encoding)
+
+    def _end_element(self, name):
+        self._end_text()
+        self._listener.exitElement(self._elements.pop())
+
+    def _character_data(self, data):
+        if self._text is not None:
+            self._text.feed(data)
+
+    def _end_text(self, *args):
+        if self._text is None:
+            return
+        value = self._text.finish()
+        self._text = None
+        if value:
+            self._listener.enterText(_TextContext(value))
+
+
+class _TextDecoder(object):
+    """Decodes a text separated by whitespace as it arrives."""
+
+    #: Number of characters decoded at once per encoding
+    BLOCK_SIZES = {"hex": 2, "base64": 4}
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self._block_size = self.BLOCK_SIZES[encoding]
+        self._value = bytearray()
+        self._pending = ""
+
+    def feed(self, text):
+        digits = self._pending + "".join(text.split())
+        end = len(digits) - len(digits) % self._block_size
+        self._value += decode_text(digits[:end], self.encoding)
+        self._pending = digits[end:]
+
+    def finish(self):
+        if self._pending:
+            decode_text(self._pending, self.encoding)
+        return bytes(self._value)
+
+
+class _Token(object):
+    def __init__(self, text):
+        self._text = text
+
+    def getText(self):
+        return self._text
+
+
+class _ElementContext(object):
+    """Stands in for the element context of the generated parser."""
+
+    def __init__(self, name, attributes):
+        self._name = _Token(name)
+        self._attributes = []
+        self.text_encoding = DEFAULT_TEXT_ENCODING
+        for i in range(0, len(attributes), 2):
+            self._attributes.append(_AttributeContext(attributes[i], attributes[i + 1]))
+            if attributes[i] == "text-encoding":
+                self.text_encoding = attributes[i + 1]
+        if self.text_encoding not in TEXT_ENCODINGS:
+            raise RuntimeError("Expected 'hex' or 'base64'.")
+
+    def Name(self, i=None):
+        return self._name
+
+    def attribute(self):
+        return self._attributes
+
+
+class _AttributeContext(object):
+    """Stands in for the attribute context of the generated parser. Values
+    enclosed in braces are bindings.
+    """
+
+    def __init__(self, name, value):
+        self._name = _Token(name)
+        self._value = None
+        self._names = None
+        if value.startswith("{") and value.endswith("}"):
+            self._names = [_Token(name) for name in _BRACKET_NAME.findall(value)]
+        else:
+            self._value = _Token(f'"{value}"')
+
+    def Name(self):
+        return self._name
+
+    def value(self):
+        return self._value
+
+    def binding(self):
+        return self if self._names is not None else None
+
+    def sequence(self):
+        return self
+
+    def BRACKET_NAME(self):
+        return self._names
+
+
+class _TextContext(object):
+    """Stands in for the text context of the generated parser, holding the
+    decoded text.
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+
+class _StreamingFlatTemplateBuilder(FlatTemplateBuilder):
+    """Takes decoded texts instead of decoding them again."""
+
+    def enterText(self, ctx):
+        self._add_text(ctx.value)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.tracing
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements the tracing of property evaluations. While tracing,
+    every evaluation of an offset, size, count, boundary or padding property is
+    counted and timed per template path. A trace can be exported as a flat
+    table and as Chrome trace-event JSON.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+
+from collections import namedtuple
+
+from binalyzer_core import PropertyBase, ValueProperty
+
+#: Template attributes backed by properties
+ATTRIBUTES = ("offset", "size", "count", "boundary", "padding_before", "padding_after")
+
+#: A row of the flat table of a :class:`ResolutionTrace`
+TraceEntry = namedtuple(
+    "TraceEntry", ["path", "attribute", "count", "total_time", "self_time"]
+)
+
+_active = None
+
+
+class ResolutionTrace(object):
+    """Evaluation counts and times of template properties.
+
+    Total times include the evaluation of the properties a property depends
+    on, self times do not. Only evaluations of the thread that created the
+    trace are recorded.
+
+    :param events: record an event per evaluation for the Chrome trace
+    :param include_constants: trace properties holding constant values
+    """
+
+    def __init__(self, events: bool = True, include_constants: bool = False):
+        self.events = [] if events else None
+        self.include_constants = include_constants
+        self._entries = {}
+        self._local = threading.local()
+        self._started = time.perf_counter()
+
+        #: Identifier of the traced thread
+        self.thread = threading.get_ident()
+
+    def entries(self):
+        """Returns a list of :class:`TraceEntry` ordered by total time."""
+        entries = [
+            TraceEntry(path, attribute, *values)
+            for (path, attribute), values in self._entries.items()
+        ]
+        entries.sort(key=lambda entry: entry.total_time, reverse=True)
+        return entries
+
+    def format_table(self, limit: int = None):
+        """Returns the flat table as text, limited to the given number of
+        rows.
+        """
+        lines = [
+            f"{'path':40} {'attribute':15} {'count':>8} {'total ms':>10} "
+            f"{'self ms':>10}"
+        ]
+        for entry in self.entries()[:limit]:
+            lines.append(
+                f"{entry.path or '<root>':40} {entry.attribute:15} "
+                f"{entry.count:8d} {entry.total_time * 1e3:10.3f} "
+                f"{entry.self_time * 1e3:10.3f}"
+            )
+        return "\n".join(lines)
+
+    def chrome_trace(self):
+        """Returns the recorded events in the Chrome trace-event format."""
+        if self.events is None:
+            raise RuntimeError("Unable to export a trace recorded without events.")
+        return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: str):
+        """Writes the recorded events as Chrome trace-event JSON."""
+        with open(path, "w") as trace_file:
+            json.dump(self.chrome_trace(), trace_file)
+
+    @property
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _evaluate(self, get_value, value_property):
+        if threading.get_ident() != self.thread:
+            return get_value(value_property)
+        template, attribute = _owner(value_property)
+        if attribute is None or (
+            not self.include_constants and type(value_property) is ValueProperty
+        ):
+            return get_value(value_property)
+
+        stack = self._stack
+        stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return get_value(value_property)
+        finally:
+            duration = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += duration
+            path = _path(template)
+            key = (path, attribute)
+            count, total_time, self_time = self._entries.get(key, (0, 0.0, 0.0))
+            self._entries[key] = (
+                count + 1,
+                total_time + duration,
+                self_time + duration - children,
+            )
+            if self.events is not None:
+                self.events.append(
+                    {
+                        "name": f"{path or '<root>'}:{attribute}",
+                        "cat": attribute,
+                        "ph": "X",
+                        "ts": (started - self._started) * 1e6,
+                        "dur": duration * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                    }
+                )
+
+
+@contextlib.contextmanager
+def trace(events: bool = True, include_constants: bool = False):
+    """Traces property evaluations within the ``with`` block and yields the
+    :class:`ResolutionTrace`.
+
+    Tracing replaces the evaluation of all properties while it is active, so
+    it is meant for diagnosis and must not be nested. Evaluations of other
+    threads are not traced.
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("Tracing is already active.")
+    resolution_trace = ResolutionTrace(events, include_constants)
+    get_value = PropertyBase.get_value
+
+    def traced_get_value(value_property):
+        return resolution_trace._evaluate(get_value, value_property)
+
+    _active = resolution_trace
+    PropertyBase.get_value = traced_get_value
+    try:
+        yield resolution_trace
+    finally:
+        PropertyBase.get_value = get_value
+        _active = None
+
+
+def _owner(value_property):
+    template = getattr(value_property, "origin", None)
+    if template is None:
+        template = value_property._template
+    if template is None:
+        return None, None
+    for attribute in ATTRIBUTES:
+        if getattr(template, "_" + attribute, None) is value_property:
+            return template, attribute
+    return template, None
+
+
+def _path(template):
+    return ".".join(node.name or "" for node in template.path[1:])
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.utils
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements helper and utility functions.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import hashlib
+import importlib
+import importlib.util
+
+
+def template_hash(text: str):
+    """Returns a hex digest identifying the given template description."""
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+
+
+def lazy_import(name: str):
+    """Returns a stand-in for the module of the given name, which imports it
+    on its first attribute access, or :const:`None` if it isn't installed.
+
+    The stand-in is private to the caller; the module is imported the usual
+    way, so other importers never see the stand-in.
+    """
+    if importlib.util.find_spec(name) is None:
+        return None
+    return _LazyModule(name)
+
+
+def load(module):
+    """Imports a module returned by :func:`lazy_import` unless it has been
+    imported already and returns it.
+    """
+    if isinstance(module, _LazyModule):
+        return module._load()
+    return module
+
+
+class _LazyModule(object):
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+    binalyzer_template_provider.value_provider
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module implements value providers that decode referenced templates
+    using precompiled integer decoders.
+
+    :copyright: 2020 Denis Vasilík
+    :license: MIT
+"""
+import functools
+import struct
+
+from binalyzer_core import TemplateValueProvider, value_cache
+
+STRUCT_FORMATS = {1: "B", 2: "H", 4: "I", 8: "Q"}
+BYTEORDER_PREFIXES = {"little": "<", "big": ">"}
+
+
+@functools.lru_cache(maxsize=None)
+def integer_decoder(size: int, byteorder: str = "little"):
+    """Returns a callable ``decode(buffer, offset=0)`` that converts ``size``
+    bytes of ``buffer`` at ``offset`` to an unsigned integer.
+
+    Widths of 1, 2, 4 and 8 bytes are decoded by a precompiled
+    :class:`struct.Struct`, all other widths fall back to
+    :meth:`int.from_bytes`.
+    """
+    if byteorder not in BYTEORDER_PREFIXES:
+        raise RuntimeError("Expected 'little' or 'big' byteorder.")
+    if size in STRUCT_FORMATS:
+        unpack_from = struct.Struct(
+            BYTEORDER_PREFIXES[byteorder] + STRUCT_FORMATS[size]
+        ).unpack_from
+
+        def decode(buffer, offset=0):
+            return unpack_from(buffer, offset)[0]
+
+    else:
+
+        def decode(buffer, offset=0):
+            return int.from_bytes(buffer[offset : offset + size], byteorder)
+
+    return decode
+
+
+class DecodingTemplateValueProvider(TemplateValueProvider):
+    """Decodes the referenced template with a precompiled integer decoder.
+
+    The decoders are attached when the binding is parsed. The byteorder is part
+    of the provider type, so clones created by the binding engine keep it.
+    """
+
+    BYTEORDER = "little"
+
+    def __init__(self, property):
+        super(DecodingTemplateValueProvider, self).__init__(property)
+        self.byteorder = self.BYTEORDER
+        self.decoders = {
+            size: integer_decoder(size, self.byteorder) for size in STRUCT_FORMATS
+        }
+
+    @value_cache
+    def get_value(self):
+        template = self.property.template
+        size = template.size
+        data_provider = template.binding_context.data_provider
+        if hasattr(data_provider, "read_integer"):
+            return data_provider.read_integer(
+                template.absolute_address, size, self.byteorder
+            )
+        value = data_provider.read(template)
+        if len(value) != size:
+            return int.from_bytes(value, self.byteorder)
+        decoder = self.decoders.get(size)
+        if decoder is None:
+            decoder = self.decoders[size] = integer_decoder(size, self.byteorder)
+        return decoder(value)
+
+
+class LittleEndianTemplateValueProvider(DecodingTemplateValueProvider):
+    BYTEORDER = "little"
+
+
+class BigEndianTemplateValueProvider(DecodingTemplateValueProvider):
+    BYTEORDER = "big"
+
+
+TEMPLATE_VALUE_PROVIDERS = {
+    "little": LittleEndianTemplateValueProvider,
+    "big": BigEndianTemplateValueProvider,
+}
@@ -9,6 +9,9 @@
     :license: MIT
 """
 import antlr4
+import os
+import threading
+import time
 
 from typing import Optional
 
@@ -28,7 +31,18 @@ from binalyzer_core import (
     BindingContext,
 )
 
+from .blob import TEXT_ENCODINGS, DEFAULT_TEXT_ENCODING, decode_text, text_file_blob
+from .flat import FlatTemplateBuilder
+from .fragments import FragmentCache, INCLUDE_TAG, include_attributes, instantiate
 from .generated import XMLParserListener, XMLLexer, XMLParser
+from .profiling import ParseProfile, is_enabled as is_profiling_enabled
+from .signature import signature_tables
+from .value_provider import TEMPLATE_VALUE_PROVIDERS
+
+#: Serializes lexing and parsing. The generated lexer and parser share their
+#: DFA and prediction context caches between instances, which ANTLR's Python
+#: runtime doesn't synchronize.
+ANTLR_LOCK = threading.Lock()
 
 
 class XMLTemplateParser(XMLParserListener):
@@ -43,6 +57,7 @@ class XMLTemplateParser(XMLParserListener):
         "count",
         "signature",
         "text",
+        "text-file",
         "hint",
         "padding-before",
         "padding-after",
@@ -54,37 +69,157 @@ class XMLTemplateParser(XMLParserListener):
         template: str,
         data: Optional[bytes] = None,
         binalyzer: Optional[Binalyzer] = None,
+        profile: Optional[bool] = None,
+        base_path: Optional[str] = None,
+        fragments: Optional[FragmentCache] = None,
+        includes: tuple = (),
     ):
+        if profile is None:
+            profile = is_profiling_enabled()
+
+        #: The :class:`~binalyzer_template_provider.profiling.ParseProfile` of
+        #: the parse if profiling is turned on; otherwise :const:`None`.
+        self.profile = ParseProfile() if profile else None
+
         self._input_stream = antlr4.InputStream(template.strip())
-        self._lexer = XMLLexer(self._input_stream)
-        self._common_token_stream = antlr4.CommonTokenStream(self._lexer)
-        self._parser = XMLParser(self._common_token_stream)
-        self._parse_tree = self._parser.document()
+        with ANTLR_LOCK:
+            self._lexer = XMLLexer(self._input_stream)
+            self._common_token_stream = antlr4.CommonTokenStream(self._lexer)
+            self._parser = XMLParser(self._common_token_stream)
+            if self.profile is None:
+                self._parse_tree = self._parser.document()
+            else:
+                started = time.perf_counter()
+                self._common_token_stream.fill()
+                lexed = time.perf_counter()
+                self._parse_tree = self._parser.document()
+                self.profile.add("lexing", lexed - started)
+                self.profile.add("parsing", time.perf_counter() - lexed)
+                self.profile.counts["tokens"] = len(
+                    self._common_token_stream.tokens
+                )
         self._parse_tree_walker = antlr4.ParseTreeWalker()
         self._root = None
         self._templates = []
+        self._text_encodings = []
         self._data = data
         self._binalyzer = binalyzer
 
+        #: Directory relative ``text-file`` and ``include`` paths are
+        #: resolved against, the working directory if :const:`None`
+        self.base_path = base_path
+
+        #: The :class:`~binalyzer_template_provider.fragments.FragmentCache`
+        #: of included fragments
+        self.fragments = FragmentCache() if fragments is None else fragments
+
+        #: Paths of the fragments being included, outermost first
+        self.includes = includes
+
+        #: Content hashes of the fragments included so far by path,
+        #: including the fragments they include
+        self.dependencies = {}
+
+        self._signature_tables = None
+
     def parse(self):
-        self._parse_tree_walker.walk(self, self._parse_tree)
+        if self.profile is None:
+            self._parse_tree_walker.walk(self, self._parse_tree)
+        else:
+            started = time.perf_counter()
+            self._parse_tree_walker.walk(self, self._parse_tree)
+            self.profile.add("walking", time.perf_counter() - started)
+        self._signature_tables = None
         return self._root
 
+    @property
+    def signature_tables(self):
+        """Signature tables of the runs of optional siblings of the parsed
+        template, see
+        :func:`~binalyzer_template_provider.signature.signature_tables`. They
+        are built on first access after parsing.
+        """
+        if self._signature_tables is None:
+            self._signature_tables = (
+                [] if self._root is None else signature_tables(self._root)
+            )
+        return self._signature_tables
+
+    def parse_flat(self):
+        """Returns a :class:`~binalyzer_template_provider.flat.FlatTemplate`
+        instead of a template tree.
+        """
+        builder = self._flat_template_builder()
+        self._parse_tree_walker.walk(builder, self._parse_tree)
+        return builder.table
+
     def enterElement(self, ctx):
         parent = None
         if self._templates:
             parent = self._templates[-1]
 
-        template = self._parse_attributes(Template(), parent, ctx)
+        if ctx.Name(0).getText() == INCLUDE_TAG:
+            template = self._include(ctx)
+            template.parent = parent
+        elif self.profile is None:
+            template = self._parse_attributes(Template(), parent, ctx)
+        else:
+            started = time.perf_counter()
+            template = self._parse_attributes(Template(), parent, ctx)
+            self.profile.add("attributes", time.perf_counter() - started)
+            self.profile.counts["elements"] += 1
+            self.profile.counts["attributes"] += len(ctx.attribute())
 
         if not parent:
             self._root = template
 
         self._templates.append(template)
+        self._text_encodings.append(self._parse_text_encoding_attribute(ctx))
 
     def exitElement(self, ctx):
         if self._templates:
             self._templates.pop()
+            self._text_encodings.pop()
+
+    def _include(self, ctx):
+        path, name = include_attributes(ctx, self.base_path)
+        prototype = self.fragments.fragment(
+            path, "template", self._parse_fragment, self.dependencies
+        )
+        template = instantiate(prototype)
+        if name is not None:
+            template.name = name
+        return template
+
+    def _flat_fragment(self, path):
+        return self.fragments.fragment(
+            path, "flat", self._parse_flat_fragment, self.dependencies
+        )
+
+    def _parse_fragment(self, path):
+        parser = self._fragment_parser(path)
+        return parser.parse(), parser.dependencies
+
+    def _parse_flat_fragment(self, path):
+        parser = self._fragment_parser(path)
+        return parser.parse_flat(), parser.dependencies
+
+    def _fragment_parser(self, path):
+        if path in self.includes:
+            raise RuntimeError(f"Unable to include '{path}' recursively.")
+        with open(path, "r") as fragment_file:
+            text = fragment_file.read()
+        return XMLTemplateParser(
+            text,
+            binalyzer=self._binalyzer,
+            profile=False,
+            base_path=os.path.dirname(path),
+            fragments=self.fragments,
+            includes=self.includes + (path,),
+        )
+
+    def _flat_template_builder(self):
+        return FlatTemplateBuilder(self.base_path, self._flat_fragment)
 
     def _parse_attributes(self, template, parent, ctx):
         self._parse_sizing_attribute(template, ctx)
@@ -95,16 +230,15 @@ class XMLTemplateParser(XMLParserListener):
                     fn_name = (
                         "_parse_" + attribute_name.replace("-", "_") + "_attribute"
                     )
-                    self.__class__.__dict__[fn_name](self, attribute, template, ctx)
+                    getattr(self, fn_name)(attribute, template, ctx)
 
         template.parent = parent
         return template
 
     def enterText(self, ctx):
-        hex_str = ctx.children[0].children[0].symbol.text.strip()
-        hex_str = ''.join(hex_str.split())
-        if hex_str:
-            self._templates[-1].text = bytes.fromhex(hex_str)
+        text = "".join(ctx.children[0].children[0].symbol.text.split())
+        if text:
+            self._templates[-1].text = decode_text(text, self._text_encodings[-1])
 
     def _parse_name_attribute(self, attribute, template, ctx):
         if attribute.binding() is not None:
@@ -122,6 +256,24 @@ class XMLTemplateParser(XMLParserListener):
     def _parse_text_attribute(self, attribute, template, ctx):
         template.text = self._parse_text_attribute_value(attribute, template)
 
+    def _parse_text_file_attribute(self, attribute, template, ctx):
+        if attribute.binding() is not None:
+            raise RuntimeError(
+                "Using a reference for a text-file attribute is not allowed."
+            )
+        template.text = text_file_blob(
+            attribute.value().getText()[1:-1], ctx, self.base_path
+        )
+
+    def _parse_text_encoding_attribute(self, ctx):
+        for attribute in ctx.attribute():
+            if attribute.Name().getText() == "text-encoding":
+                encoding = attribute.value().getText()[1:-1]
+                if encoding not in TEXT_ENCODINGS:
+                    raise RuntimeError("Expected 'hex' or 'base64'.")
+                return encoding
+        return DEFAULT_TEXT_ENCODING
+
     def _parse_hint_attribute(self, attribute, template, ctx):
         template.hint_property = self._parse_hint_attribute_value(attribute, template)
 
@@ -202,6 +354,8 @@ class XMLTemplateParser(XMLParserListener):
             return ValueProperty(value, template=template)
 
         if attribute.binding() is not None:
+            if self.profile is not None:
+                self.profile.counts["bindings"] += 1
             return self._parse_attribute_value_reference(attribute, template)
 
         return ValueProperty()
@@ -230,6 +384,13 @@ class XMLTemplateParser(XMLParserListener):
 
         if reference_name:
             ref_property = ReferenceProperty(template, reference_name)
+            if not extension_name:
+                if byteorder not in TEMPLATE_VALUE_PROVIDERS:
+                    raise RuntimeError("Expected 'little' or 'big'.")
+                ref_property.value_provider = TEMPLATE_VALUE_PROVIDERS[byteorder](
+                    ref_property
+                )
+                return ref_property
             ref_property.value_provider = self._get_custom_value_provider(
                 extension_name, provider_name, ref_property
             )
@@ -246,5 +407,15 @@ class XMLTemplateParser(XMLParserListener):
     def _get_custom_value_provider(self, extension_name, provider_name, property):
         if not extension_name:
             return property.value_provider
+        property.provider_name = extension_name + "." + provider_name
+        if self.profile is None:
+            extension = self._binalyzer.extension(extension_name)
+            return extension.__class__.__dict__[provider_name](extension, property)
+        started = time.perf_counter()
         extension = self._binalyzer.extension(extension_name)
-        return extension.__class__.__dict__[provider_name](extension, property)
+        value_provider = extension.__class__.__dict__[provider_name](
+            extension, property
+        )
+        self.profile.add("providers", time.perf_counter() - started)
+        self.profile.counts["providers"] += 1
+        return value_provider
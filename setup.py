@@ -36,5 +36,8 @@ setuptools.setup(
         "anytree>=2.8.0",
         "requests>=2.25.1"
     ],
+    extras_require={
+        "numpy": ["numpy>=1.17"],
+    },
     entry_points={},
 )
@@ -0,0 +1,164 @@
+"""
+    test_arrays
+    ~~~~~~~~~~~
+
+    This module implements tests for reading counted templates as arrays.
+"""
+import pytest
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension
+from binalyzer_template_provider import arrays
+from binalyzer_template_provider.arrays import read_array
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    return binalyzer
+
+
+@pytest.fixture
+def without_numpy(monkeypatch):
+    monkeypatch.setattr(arrays, "numpy", None)
+
+
+def test_read_array_of_bytes(binalyzer):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <field name="num_params" size="1"></field>
+            <field name="params">
+                <field name="param" count="{num_params}" size="1"></field>
+            </field>
+        </template>
+        """,
+        bytes([0x03, 0x7F, 0x7E, 0x7D]),
+    )
+
+    values = read_array(binalyzer.template.params.param)
+
+    assert list(values) == [0x7F, 0x7E, 0x7D]
+
+
+def test_read_array_big_endian(binalyzer):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <field name="sample" count="2" size="2"></field>
+        </template>
+        """,
+        bytes([0x01, 0x02, 0x03, 0x04]),
+    )
+
+    values = read_array(binalyzer.template.sample, byteorder="big")
+
+    assert list(values) == [0x0102, 0x0304]
+
+
+@pytest.mark.skipif(arrays.numpy is None, reason="requires NumPy")
+def test_read_array_of_records(binalyzer):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <record name="record" count="2" padding-after="1">
+                <field name="id" size="1"></field>
+                <field name="value" size="2"></field>
+            </record>
+        </template>
+        """,
+        bytes([0x01, 0x02, 0x00, 0xFF, 0x03, 0x04, 0x00, 0xFF]),
+    )
+
+    records = read_array(binalyzer.template.record)
+
+    assert list(records["id"]) == [0x01, 0x03]
+    assert list(records["value"]) == [0x02, 0x04]
+
+
+def test_read_array_shares_memory(binalyzer):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <field name="sample" count="2" size="1"></field>
+        </template>
+        """,
+        bytes([0x01, 0x02]),
+    )
+    values = read_array(binalyzer.template.sample)
+
+    binalyzer.data.getbuffer()[1] = 0x05
+
+    assert list(values) == [0x01, 0x05]
+
+
+def test_read_array_without_numpy(binalyzer, without_numpy):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <field name="sample" count="2" size="2"></field>
+        </template>
+        """,
+        bytes([0x01, 0x02, 0x03, 0x04]),
+    )
+
+    little = read_array(binalyzer.template.sample, byteorder="little")
+    big = read_array(binalyzer.template.sample, byteorder="big")
+
+    assert list(little) == [0x0201, 0x0403]
+    assert list(big) == [0x0102, 0x0304]
+
+
+def test_read_array_of_records_without_numpy(binalyzer, without_numpy):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <record name="record" count="2">
+                <field name="id" size="1"></field>
+                <field name="value" size="1"></field>
+            </record>
+        </template>
+        """,
+        bytes([0x01, 0x02, 0x03, 0x04]),
+    )
+
+    records = read_array(binalyzer.template.record)
+
+    assert records.tolist() == [[0x01, 0x02], [0x03, 0x04]]
+
+
+def test_read_array_of_strided_records_without_numpy(binalyzer, without_numpy):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <record name="record" count="2" padding-before="1">
+                <field name="id" size="1"></field>
+                <field name="value" size="1"></field>
+            </record>
+        </template>
+        """,
+        bytes([0x00, 0x01, 0x02, 0x00, 0x03, 0x04]),
+    )
+
+    records = read_array(binalyzer.template.record)
+
+    assert records.tolist() == [[0x01, 0x02], [0x03, 0x04]]
+
+
+def test_read_array_with_dynamic_layout(binalyzer):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <record name="record" count="2">
+                <field name="length" size="1"></field>
+                <field name="data" size="{length}"></field>
+            </record>
+        </template>
+        """,
+        bytes([0x01, 0x02, 0x01, 0x04]),
+    )
+
+    with pytest.raises(RuntimeError) as excinfo:
+        read_array(binalyzer.template.record)
+    assert "Layout of 'data' is not static" in str(excinfo.value)
@@ -0,0 +1,151 @@
+"""
+    test_carving
+    ~~~~~~~~~~~~
+
+    This module implements tests for carving templates out of binary data.
+"""
+import os
+import pytest
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension, XMLTemplateParser
+from binalyzer_template_provider.carving import (
+    HeaderSignature,
+    SignatureCarver,
+    carve_file,
+    header_signatures,
+)
+from binalyzer_wasm import WebAssemblyExtension
+
+RESOURCES_PATH = os.path.join(os.path.dirname(__file__), "resources")
+
+
+@pytest.fixture
+def wasm_template():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    WebAssemblyExtension(binalyzer)
+    template_path = os.path.join(RESOURCES_PATH, "wasm_module_format.xml")
+    with open(template_path, "r") as template_file:
+        return XMLTemplateParser(template_file.read(), binalyzer=binalyzer).parse()
+
+
+@pytest.fixture
+def wasm_module():
+    with open(os.path.join(RESOURCES_PATH, "wasm_module.wasm"), "rb") as data_file:
+        return data_file.read()
+
+
+def test_header_signatures(wasm_template):
+    assert header_signatures(wasm_template) == [
+        HeaderSignature(0, bytes([0x00, 0x61, 0x73, 0x6D])),
+        HeaderSignature(4, bytes([0x01, 0x00, 0x00, 0x00])),
+    ]
+
+
+def test_header_signatures_with_padding_and_boundary():
+    template = XMLTemplateParser(
+        """
+        <template>
+            <field name="a" size="1"></field>
+            <field name="b" size="2" signature="0xAABB" padding-before="1"></field>
+            <field name="c" size="1" signature="0xCC" boundary="4"></field>
+            <field name="length" size="1"></field>
+            <field name="data" size="{length}"></field>
+            <field name="d" size="1" signature="0xDD"></field>
+        </template>
+        """
+    ).parse()
+
+    assert header_signatures(template) == [
+        HeaderSignature(2, bytes([0xAA, 0xBB])),
+        HeaderSignature(4, bytes([0xCC])),
+    ]
+
+
+def test_carve_wasm_modules(wasm_template, wasm_module, tmp_path):
+    fake = bytes([0x00, 0x61, 0x73, 0x6D, 0x02, 0x00, 0x00, 0x00])
+    data = bytes(13) + wasm_module + fake + bytes(3) + wasm_module
+    data_path = tmp_path / "image.bin"
+    data_path.write_bytes(data)
+
+    hits = carve_file([wasm_template], str(data_path))
+
+    assert [hit.offset for hit in hits] == [
+        13,
+        13 + len(wasm_module) + len(fake) + 3,
+    ]
+    assert all(hit.template is wasm_template for hit in hits)
+
+
+def test_carve_multiple_templates():
+    first = XMLTemplateParser(
+        """
+        <template name="first">
+            <field name="magic" size="2" signature="0xCAFE"></field>
+        </template>
+        """
+    ).parse()
+    second = XMLTemplateParser(
+        """
+        <template name="second">
+            <field name="magic" size="3" signature="0xCAFEBA"></field>
+            <field name="version" size="1" signature="0x01"></field>
+        </template>
+        """
+    ).parse()
+    carver = SignatureCarver([first, second])
+    data = bytes([0xCA, 0xFE, 0xBA, 0x01, 0xCA, 0xFE, 0xBA, 0x02, 0xCA, 0xCA, 0xFE])
+
+    hits = [(hit.offset, hit.template.name) for hit in carver.scan(data)]
+
+    assert hits == [(0, "first"), (0, "second"), (4, "first"), (9, "first")]
+    assert [hit.offset for hit in carver.scan(data, start=1, end=9)] == [4]
+
+
+def test_carve_signature_crossing_end():
+    template = XMLTemplateParser(
+        """
+        <template name="magic">
+            <field name="magic" size="2" signature="0xCAFE"></field>
+        </template>
+        """
+    ).parse()
+    carver = SignatureCarver([template])
+    data = bytes([0x00, 0xCA, 0xFE, 0x00])
+
+    assert [hit.offset for hit in carver.scan(data, 0, 2)] == [1]
+    assert [hit.offset for hit in carver.scan(data, 2, 4)] == []
+
+
+def test_carve_without_signature():
+    template = XMLTemplateParser(
+        """
+        <template>
+            <field name="data" size="1"></field>
+        </template>
+        """
+    ).parse()
+
+    with pytest.raises(RuntimeError) as excinfo:
+        SignatureCarver([template])
+    assert "no signature at a static offset" in str(excinfo.value)
+
+
+def test_carve_file_parallel(wasm_template, wasm_module, tmp_path):
+    offsets = [0, 61, 200 + len(wasm_module)]
+    data = bytearray(offsets[-1] + len(wasm_module) + 5)
+    for offset in offsets:
+        data[offset : offset + len(wasm_module)] = wasm_module
+    data_path = tmp_path / "image.bin"
+    data_path.write_bytes(bytes(data))
+    carver = SignatureCarver([wasm_template])
+
+    report = carver.scan_file_parallel(str(data_path), processes=2, chunk_size=63)
+
+    assert [hit.offset for hit in report.hits] == offsets
+    assert [hit.offset for hit in report.hits] == [
+        hit.offset for hit in carver.scan_file(str(data_path))
+    ]
+    assert report.size == len(data)
+    assert report.throughput > 0
@@ -0,0 +1,165 @@
+"""
+    test_compiler
+    ~~~~~~~~~~~~~
+
+    This module implements tests for compiling templates to Python modules.
+"""
+import os
+import pytest
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension
+from binalyzer_template_provider import compiler
+from binalyzer_template_provider.compiler import TemplateCompiler
+from binalyzer_wasm import WebAssemblyExtension
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    WebAssemblyExtension(binalyzer)
+    return binalyzer
+
+
+@pytest.fixture
+def template_compiler(binalyzer, tmp_path):
+    return TemplateCompiler(binalyzer, cache_dir=str(tmp_path))
+
+
+def test_compile_static_template(template_compiler):
+    compiled = template_compiler.compile_str(
+        """
+        <template>
+            <field name="magic" size="2" signature="0xCAFE"></field>
+            <field name="aligned" size="1" boundary="4"></field>
+            <field name="padded" size="1" padding-before="1" padding-after="1"></field>
+            <field name="last" size="1"></field>
+        </template>
+        """
+    )
+
+    result = compiled.decode(bytes([0xCA, 0xFE, 0, 0, 0x01, 0, 0x02, 0, 0x03]))
+
+    assert result == {
+        "magic": bytes([0xCA, 0xFE]),
+        "aligned": bytes([0x01]),
+        "padded": bytes([0x02]),
+        "last": bytes([0x03]),
+    }
+
+
+def test_compile_references_and_count(template_compiler):
+    compiled = template_compiler.compile_str(
+        """
+        <template>
+            <field name="num" size="1"></field>
+            <record name="record" count="{num}">
+                <field name="length" size="2"></field>
+                <field name="data" size="{length, byteorder=big}"></field>
+            </record>
+        </template>
+        """
+    )
+
+    result = compiled.decode(bytes([0x02, 0x00, 0x01, 0xAA, 0x00, 0x02, 0xBB, 0xCC]))
+
+    assert result["num"] == bytes([0x02])
+    assert [record["data"] for record in result["record"]] == [
+        bytes([0xAA]),
+        bytes([0xBB, 0xCC]),
+    ]
+
+
+def test_compile_optional_signatures(template_compiler):
+    compiled = template_compiler.compile_str(
+        """
+        <template>
+            <section name="first" size="2" signature="0x01" hint="optional"></section>
+            <section name="second" size="2" signature="0x02" hint="optional"></section>
+            <section name="rest" sizing="stretch"></section>
+        </template>
+        """
+    )
+
+    result = compiled.decode(bytes([0x02, 0x00, 0x03]))
+
+    assert "first" not in result
+    assert result["second"] == bytes([0x02, 0x00])
+    assert result["rest"] == bytes([0x03])
+
+
+def test_compile_signature_mismatch(template_compiler):
+    compiled = template_compiler.compile_str(
+        """
+        <template>
+            <field name="magic" size="1" signature="0x01"></field>
+        </template>
+        """
+    )
+
+    with pytest.raises(RuntimeError) as excinfo:
+        compiled.decode(bytes([0x02]))
+    assert "Signature validation failed for 'magic'." in str(excinfo.value)
+
+
+def test_compile_other_hint(template_compiler):
+    compiled = template_compiler.compile_str(
+        """
+        <template>
+            <field name="magic" size="1" signature="0x01" hint="other"></field>
+        </template>
+        """
+    )
+
+    assert "magic" not in compiled.decode(bytes([0x02]))
+
+
+def test_compile_forward_reference(template_compiler):
+    with pytest.raises(RuntimeError) as excinfo:
+        template_compiler.compile_str(
+            """
+            <template>
+                <field name="data" size="{length}"></field>
+                <field name="length" size="1"></field>
+            </template>
+            """
+        )
+    assert "forward reference to 'length'" in str(excinfo.value)
+
+
+def test_compile_uses_cache(template_compiler, monkeypatch):
+    text = """
+        <template>
+            <field name="value" size="1"></field>
+        </template>
+    """
+    template_compiler.compile_str(text)
+    monkeypatch.setattr(compiler, "XMLTemplateParser", None)
+
+    compiled = template_compiler.compile_str(text)
+
+    assert compiled.decode(bytes([0x2A])) == {"value": bytes([0x2A])}
+    assert len(os.listdir(template_compiler.cache_dir)) >= 1
+
+
+def test_compile_wasm_module(binalyzer, template_compiler):
+    resources_path = os.path.join(os.path.dirname(__file__), "resources")
+    template_path = os.path.join(resources_path, "wasm_module_format.xml")
+    data_path = os.path.join(resources_path, "wasm_module.wasm")
+    with open(data_path, "rb") as data_file:
+        data = data_file.read()
+    binalyzer.xml.from_file(template_path, data_path)
+
+    compiled = template_compiler.compile_file(template_path)
+    result = compiled.decode(data)
+
+    template = binalyzer.template
+    code = result["code-section"]["code"]
+    assert result["magic"] == template.magic.value
+    assert result["version"] == template.version.value
+    assert result["type-section"]["data"]["type"][0]["func_type"] == bytes([0x60])
+    assert (
+        code["function"][0]["func_body"]["instructions"]
+        == template.code_section.code.function.func_body.instructions.value
+    )
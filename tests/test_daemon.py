@@ -0,0 +1,92 @@
+"""
+    test_daemon
+    ~~~~~~~~~~~
+
+    This module implements tests for the dissection server and its client.
+"""
+import json
+import os
+import stat
+import threading
+
+import pytest
+
+from binalyzer_template_provider import client, daemon
+from binalyzer_template_provider.client import DissectionClient
+from binalyzer_template_provider.daemon import DissectionServer
+from binalyzer_template_provider.utils import template_hash
+
+TEMPLATE = """
+<template name="root">
+    <field name="length" size="1"></field>
+    <field name="payload" size="{length}"></field>
+</template>
+"""
+
+
+@pytest.fixture
+def paths(tmp_path):
+    template_path = tmp_path / "template.xml"
+    template_path.write_text(TEMPLATE)
+    data_path = tmp_path / "data.bin"
+    data_path.write_bytes(b"\x03abc")
+    return str(template_path), str(data_path)
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = DissectionServer(str(tmp_path / "daemon.sock"), {"length": TEMPLATE})
+    thread = threading.Thread(target=server.serve)
+    thread.start()
+    yield server
+    with DissectionClient(server.server_address, timeout=10) as connection:
+        connection.shutdown()
+    thread.join(10)
+    server.server_close()
+
+
+def test_dissect(server, paths):
+    with DissectionClient(server.server_address, timeout=10) as connection:
+        connection.ping()
+        fields = connection.dissect("length", paths[1])
+        assert fields == [("", 0, 4), ("length", 0, 1), ("payload", 1, 3)]
+        assert connection.dissect("length", paths[1]) == fields
+    assert server.layout_caches["length"].hits == 1
+
+
+def test_register(server, paths):
+    with DissectionClient(server.server_address, timeout=10) as connection:
+        template_id = connection.register(TEMPLATE)
+        assert template_id == template_hash(TEMPLATE)
+        assert connection.register(TEMPLATE, "other") == "other"
+        assert connection.dissect("other", paths[1])[-1] == ("payload", 1, 3)
+
+
+def test_errors(server, paths):
+    with DissectionClient(server.server_address, timeout=10) as connection:
+        with pytest.raises(RuntimeError):
+            connection.dissect("missing", paths[1])
+        with pytest.raises(RuntimeError):
+            connection.request({"method": "unknown"})
+        with pytest.raises(RuntimeError):
+            connection.dissect("length", paths[1] + ".missing")
+        connection.ping()
+
+
+def test_command_line(server, paths, capsys):
+    assert client.main([server.server_address, "dissect", "length", paths[1]]) == 0
+    served = json.loads(capsys.readouterr().out)
+    assert daemon.main(["dissect", paths[0], paths[1]]) == 0
+    assert json.loads(capsys.readouterr().out) == served
+
+
+def test_socket_permissions(server):
+    assert stat.S_IMODE(os.stat(server.server_address).st_mode) == 0o600
+
+
+def test_keep_existing_file(tmp_path):
+    path = tmp_path / "daemon.sock"
+    path.write_text("data")
+    with pytest.raises(RuntimeError):
+        DissectionServer(str(path))
+    assert path.read_text() == "data"
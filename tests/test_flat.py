@@ -0,0 +1,111 @@
+"""
+    test_flat
+    ~~~~~~~~~
+
+    This module implements tests for the flat template representation.
+"""
+import pytest
+
+from binalyzer_template_provider import XMLTemplateParser
+from binalyzer_template_provider.flat import (
+    ABSOLUTE,
+    AUTO,
+    FIX,
+    NONE,
+    STRETCH,
+    Binding,
+)
+from binalyzer_template_provider.memory import measure, measure_template_memory
+
+TEMPLATE = """
+<template name="root">
+    <header name="header">
+        <field name="magic" size="2" signature="0xCAFE"></field>
+        <field name="length" size="1"></field>
+    </header>
+    <field name="data-block" size="{length, byteorder=big}" padding-after="2">0102</field>
+    <field name="leb" size="{provider=wasm.leb128size}" offset="0x10"
+           addressing-mode="absolute" hint="optional"></field>
+    <field name="rest" sizing="stretch" boundary="4" count="3"></field>
+</template>
+"""
+
+
+@pytest.fixture
+def flat():
+    return XMLTemplateParser(TEMPLATE).parse_flat()
+
+
+def test_flat_structure(flat):
+    root = flat.root
+
+    assert len(flat) == 7
+    assert list(flat.parent) == [NONE, 0, 1, 1, 0, 0, 0]
+    assert root.name == "root"
+    assert [child.name for child in root.children] == [
+        "header",
+        "data-block",
+        "leb",
+        "rest",
+    ]
+    assert root.header.magic.parent == root.header
+    assert root.header.magic.tag == "field"
+    assert root.data_block.name == "data-block"
+    with pytest.raises(AttributeError):
+        root.missing
+
+
+def test_flat_attributes(flat):
+    root = flat.root
+
+    assert root.sizing == AUTO
+    assert root.size is None
+    assert root.header.magic.sizing == FIX
+    assert root.header.magic.size == 2
+    assert root.header.magic.signature == bytes([0xCA, 0xFE])
+    assert root.data_block.size is None
+    assert root.data_block.binding("size") == Binding("length", "big", None)
+    assert root.data_block.padding_after == 2
+    assert root.data_block.text == bytes([0x01, 0x02])
+    assert root.leb.binding("size") == Binding(None, "little", "wasm.leb128size")
+    assert root.leb.offset == 0x10
+    assert root.leb.addressing == ABSOLUTE
+    assert root.leb.hint == "optional"
+    assert root.rest.sizing == STRETCH
+    assert root.rest.boundary == 4
+    assert root.rest.count == 3
+
+
+def test_flat_to_numpy(flat):
+    numpy = pytest.importorskip("numpy")
+
+    columns = flat.to_numpy()
+
+    assert columns["parent"].dtype == numpy.dtype("i")
+    assert columns["count"].tolist() == [1, 1, 1, 1, 1, 1, 3]
+
+
+def test_flat_memory():
+    fields = []
+    for i in range(500):
+        size = "{f" + str(i - 1) + "}" if i % 2 else "1"
+        fields.append(f'<field name="f{i}" size="{size}"></field>')
+    text = "<template><section>" + "".join(fields) + "</section></template>"
+    parser = XMLTemplateParser(text)
+
+    flat_report = measure(parser.parse_flat)
+    report = measure_template_memory(text)
+
+    assert flat_report.nodes == report.nodes
+    assert flat_report.total * 5 < report.total
+
+
+@pytest.mark.parametrize("attribute", ["signature", "text"])
+def test_flat_bound_blob(attribute):
+    parser = XMLTemplateParser(
+        f'<template><field name="a" size="1"></field>'
+        f'<field {attribute}="{{a}}"></field></template>'
+    )
+    with pytest.raises(RuntimeError) as excinfo:
+        parser.parse_flat()
+    assert f"reference for a {attribute} attribute" in str(excinfo.value)
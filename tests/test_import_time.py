@@ -0,0 +1,77 @@
+"""
+    test_import_time
+    ~~~~~~~~~~~~~~~~
+
+    This module implements tests for the modules imported on start-up of the
+    package, which are listed with ``python -X importtime`` in a fresh
+    interpreter.
+"""
+import subprocess
+import sys
+
+#: Modules imported on first use instead of on start-up
+DEFERRED_MODULES = ("antlr4", "requests", "urllib3", "numpy")
+
+
+def import_time(statement):
+    """Runs a statement in a fresh interpreter and returns the imported
+    modules.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    modules = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, _, name = line[len("import time:") :].split("|")
+        modules.add(name.strip())
+    return modules
+
+
+def deferred(modules):
+    return {
+        module
+        for module in modules
+        for prefix in DEFERRED_MODULES
+        if module == prefix or module.startswith(prefix + ".")
+    }
+
+
+def test_package_import():
+    modules = import_time("import binalyzer_template_provider")
+    assert not deferred(modules)
+    assert "binalyzer_template_provider.xml" not in modules
+
+
+def test_extension_import():
+    modules = import_time(
+        "from binalyzer_template_provider import XMLTemplateProviderExtension"
+    )
+    assert not deferred(modules)
+
+
+def test_first_use_imports_parser():
+    modules = import_time(
+        "import binalyzer_template_provider as provider\n"
+        "from binalyzer_core import Binalyzer\n"
+        "binalyzer = Binalyzer()\n"
+        "provider.XMLTemplateProviderExtension(binalyzer)\n"
+        "binalyzer.xml.from_str('<template></template>')\n"
+        "assert provider.XMLTemplateParser\n"
+    )
+    assert "antlr4" in modules
+
+
+def test_deferred_modules_not_registered():
+    modules = import_time(
+        "import sys\n"
+        "import binalyzer_template_provider\n"
+        "from binalyzer_template_provider import extension\n"
+        "assert not {module for module in %r if module in sys.modules}\n"
+        % (DEFERRED_MODULES,)
+    )
+    assert not deferred(modules)
@@ -0,0 +1,217 @@
+"""
+    test_include
+    ~~~~~~~~~~~~
+
+    This module implements tests for including template fragments.
+"""
+import io
+import os
+
+import pytest
+
+from anytree import PreOrderIter
+from binalyzer_core import Binalyzer
+
+from binalyzer_template_provider import XMLTemplateParser, XMLTemplateProviderExtension
+from binalyzer_template_provider.fragments import FragmentCache
+from binalyzer_template_provider.streaming import StreamingXMLTemplateParser
+
+SECTION = """
+<section name="section">
+    <field name="length" size="1"></field>
+    <field name="payload" size="{length}"></field>
+</section>
+"""
+
+TEMPLATE = """
+<template name="root">
+    <field name="magic" size="2"></field>
+    <include href="fragments/section.xml" name="first"/>
+    <include href="fragments/section.xml" name="second"/>
+</template>
+"""
+
+INLINE_TEMPLATE = """
+<template name="root">
+    <field name="magic" size="2"></field>
+    <section name="first">
+        <field name="length" size="1"></field>
+        <field name="payload" size="{length}"></field>
+    </section>
+    <section name="second">
+        <field name="length" size="1"></field>
+        <field name="payload" size="{length}"></field>
+    </section>
+</template>
+"""
+
+DATA = bytes([0xCA, 0xFE, 0x02, 0x01, 0x02, 0x01, 0x03])
+
+
+@pytest.fixture
+def base_path(tmp_path):
+    (tmp_path / "fragments").mkdir()
+    (tmp_path / "fragments" / "section.xml").write_text(SECTION)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    return binalyzer
+
+
+def layout(template):
+    return [
+        (node.name, node.absolute_address, node.size) for node in PreOrderIter(template)
+    ]
+
+
+def flat_rows(flat):
+    return [
+        (
+            flat.string(flat.name[index]),
+            flat.parent[index],
+            flat.first_child[index],
+            flat.next_sibling[index],
+            flat.binding(flat.size_binding[index]),
+        )
+        for index in range(len(flat))
+    ]
+
+
+def test_include(base_path):
+    fragments = FragmentCache()
+    template = XMLTemplateParser(
+        TEMPLATE, base_path=base_path, fragments=fragments
+    ).parse()
+    assert [child.name for child in template.children] == ["magic", "first", "second"]
+    assert template.children[1] is not template.children[2]
+    assert template.children[1].children[1].parent is template.children[1]
+    assert fragments.misses == 1
+    assert fragments.hits == 1
+
+
+def test_include_binding(binalyzer, base_path):
+    template_path = os.path.join(base_path, "template.xml")
+    with open(template_path, "w") as template_file:
+        template_file.write(TEMPLATE)
+    data_path = os.path.join(base_path, "data.bin")
+    with open(data_path, "wb") as data_file:
+        data_file.write(DATA)
+
+    binalyzer.xml.from_file(template_path, data_path)
+    included = layout(binalyzer.template)
+    binalyzer.xml.from_str(INLINE_TEMPLATE, DATA)
+
+    assert included == layout(binalyzer.template)
+    binalyzer.xml.from_file(template_path, data_path)
+    assert binalyzer.xml.fragments.misses == 1
+
+
+def test_include_flat(base_path):
+    flat = XMLTemplateParser(TEMPLATE, base_path=base_path).parse_flat()
+    expected = XMLTemplateParser(INLINE_TEMPLATE).parse_flat()
+    assert flat_rows(flat) == flat_rows(expected)
+
+
+def test_include_streaming(base_path):
+    expected = XMLTemplateParser(INLINE_TEMPLATE).parse()
+    template = StreamingXMLTemplateParser(
+        io.StringIO(TEMPLATE), base_path=base_path
+    ).parse()
+    assert [node.name for node in PreOrderIter(template)] == [
+        node.name for node in PreOrderIter(expected)
+    ]
+
+
+def test_nested_include(base_path):
+    fragments_path = os.path.join(base_path, "fragments")
+    with open(os.path.join(fragments_path, "pair.xml"), "w") as fragment_file:
+        fragment_file.write(
+            '<pair><include href="section.xml"/><include href="section.xml"/></pair>'
+        )
+    template = XMLTemplateParser(
+        '<template><include href="fragments/pair.xml"/></template>',
+        base_path=base_path,
+    ).parse()
+    assert [child.name for child in template.children[0].children] == [
+        "section",
+        "section",
+    ]
+
+
+def test_recursive_include(base_path):
+    with open(os.path.join(base_path, "loop.xml"), "w") as fragment_file:
+        fragment_file.write('<loop><include href="loop.xml"/></loop>')
+    with pytest.raises(RuntimeError):
+        XMLTemplateParser(
+            '<template><include href="loop.xml"/></template>', base_path=base_path
+        ).parse()
+
+
+def test_missing_href():
+    with pytest.raises(RuntimeError):
+        XMLTemplateParser('<template><include name="a"/></template>').parse()
+
+
+def test_changed_fragment(base_path):
+    fragments = FragmentCache()
+
+    def parse():
+        return XMLTemplateParser(
+            TEMPLATE, base_path=base_path, fragments=fragments
+        ).parse()
+
+    parse()
+    path = os.path.join(base_path, "fragments", "section.xml")
+    with open(path, "w") as fragment_file:
+        fragment_file.write('<section name="section"></section>')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    template = parse()
+
+    assert not template.children[1].children
+    assert fragments.misses == 2
+    assert len(fragments) == 1
+
+
+def test_changed_nested_fragment(base_path):
+    fragments = FragmentCache()
+    fragments_path = os.path.join(base_path, "fragments")
+    with open(os.path.join(fragments_path, "pair.xml"), "w") as fragment_file:
+        fragment_file.write('<pair><include href="section.xml"/></pair>')
+
+    def parse():
+        return XMLTemplateParser(
+            '<template><include href="fragments/pair.xml"/></template>',
+            base_path=base_path,
+            fragments=fragments,
+        ).parse()
+
+    parse()
+    path = os.path.join(fragments_path, "section.xml")
+    with open(path, "w") as fragment_file:
+        fragment_file.write('<section name="section"></section>')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    template = parse()
+
+    assert not template.children[0].children[0].children
+
+
+def test_session_changed_fragment(binalyzer, base_path, monkeypatch):
+    monkeypatch.chdir(base_path)
+    binalyzer.xml.session(TEMPLATE)
+    path = os.path.join(base_path, "fragments", "section.xml")
+    with open(path, "w") as fragment_file:
+        fragment_file.write('<section name="section"></section>')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    session = binalyzer.xml.session(TEMPLATE)
+
+    assert not session.template.children[1].children
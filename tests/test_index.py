@@ -0,0 +1,150 @@
+"""
+    test_index
+    ~~~~~~~~~~
+
+    This module implements tests for the sidecar index of resolved templates.
+"""
+import os
+
+import pytest
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension
+from binalyzer_template_provider.data_provider import MappedFileDataProvider
+from binalyzer_template_provider.index import (
+    FieldIndex,
+    index_key,
+    load_index,
+    sidecar_path,
+)
+
+TEMPLATE = """
+<template name="root">
+    <field name="length" size="1"></field>
+    <field name="payload" size="{length}"></field>
+    <records name="records" count="2">
+        <field name="value" size="2"></field>
+    </records>
+</template>
+"""
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    return binalyzer
+
+
+@pytest.fixture
+def paths(tmp_path):
+    template_path = tmp_path / "template.xml"
+    template_path.write_text(TEMPLATE)
+    data_path = tmp_path / "data.bin"
+    data_path.write_bytes(b"\x03abc\x01\x00\x02\x00")
+    return str(template_path), str(data_path)
+
+
+def test_build_index(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, index=True)
+    index = binalyzer.xml.index
+    assert os.path.exists(sidecar_path(paths[1]))
+    assert index[""] == (0, 8)
+    assert index["payload"] == (1, 3)
+    assert index.absolute_address("records-1.value") == 6
+    assert index.size("records-1.value") == 2
+
+
+def test_reload_index(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, index=True)
+    index = FieldIndex.load(sidecar_path(paths[1]))
+    assert index.key == binalyzer.xml.index.key
+    assert index.paths == binalyzer.xml.index.paths
+    assert list(index.addresses) == list(binalyzer.xml.index.addresses)
+    assert list(index.sizes) == list(binalyzer.xml.index.sizes)
+
+    os.utime(sidecar_path(paths[1]), ns=(0, 0))
+    other = Binalyzer()
+    XMLTemplateProviderExtension(other)
+    other.xml.from_file(*paths, index=True)
+    assert os.stat(sidecar_path(paths[1])).st_mtime_ns == 0
+    assert other.xml.index.paths == index.paths
+    assert other.xml.locate("payload") == (1, 3)
+
+
+def test_stale_index(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, index=True)
+    key = binalyzer.xml.index.key
+    with open(paths[1], "wb") as data_file:
+        data_file.write(b"\x02ab\x01\x00\x02\x00")
+    assert load_index(paths[1], index_key(TEMPLATE, paths[1])) is None
+    binalyzer.xml.from_file(*paths, index=True)
+    assert binalyzer.xml.index.key != key
+    assert binalyzer.xml.locate("payload") == (1, 2)
+
+
+def test_invalid_index(binalyzer, paths):
+    with open(sidecar_path(paths[1]), "wb") as index_file:
+        index_file.write(b"invalid")
+    assert load_index(paths[1], index_key(TEMPLATE, paths[1])) is None
+    binalyzer.xml.from_file(*paths, index=True)
+    assert binalyzer.xml.locate("payload") == (1, 3)
+
+
+def test_locate_without_index(binalyzer, paths):
+    binalyzer.xml.from_file(*paths)
+    assert binalyzer.xml.index is None
+    assert binalyzer.xml.locate("records-0.value") == (4, 2)
+    with pytest.raises(RuntimeError):
+        binalyzer.xml.locate("missing")
+
+
+def test_index_maps_data_file(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, index=True)
+    assert isinstance(binalyzer.data_provider, MappedFileDataProvider)
+    binalyzer.template.payload.value = b"xyz"
+    assert binalyzer.template.payload.value == b"xyz"
+    binalyzer.data_provider.close()
+    with open(paths[1], "rb") as data_file:
+        assert data_file.read(4) == b"\x03abc"
+
+
+def test_unnamed_siblings(binalyzer, tmp_path):
+    template_path = tmp_path / "unnamed.xml"
+    template_path.write_text(
+        """
+        <template>
+            <field size="1"></field>
+            <section>
+                <field name="value" size="2"></field>
+            </section>
+        </template>
+        """
+    )
+    data_path = tmp_path / "unnamed.bin"
+    data_path.write_bytes(b"\x01\x02\x03")
+    binalyzer.xml.from_file(str(template_path), str(data_path), index=True)
+    index = binalyzer.xml.index
+    assert index.paths == ["", "0", "1", "1.value"]
+    assert index["1.value"] == (1, 2)
+    binalyzer.xml.index = None
+    assert binalyzer.xml.locate("1.value") == (1, 2)
+
+
+def test_index_short_data_file(binalyzer, paths):
+    with open(paths[1], "wb") as data_file:
+        data_file.write(b"\x03abc")
+    binalyzer.xml.from_file(*paths, index=True)
+    assert binalyzer.xml.locate("records-1.value") == (6, 2)
+    assert binalyzer.template.size == 8
+    assert binalyzer.data.getvalue()[4:] == bytes(4)
+
+
+def test_index_read_only_directory(binalyzer, paths, monkeypatch):
+    def save(self, path):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(FieldIndex, "save", save)
+    binalyzer.xml.from_file(*paths, index=True)
+    assert binalyzer.xml.index is None
+    assert binalyzer.xml.locate("payload") == (1, 3)
@@ -0,0 +1,178 @@
+"""
+    test_layout
+    ~~~~~~~~~~~
+
+    This module implements tests for the export of static template layouts.
+"""
+import pytest
+
+from binalyzer_template_provider import XMLTemplateParser
+from binalyzer_template_provider.layout import static_layout, to_dtype, to_struct
+
+
+def test_static_layout_fields():
+    template = XMLTemplateParser(
+        """
+        <template>
+            <header name="header">
+                <field name="magic" size="4"></field>
+                <field name="version" size="2" padding-before="2"></field>
+            </header>
+            <field name="value" size="4" boundary="8"></field>
+        </template>
+        """
+    ).parse()
+
+    layout = static_layout(template)
+
+    assert layout.size == 12
+    assert [(field.path, field.offset, field.size) for field in layout.fields] == [
+        ("header.magic", 0, 4),
+        ("header.version", 6, 2),
+        ("value", 8, 4),
+    ]
+
+
+def test_static_layout_with_offsets():
+    template = XMLTemplateParser(
+        """
+        <template>
+            <field name="a" size="1"></field>
+            <section name="s" offset="0x2">
+                <field name="v" size="2" offset="0x3" boundary="4"></field>
+            </section>
+        </template>
+        """
+    ).parse()
+
+    layout = static_layout(template)
+
+    assert [(field.path, field.offset) for field in layout.fields] == [
+        ("a", 0),
+        ("s.v", template.s.v.absolute_address),
+    ]
+
+
+def test_static_layout_with_count():
+    template = XMLTemplateParser(
+        """
+        <template>
+            <field name="value" size="2" count="3"></field>
+        </template>
+        """
+    ).parse()
+
+    layout = static_layout(template)
+
+    assert layout.size == 6
+    assert [field.path for field in layout.fields] == [
+        "value-0",
+        "value-1",
+        "value-2",
+    ]
+
+
+def test_to_dtype():
+    numpy = pytest.importorskip("numpy")
+
+    template = XMLTemplateParser(
+        """
+        <record padding-before="1" padding-after="2">
+            <field name="id" size="1"></field>
+            <field name="value" size="4" boundary="4"></field>
+            <field name="name" size="3"></field>
+        </record>
+        """
+    ).parse()
+
+    dtype = to_dtype(template, byteorder="big")
+
+    assert dtype.itemsize == 1 + 11 + 2
+    assert dtype.names == ("id", "value", "name")
+    assert dtype.fields["id"] == (numpy.dtype(">u1"), 1)
+    assert dtype.fields["value"] == (numpy.dtype(">u4"), 5)
+    assert dtype.fields["name"] == (numpy.dtype("V3"), 9)
+
+
+def test_to_struct():
+    template = XMLTemplateParser(
+        """
+        <record padding-after="2">
+            <field name="id" size="1"></field>
+            <field name="value" size="4" boundary="4"></field>
+            <field name="name" size="3"></field>
+        </record>
+        """
+    ).parse()
+
+    record = to_struct(template, byteorder="little")
+
+    assert record.format == "<B3xI3s2x"
+    assert record.size == 13
+    assert record.unpack(bytes([0x01, 0, 0, 0, 0x04, 0, 0, 0]) + b"abc" + bytes(2)) == (
+        0x01,
+        0x04,
+        b"abc",
+    )
+
+
+def test_static_layout_refuses_reference():
+    template = XMLTemplateParser(
+        """
+        <template>
+            <field name="length" size="1"></field>
+            <field name="data" size="{length}"></field>
+        </template>
+        """
+    ).parse()
+
+    with pytest.raises(RuntimeError) as excinfo:
+        to_dtype(template)
+    assert (
+        "Layout of 'data' is not static: size depends on a runtime binding "
+        "to 'length'." in str(excinfo.value)
+    )
+
+
+def test_static_layout_refuses_count_reference():
+    template = XMLTemplateParser(
+        """
+        <template>
+            <field name="num" size="1"></field>
+            <field name="item" size="1" count="{num}"></field>
+        </template>
+        """
+    ).parse()
+
+    with pytest.raises(RuntimeError) as excinfo:
+        to_struct(template)
+    assert "Layout of 'item' is not static: count depends" in str(excinfo.value)
+
+
+def test_static_layout_refuses_optional_template():
+    template = XMLTemplateParser(
+        """
+        <template>
+            <section name="section" size="1" signature="0x01" hint="optional">
+            </section>
+        </template>
+        """
+    ).parse()
+
+    with pytest.raises(RuntimeError) as excinfo:
+        static_layout(template)
+    assert "presence of an optional template depends on data" in str(excinfo.value)
+
+
+def test_static_layout_refuses_stretch():
+    template = XMLTemplateParser(
+        """
+        <template>
+            <field name="rest" sizing="stretch"></field>
+        </template>
+        """
+    ).parse()
+
+    with pytest.raises(RuntimeError) as excinfo:
+        static_layout(template)
+    assert "Layout of 'rest' is not static: stretched size" in str(excinfo.value)
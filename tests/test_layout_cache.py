@@ -0,0 +1,98 @@
+"""
+    test_layout_cache
+    ~~~~~~~~~~~~~~~~~
+
+    This module implements tests for the cache of resolved layouts.
+"""
+import pytest
+
+from binalyzer_template_provider import XMLTemplateParser
+from binalyzer_template_provider.layout_cache import LayoutCache
+
+TEMPLATE = """
+<template name="root">
+    <field name="length" size="1"></field>
+    <field name="payload" size="{length}"></field>
+    <field name="count" size="1"></field>
+    <records name="records" count="{count}">
+        <field name="value" size="2"></field>
+    </records>
+</template>
+"""
+
+STRETCH_TEMPLATE = """
+<template name="root">
+    <field name="length" size="1"></field>
+    <field name="rest" sizing="stretch"></field>
+</template>
+"""
+
+OPTIONAL_TEMPLATE = """
+<template name="root">
+    <field name="a" size="2" signature="0xAAAA" hint="optional"></field>
+    <field name="b" size="2" signature="0xBBBB" hint="optional"></field>
+    <field name="tail" size="2"></field>
+</template>
+"""
+
+
+@pytest.fixture
+def cache():
+    return LayoutCache(XMLTemplateParser(TEMPLATE).parse())
+
+
+def test_resolve(cache):
+    layout = cache.resolve(b"\x02ab\x02\x01\x00\x02\x00")
+    assert layout["payload"] == (1, 2)
+    assert layout["records-1.value"] == (6, 2)
+    assert layout[""] == (0, 8)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_resolve_leaves_template_unbound(cache):
+    binding_context = cache.template.binding_context
+    cache.resolve(b"\x02ab\x02\x01\x00\x02\x00")
+    assert cache.template.binding_context is binding_context
+
+
+def test_reuse_layout(cache):
+    layout = cache.resolve(b"\x02ab\x02\x01\x00\x02\x00")
+    assert cache.resolve(b"\x02xy\x02\x05\x00\x06\x00") is layout
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_changed_binding(cache):
+    layout = cache.resolve(b"\x02ab\x02\x01\x00\x02\x00")
+    other = cache.resolve(b"\x03abc\x01\x01\x00")
+    assert other is not layout
+    assert other["records.value"] == (5, 2)
+    assert "records-1.value" not in other
+    assert cache.resolve(bytearray(b"\x02cd\x02\x00\x00\x00\x00")) is layout
+    assert cache.entries[0].layout is layout
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_max_entries():
+    cache = LayoutCache(XMLTemplateParser(TEMPLATE).parse(), max_entries=1)
+    cache.resolve(b"\x01a\x00")
+    cache.resolve(b"\x02ab\x00")
+    cache.resolve(b"\x01a\x00")
+    assert len(cache.entries) == 1
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_stretch_depends_on_size():
+    cache = LayoutCache(XMLTemplateParser(STRETCH_TEMPLATE).parse())
+    layout = cache.resolve(b"\x00abc")
+    assert cache.resolve(b"\x00xyz") is layout
+    assert cache.resolve(b"\x00abcd")["rest"] != layout["rest"]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_signatures():
+    cache = LayoutCache(XMLTemplateParser(OPTIONAL_TEMPLATE).parse())
+    assert "a" in cache.resolve(b"\xAA\xAA\x00\x00")
+    assert "a" not in cache.resolve(b"\xBB\xBB\x00\x00")
+    assert cache.resolve(b"\xBB\xBB\x01\x01")["tail"] == (2, 2)
+    assert "a" in cache.resolve(b"\xAA\xAA\x01\x01")
+    assert (cache.hits, cache.misses) == (1, 3)
@@ -0,0 +1,68 @@
+"""
+    test_memory
+    ~~~~~~~~~~~
+
+    This module implements tests for the memory retained by template trees.
+
+    Templates of 1k nodes are measured by default. Larger templates are
+    measured if their node counts are listed in the comma separated
+    ``BINALYZER_MEMORY_TEST_NODES`` environment variable, e.g.
+    ``10000,100000,1000000``.
+"""
+import os
+import pytest
+
+from binalyzer_template_provider import XMLTemplateParser
+from binalyzer_template_provider.memory import measure, measure_template_memory
+
+#: Retained bytes per template including its properties
+BYTES_PER_NODE_BUDGET = 2048
+
+#: Retained bytes per property object including its value provider
+BYTES_PER_PROPERTY_BUDGET = 144
+
+NODES = [1000] + [
+    int(nodes)
+    for nodes in os.environ.get("BINALYZER_MEMORY_TEST_NODES", "").split(",")
+    if nodes.strip()
+]
+
+
+def create_template_text(nodes):
+    sections = []
+    for section in range((nodes - 1) // 11):
+        fields = []
+        for field in range(10):
+            size = "2" if field % 4 != 3 else "{f" + str(field - 1) + "}"
+            fields.append(f'<field name="f{field}" size="{size}"></field>')
+        sections.append(f'<section name="s{section}">' + "".join(fields) + "</section>")
+    return "<template>" + "".join(sections) + "</template>"
+
+
+@pytest.mark.parametrize("nodes", NODES)
+def test_memory_budget(nodes):
+    report = measure_template_memory(create_template_text(nodes))
+
+    assert report.nodes == (nodes - 1) // 11 * 11 + 1
+    assert report.properties == report.nodes * 6
+    assert report.bytes_per_node < BYTES_PER_NODE_BUDGET, str(report)
+    assert report.bytes_per_property < BYTES_PER_PROPERTY_BUDGET, str(report)
+
+
+def test_memory_report():
+    report = measure(
+        lambda: XMLTemplateParser(
+            """
+            <template>
+                <field name="length" size="1"></field>
+                <field name="data" size="{length}"></field>
+            </template>
+            """
+        ).parse()
+    )
+
+    assert report.nodes == 3
+    assert report.total > 0
+    assert report.property_bytes <= report.total
+    assert report.report()["by_file"] == report.by_file
+    assert "bytes per template" in str(report)
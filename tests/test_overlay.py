@@ -0,0 +1,116 @@
+"""
+    test_overlay
+    ~~~~~~~~~~~~
+
+    This module implements tests for the copy-on-write overlay data provider.
+"""
+import io
+
+import pytest
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension
+from binalyzer_template_provider.overlay import Overlay, OverlayDataProvider
+
+TEMPLATE = """
+<template name="root">
+    <header name="header">
+        <field name="magic" size="2"></field>
+        <field name="label"></field>
+    </header>
+    <field name="length" size="1"></field>
+    <field name="payload" size="{length}"></field>
+</template>
+"""
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    binalyzer.xml.from_str(TEMPLATE)
+    binalyzer.data_provider = OverlayDataProvider(b"\xCA\xFE\x03abc")
+    return binalyzer
+
+
+def test_overlay_read_write():
+    base = io.BytesIO(bytes(range(16)))
+    overlay = Overlay(base)
+    overlay.seek(4)
+    overlay.write(b"\xAA\xBB")
+    overlay.seek(14)
+    overlay.write(b"\xCC\xDD\xEE")
+    assert len(overlay) == 17
+    assert overlay.extents == [(4, 2), (14, 3)]
+    overlay.seek(3)
+    assert overlay.read(4) == b"\x03\xAA\xBB\x06"
+    assert bytes(overlay) == bytes(range(4)) + b"\xAA\xBB" + bytes(range(6, 14)) + (
+        b"\xCC\xDD\xEE"
+    )
+    assert base.getvalue() == bytes(range(16))
+
+
+def test_overlay_replace():
+    overlay = Overlay(io.BytesIO(bytes(range(8))))
+    overlay.replace(2, 2, b"\xAA\xBB\xCC\xDD")
+    overlay.replace(0, 1, b"")
+    assert len(overlay) == 9
+    assert bytes(overlay) == b"\x01\xAA\xBB\xCC\xDD" + bytes(range(4, 8))
+    overlay.replace(1, 2, b"\xEE")
+    assert bytes(overlay) == b"\x01\xEE\xCC\xDD" + bytes(range(4, 8))
+    assert overlay.extents == [(1, 1), (2, 2)]
+    with pytest.raises(RuntimeError):
+        overlay.replace(8, 2, b"")
+
+
+def test_overlay_write_after_end():
+    overlay = Overlay(io.BytesIO(b"\x01"))
+    overlay.seek(3)
+    overlay.write(b"\x02")
+    assert bytes(overlay) == b"\x01\x00\x00\x02"
+
+
+def test_assign_value(binalyzer):
+    template = binalyzer.template
+    template.payload.value = b"xyz"
+    assert template.payload.value == b"xyz"
+    assert binalyzer.data_provider.extents == [(3, 3)]
+
+
+def test_edit_auto_sized_field(binalyzer):
+    template = binalyzer.template
+    assert template.header.size == 2
+    binalyzer.data_provider.edit(template.header.label, b"name")
+    assert template.header.size == 6
+    assert template.length.absolute_address == 6
+    assert template.payload.value == b"abc"
+
+
+def test_edit_bound_size(binalyzer):
+    template = binalyzer.template
+    with pytest.raises(RuntimeError):
+        binalyzer.data_provider.edit(template.payload, b"abcd")
+    binalyzer.data_provider.edit(template.length, b"\x02")
+    assert template.payload.value == b"ab"
+
+
+def test_materialize(binalyzer, tmp_path):
+    template = binalyzer.template
+    binalyzer.data_provider.edit(template.header.label, b"id")
+    template.header.magic.value = b"\xBE\xEF"
+    path = str(tmp_path / "output.bin")
+    assert binalyzer.data_provider.materialize(path, chunk_size=2) == 8
+    with open(path, "rb") as output_file:
+        assert output_file.read() == b"\xBE\xEFid\x03abc"
+
+
+def test_mapped_base(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"\xCA\xFE\x03abc")
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    binalyzer.xml.from_str(TEMPLATE)
+    binalyzer.data_provider = OverlayDataProvider(str(path))
+    binalyzer.template.payload.value = b"xyz"
+    assert binalyzer.template.payload.value == b"xyz"
+    assert path.read_bytes() == b"\xCA\xFE\x03abc"
@@ -0,0 +1,137 @@
+"""
+    test_patch
+    ~~~~~~~~~~
+
+    This module implements tests for patching memory-mapped files in place.
+"""
+import pytest
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension
+from binalyzer_template_provider.data_provider import MappedFileDataProvider
+from binalyzer_template_provider.patch import PatchTransaction
+
+TEMPLATE = """
+<template name="root">
+    <field name="length" size="1"></field>
+    <field name="payload" size="{length}"></field>
+    <field name="checksum" size="2" offset="0x2000" addressing-mode="absolute">
+    </field>
+</template>
+"""
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    return binalyzer
+
+
+@pytest.fixture
+def paths(tmp_path):
+    template_path = tmp_path / "template.xml"
+    template_path.write_text(TEMPLATE)
+    data_path = tmp_path / "data.bin"
+    data_path.write_bytes(b"\x03abc" + bytes(0x2000 - 4) + b"\x00\x00")
+    return str(template_path), str(data_path)
+
+
+def test_from_file_mapped(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, mapped=True)
+    assert isinstance(binalyzer.data_provider, MappedFileDataProvider)
+    template = binalyzer.template
+    assert template.payload.value == b"abc"
+    template.payload.value = b"xyz"
+    assert binalyzer.data_provider.dirty_pages == [0]
+    assert binalyzer.data_provider.flush() == 1
+    binalyzer.data_provider.close()
+    with open(paths[1], "rb") as data_file:
+        assert data_file.read(4) == b"\x03xyz"
+
+
+def test_from_file_mapped_without_data(binalyzer, paths):
+    with pytest.raises(RuntimeError):
+        binalyzer.xml.from_file(paths[0], mapped=True)
+
+
+def test_write_beyond_mapped_file(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, mapped=True)
+    with pytest.raises(RuntimeError):
+        binalyzer.data_provider.write_at(0x2001, b"\x00\x00")
+
+
+def test_write_wrong_size(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, mapped=True)
+    with pytest.raises(RuntimeError):
+        binalyzer.template.length.value = b"\x01\x02"
+    assert binalyzer.template.length.size == 1
+    assert binalyzer.template.payload.value == b"abc"
+    binalyzer.data_provider.close()
+    with open(paths[1], "rb") as data_file:
+        assert data_file.read(4) == b"\x03abc"
+
+
+def test_read_only_mapping(paths):
+    data_provider = MappedFileDataProvider(paths[1], writable=False)
+    with pytest.raises(RuntimeError):
+        data_provider.write_at(0, b"\x00")
+    data_provider.close()
+
+
+def test_transaction(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, mapped=True)
+    template = binalyzer.template
+    with binalyzer.data_provider.transaction() as transaction:
+        transaction.patch(template.payload, b"def")
+        transaction.patch(template.checksum, b"\xCA\xFE")
+        assert binalyzer.data_provider.dirty_pages == []
+    assert transaction.patches == []
+    assert template.payload.value == b"def"
+    binalyzer.data_provider.close()
+    with open(paths[1], "rb") as data_file:
+        data = data_file.read()
+    assert data[:4] == b"\x03def"
+    assert data[0x2000:] == b"\xCA\xFE"
+
+
+def test_transaction_flushes_touched_pages(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, mapped=True)
+    template = binalyzer.template
+    transaction = PatchTransaction(binalyzer.data_provider)
+    transaction.patch(template.checksum, b"\x01\x02")
+    assert transaction.commit() == 1
+    assert binalyzer.data_provider.dirty_pages == []
+
+
+def test_transaction_clears_cached_layout(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, mapped=True)
+    template = binalyzer.template
+    assert template.payload.size == 3
+    with binalyzer.data_provider.transaction() as transaction:
+        transaction.patch(template.length, b"\x02")
+    assert template.payload.size == 2
+
+
+def test_transaction_validates_sizes(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, mapped=True)
+    template = binalyzer.template
+    transaction = binalyzer.data_provider.transaction()
+    with pytest.raises(RuntimeError):
+        transaction.patch(template.payload, b"toolong")
+
+
+def test_transaction_rollback(binalyzer, paths):
+    binalyzer.xml.from_file(*paths, mapped=True)
+    template = binalyzer.template
+    with pytest.raises(ValueError):
+        with binalyzer.data_provider.transaction() as transaction:
+            transaction.patch(template.payload, b"def")
+            raise ValueError()
+    assert template.payload.value == b"abc"
+
+
+def test_transaction_requires_mapped_file(binalyzer):
+    binalyzer.xml.from_str(TEMPLATE, b"\x01a")
+    with pytest.raises(RuntimeError):
+        PatchTransaction(binalyzer.data_provider)
@@ -0,0 +1,78 @@
+"""
+    test_profiling
+    ~~~~~~~~~~~~~~
+
+    This module implements tests for profiling template parsing.
+"""
+import pytest
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension, XMLTemplateParser
+from binalyzer_template_provider import profiling
+from binalyzer_wasm import WebAssemblyExtension
+
+TEMPLATE = """
+<template>
+    <field name="length" size="1"></field>
+    <field name="data" size="{length}" padding-before="1"></field>
+    <field name="leb" size="{provider=wasm.leb128size}"></field>
+</template>
+"""
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    WebAssemblyExtension(binalyzer)
+    return binalyzer
+
+
+@pytest.fixture(autouse=True)
+def profiling_disabled(monkeypatch):
+    monkeypatch.setattr(profiling, "_enabled", False)
+
+
+def test_profiling_off_by_default(binalyzer):
+    parser = XMLTemplateParser(TEMPLATE, binalyzer=binalyzer)
+    parser.parse()
+
+    assert parser.profile is None
+
+
+def test_profile_counts(binalyzer):
+    parser = XMLTemplateParser(TEMPLATE, binalyzer=binalyzer, profile=True)
+    parser.parse()
+    report = parser.profile.report()
+
+    assert report["counts"]["elements"] == 4
+    assert report["counts"]["attributes"] == 7
+    assert report["counts"]["bindings"] == 2
+    assert report["counts"]["providers"] == 1
+    assert report["counts"]["tokens"] > 0
+    assert set(report["durations"]) == set(profiling.ParseProfile.PHASES)
+    assert all(duration >= 0 for duration in report["durations"].values())
+    assert report["total"] == pytest.approx(sum(report["durations"].values()))
+    assert "elements" in str(parser.profile)
+
+
+def test_profiling_enabled_globally(binalyzer):
+    profiling.enable()
+    try:
+        parser = XMLTemplateParser(TEMPLATE, binalyzer=binalyzer)
+        disabled_parser = XMLTemplateParser(
+            TEMPLATE, binalyzer=binalyzer, profile=False
+        )
+    finally:
+        profiling.disable()
+
+    assert parser.profile is not None
+    assert disabled_parser.profile is None
+    assert not profiling.is_enabled()
+
+
+def test_extension_profile(binalyzer):
+    extension = XMLTemplateProviderExtension(binalyzer, profile=True)
+
+    assert extension.profile is None
+    binalyzer.xml.from_str(TEMPLATE)
+    assert extension.profile.counts["elements"] == 4
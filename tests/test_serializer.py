@@ -0,0 +1,123 @@
+"""
+    test_serializer
+    ~~~~~~~~~~~~~~~
+
+    This module implements tests for the bulk serialization of templates.
+"""
+import io
+
+import pytest
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension
+from binalyzer_template_provider.serializer import Serializer, serialize
+
+TEMPLATE = """
+<template name="root">
+    <header name="header" padding-after="2">
+        <field name="magic" size="2"></field>
+        <field name="length" size="1"></field>
+    </header>
+    <field name="payload" size="4" boundary="8">AABBCCDD</field>
+    <field name="trailer" size="2"></field>
+</template>
+"""
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    return binalyzer
+
+
+def test_serialize_bound_data(binalyzer):
+    data = bytes(range(1, 17))
+    binalyzer.xml.from_str(TEMPLATE, data)
+    assert serialize(binalyzer.template) == data[:3] + bytes(5) + data[8:14]
+
+
+def test_serialize_zero_fills_padding(binalyzer):
+    binalyzer.xml.from_str(TEMPLATE, bytes([0xFF] * 16))
+    serializer = Serializer(binalyzer.template)
+    assert [field.path for field in serializer.fields] == [
+        "header.magic",
+        "header.length",
+        "payload",
+        "trailer",
+    ]
+    assert [field.address for field in serializer.fields] == [0, 2, 8, 12]
+    buffer = serializer.serialize()
+    assert buffer == bytes([0xFF] * 3 + [0] * 5 + [0xFF] * 6)
+
+
+def test_serialize_values(binalyzer):
+    binalyzer.xml.from_str(TEMPLATE)
+    serializer = Serializer(binalyzer.template)
+    buffer = serializer.serialize(
+        {"header.magic": b"\xCA\xFE", "header.length": b"\x04", "trailer": b"\x01\x02"}
+    )
+    assert isinstance(buffer, bytearray)
+    assert buffer == b"\xCA\xFE\x04" + bytes(9) + b"\x01\x02"
+    assert serializer.serialize()[:3] == bytes(3)
+
+
+def test_serialize_texts(binalyzer):
+    binalyzer.xml.from_str(TEMPLATE)
+    buffer = serialize(binalyzer.template, {"trailer": b"\x01\x02"}, texts=True)
+    assert buffer[8:14] == b"\xAA\xBB\xCC\xDD\x01\x02"
+
+
+def test_serialize_matches_assigned_values(binalyzer):
+    binalyzer.xml.from_str(TEMPLATE)
+    template = binalyzer.template
+    template.header.magic.value = b"\xCA\xFE"
+    template.payload.value = b"\x01\x02\x03\x04"
+    assert serialize(template) == template.value
+
+
+def test_serialize_invalid_values(binalyzer):
+    binalyzer.xml.from_str(TEMPLATE)
+    serializer = Serializer(binalyzer.template)
+    with pytest.raises(RuntimeError):
+        serializer.serialize({"header.missing": b"\x00"})
+    with pytest.raises(RuntimeError):
+        serializer.serialize({"header.magic": b"\x00"})
+
+
+def test_write(binalyzer):
+    binalyzer.xml.from_str(TEMPLATE, bytes([0xFF] * 16))
+    serializer = Serializer(binalyzer.template)
+    stream = io.BytesIO()
+    assert serializer.write(stream, {"trailer": b"\x01\x02"}, chunk_size=3) == 14
+    assert stream.getvalue() == serializer.serialize({"trailer": b"\x01\x02"})
+
+
+def test_serialize_child_template(binalyzer):
+    binalyzer.xml.from_str(TEMPLATE, bytes(range(1, 17)))
+    header = binalyzer.template.header
+    assert serialize(header, {"length": b"\x09"}) == b"\x01\x02\x09"
+
+
+def test_serialize_ambiguous_paths(binalyzer):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <section name="section">
+                <field name="value" size="1"></field>
+                <field name="value" size="1"></field>
+            </section>
+            <field size="1"></field>
+        </template>
+        """,
+        bytes([0x01, 0x02, 0x03]),
+    )
+    serializer = Serializer(binalyzer.template)
+    assert [field.path for field in serializer.fields] == [
+        "section.value[0]",
+        "section.value[1]",
+        "1",
+    ]
+    assert serializer.serialize({"section.value[1]": b"\x09", "1": b"\x08"}) == (
+        b"\x01\x09\x08"
+    )
@@ -0,0 +1,110 @@
+"""
+    test_session
+    ~~~~~~~~~~~~
+
+    This module implements tests for sessions and concurrent parsing.
+"""
+import threading
+
+import pytest
+
+from anytree import PreOrderIter
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension, XMLTemplateParser
+
+TEMPLATE = """
+<template name="root">
+    <field name="length" size="1"></field>
+    <field name="payload" size="{length}"></field>
+    <field name="count" size="1"></field>
+    <records name="records" count="{count}">
+        <field name="value" size="2"></field>
+    </records>
+</template>
+"""
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    return binalyzer
+
+
+def layout(template):
+    return [
+        (node.name, node.absolute_address, node.size) for node in PreOrderIter(template)
+    ]
+
+
+def test_session(binalyzer):
+    session = binalyzer.xml.session(TEMPLATE, b"\x02ab\x02\x01\x00\x02\x00")
+    assert session.template.payload.value == b"ab"
+    assert session.template.children[4].value == b"\x02\x00"
+    assert session.data.getvalue() == b"\x02ab\x02\x01\x00\x02\x00"
+    assert binalyzer.template.children == ()
+
+
+def test_sessions_are_independent(binalyzer):
+    first = binalyzer.xml.session(TEMPLATE, b"\x02ab\x02\x01\x00\x02\x00")
+    second = binalyzer.xml.session(TEMPLATE, b"\x01a\x01\x03\x00")
+    assert len(binalyzer.xml._templates) == 1
+    assert first.template.payload.size == 2
+    assert second.template.payload.size == 1
+    second.template.payload.value = b"z"
+    assert first.template.payload.value == b"ab"
+    assert first.template is not second.template
+
+
+def test_session_without_data(binalyzer):
+    session = binalyzer.xml.session(TEMPLATE)
+    assert session.template.length.value == b"\x00"
+
+
+def test_concurrent_sessions(binalyzer):
+    data = [bytes([i % 4, *range(i % 4), 1, i, 0]) for i in range(16)]
+    expected = [layout(binalyzer.xml.session(TEMPLATE, d).template) for d in data]
+    errors = []
+    barrier = threading.Barrier(8)
+
+    def worker(index):
+        barrier.wait()
+        try:
+            for i in range(index, index + 16):
+                session = binalyzer.xml.session(TEMPLATE, data[i % 16])
+                if layout(session.template) != expected[i % 16]:
+                    errors.append(f"mismatch {i % 16}")
+        except Exception as error:  # pylint: disable=broad-except
+            errors.append(repr(error))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_concurrent_parsing():
+    expected = [
+        (node.name, len(node.children))
+        for node in PreOrderIter(XMLTemplateParser(TEMPLATE).parse())
+    ]
+    results = []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        for _ in range(8):
+            template = XMLTemplateParser(TEMPLATE).parse()
+            results.append(
+                [(node.name, len(node.children)) for node in PreOrderIter(template)]
+            )
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [expected] * 64
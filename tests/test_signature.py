@@ -4,3 +4,92 @@
 
     This module implements tests for a template's signature attribute.
 """
+import os
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension, XMLTemplateParser
+from binalyzer_template_provider import xml
+from binalyzer_template_provider.signature import SignatureTable, signature_tables
+from binalyzer_wasm import WebAssemblyExtension
+
+
+def test_signature_tables_per_run():
+    parser = XMLTemplateParser(
+        """
+        <template>
+            <field name="magic" size="2" signature="0xCAFE"></field>
+            <section name="a" size="1" signature="0x01" hint="optional"></section>
+            <section name="b" size="1" signature="0x02" hint="optional"></section>
+            <field name="separator" size="1"></field>
+            <section name="c" size="1" signature="0x03" hint="optional"></section>
+        </template>
+        """
+    )
+    parser.parse()
+
+    tables = parser.signature_tables
+
+    assert [[t.name for t in table.templates] for table in tables] == [
+        ["a", "b"],
+        ["c"],
+    ]
+    assert tables[0].parent.name is None
+
+
+def test_signature_tables_on_first_access(monkeypatch):
+    calls = []
+
+    def counted(template):
+        calls.append(template)
+        return signature_tables(template)
+
+    monkeypatch.setattr(xml, "signature_tables", counted)
+    parser = XMLTemplateParser(
+        """
+        <template>
+            <section name="a" size="1" signature="0x01" hint="optional"></section>
+        </template>
+        """
+    )
+    parser.parse()
+
+    assert calls == []
+    assert parser.signature_tables is parser.signature_tables
+    assert len(calls) == 1
+
+
+def test_signature_table_lookup():
+    template = XMLTemplateParser(
+        """
+        <template>
+            <section name="long" size="1" signature="0x0102" hint="optional"></section>
+            <section name="short" size="1" signature="0x01" hint="optional"></section>
+            <section name="other" size="1" signature="0x02" hint="optional"></section>
+            <section name="again" size="1" signature="0x01" hint="optional"></section>
+        </template>
+        """
+    ).parse()
+    table = SignatureTable(template.children)
+
+    assert table.max_length == 2
+    assert table.lookup(bytes([0x01, 0x02])) == 0
+    assert table.lookup(bytes([0x01, 0x03])) == 1
+    assert table.lookup(bytes([0x00, 0x01, 0x02]), offset=1, start=1) == 1
+    assert table.lookup(bytes([0x01]), start=2) == 3
+    assert table.lookup(bytes([0x04])) is None
+    assert table.match(bytes([0x02])).name == "other"
+    assert table.lookup_all(bytes([0x01, 0x02])) == [1, 3, 0]
+
+
+def test_signature_table_wasm_sections():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    WebAssemblyExtension(binalyzer)
+    resources_path = os.path.join(os.path.dirname(__file__), "resources")
+    with open(os.path.join(resources_path, "wasm_module_format.xml")) as template_file:
+        template = XMLTemplateParser(template_file.read(), binalyzer=binalyzer).parse()
+
+    table = signature_tables(template)[0]
+
+    assert table.match(bytes([0x0A])).name == "code-section"
+    assert table.lookup(bytes([0x00]), start=2) == 2
@@ -0,0 +1,112 @@
+"""
+    test_streaming
+    ~~~~~~~~~~~~~~
+
+    This module implements tests for the streaming XML parser.
+"""
+import io
+import os
+
+import pytest
+
+from anytree import PreOrderIter
+from binalyzer_core import Binalyzer
+from binalyzer_wasm import WebAssemblyExtension
+
+from binalyzer_template_provider import XMLTemplateParser, XMLTemplateProviderExtension
+from binalyzer_template_provider.streaming import StreamingXMLTemplateParser
+
+RESOURCES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources")
+
+TEMPLATE = """
+<?xml version="1.0" encoding="UTF-8"?>
+<template name="root">
+    <!-- header -->
+    <header name="header">
+        <field name="magic" size="2" signature="0xCAFE"></field>
+        <field name="length" size="1"></field>
+    </header>
+    <field name="data-block" size="{length, byteorder=big}" padding-after="2">
+        01 02
+        0304
+    </field>
+    <field name="tail" offset="0x10" addressing-mode="absolute" hint="optional"
+           text="0xAABB"/>
+    <field name="rest" sizing="stretch" boundary="4" count="3"></field>
+</template>
+"""
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    WebAssemblyExtension(binalyzer)
+    return binalyzer
+
+
+def tree(template):
+    return [
+        (
+            node.name,
+            node.text,
+            node.hint,
+            type(node.offset_property).__name__,
+            type(node.size_property).__name__,
+            node.size_property.value
+            if type(node.size_property).__name__ == "ValueProperty"
+            else None,
+            len(node.children),
+        )
+        for node in PreOrderIter(template)
+    ]
+
+
+def layout(template):
+    return [(node.absolute_address, node.size) for node in PreOrderIter(template)]
+
+
+def test_parse_file_object():
+    expected = XMLTemplateParser(TEMPLATE).parse()
+    template = StreamingXMLTemplateParser(
+        io.StringIO(TEMPLATE), chunk_size=7
+    ).parse()
+    assert tree(template) == tree(expected)
+    assert template.data_block.text == bytes([1, 2, 3, 4])
+    assert template.tail.text == bytes([0xAA, 0xBB])
+
+
+def test_parse_flat(tmp_path):
+    path = tmp_path / "template.xml"
+    path.write_text(TEMPLATE)
+    expected = XMLTemplateParser(TEMPLATE).parse_flat()
+    flat = StreamingXMLTemplateParser(str(path), chunk_size=5).parse_flat()
+    assert flat.columns == expected.columns
+    assert flat.strings == expected.strings
+    assert flat.blobs == expected.blobs
+    assert flat.bindings == expected.bindings
+
+
+def test_malformed_template():
+    parser = StreamingXMLTemplateParser(io.StringIO("<template></field>"))
+    with pytest.raises(RuntimeError):
+        parser.parse()
+
+
+def test_invalid_text():
+    parser = StreamingXMLTemplateParser(io.StringIO("<template>012</template>"))
+    with pytest.raises(ValueError):
+        parser.parse()
+
+
+def test_from_file(binalyzer):
+    template_path = os.path.join(RESOURCES_PATH, "wasm_module_format.xml")
+    data_path = os.path.join(RESOURCES_PATH, "wasm_module.wasm")
+    binalyzer.xml.from_file(template_path, data_path)
+    expected = layout(binalyzer.template)
+
+    binalyzer.xml.from_file(template_path, data_path, streaming=True)
+
+    assert layout(binalyzer.template) == expected
+    with pytest.raises(RuntimeError):
+        binalyzer.xml.from_file(template_path, data_path, index=True, streaming=True)
@@ -4,8 +4,32 @@
 
     This module implements tests for the text property.
 """
-from binalyzer_core import Template
-from binalyzer_template_provider import XMLTemplateParser
+import io
+
+import pytest
+
+from binalyzer_core import Binalyzer, Template
+from binalyzer_template_provider import XMLTemplateParser, XMLTemplateProviderExtension
+from binalyzer_template_provider.blob import MappedBlob
+from binalyzer_template_provider.serializer import serialize
+from binalyzer_template_provider.streaming import StreamingXMLTemplateParser
+
+PAYLOAD = bytes(range(256)) * 64
+
+TEXT_FILE_TEMPLATE = """
+<template name="root">
+    <field name="whole" text-file="payload.bin"></field>
+    <field name="part" text-file="payload.bin" text-offset="0x10" text-length="4">
+    </field>
+</template>
+"""
+
+
+@pytest.fixture
+def payload_path(tmp_path):
+    path = tmp_path / "payload.bin"
+    path.write_bytes(PAYLOAD)
+    return path
 
 
 def test_text_property_with_hex_value():
@@ -60,4 +84,81 @@ def test_size_overrides_size_of_text_attribute():
     """).parse()
     assert template.text == bytes([0x55, 0x66, 0x77, 0x88])
     assert template.value == bytes()
-    assert template.size == 2
\ No newline at end of file
+    assert template.size == 2
+
+
+def test_base64_text_between_tags():
+    template = XMLTemplateParser(
+        """
+        <template text-encoding="base64">
+            VWZ3
+            iA==
+        </template>
+    """
+    ).parse()
+    assert template.text == bytes([0x55, 0x66, 0x77, 0x88])
+    assert template.size == 4
+
+
+def test_unknown_text_encoding():
+    with pytest.raises(RuntimeError):
+        XMLTemplateParser('<template text-encoding="utf-8">00</template>').parse()
+
+
+def test_text_file(payload_path):
+    template = XMLTemplateParser(
+        TEXT_FILE_TEMPLATE, base_path=str(payload_path.parent)
+    ).parse()
+    whole = template.children[0].text
+    part = template.children[1].text
+    assert isinstance(whole, MappedBlob)
+    assert not whole.mapped
+    assert template.children[0].size == len(PAYLOAD)
+    assert template.children[1].size == 4
+    assert not whole.mapped
+    assert whole == PAYLOAD
+    assert part == bytes([0x10, 0x11, 0x12, 0x13])
+    assert part[1:3] == bytes([0x11, 0x12])
+    assert bytes(part) == bytes([0x10, 0x11, 0x12, 0x13])
+    assert whole.mapped
+    whole.close()
+    assert not whole.mapped
+    assert whole[-1] == 0xFF
+
+
+def test_text_file_from_file(payload_path):
+    template_path = payload_path.parent / "template.xml"
+    template_path.write_text(TEXT_FILE_TEMPLATE)
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    binalyzer.xml.from_file(str(template_path))
+    assert binalyzer.template.size == len(PAYLOAD) + 4
+    data = serialize(binalyzer.template, texts=True)
+    assert bytes(data) == PAYLOAD + bytes([0x10, 0x11, 0x12, 0x13])
+
+
+def test_text_file_exceeds_file(payload_path):
+    with pytest.raises(RuntimeError):
+        MappedBlob(str(payload_path), len(PAYLOAD) - 1, 2)
+    with pytest.raises(RuntimeError):
+        MappedBlob(str(payload_path.parent / "missing.bin"))
+
+
+def test_streaming_texts(payload_path):
+    text = TEXT_FILE_TEMPLATE.replace(
+        "</template>",
+        '<field name="encoded" text-encoding="base64">VWZ3iA==</field></template>',
+    )
+    expected = XMLTemplateParser(text, base_path=str(payload_path.parent)).parse()
+    template = StreamingXMLTemplateParser(
+        io.StringIO(text), chunk_size=3, base_path=str(payload_path.parent)
+    ).parse()
+    assert [child.text for child in template.children] == [
+        child.text for child in expected.children
+    ]
+    flat = StreamingXMLTemplateParser(
+        io.StringIO(text), chunk_size=3, base_path=str(payload_path.parent)
+    ).parse_flat()
+    assert [child.text for child in flat.root.children] == [
+        child.text for child in expected.children
+    ]
@@ -0,0 +1,90 @@
+"""
+    test_tracing
+    ~~~~~~~~~~~~
+
+    This module implements tests for tracing property evaluations.
+"""
+import json
+import threading
+
+import pytest
+
+from binalyzer_core import Binalyzer, PropertyBase
+from binalyzer_template_provider import XMLTemplateProviderExtension
+from binalyzer_template_provider.tracing import trace
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <field name="num" size="1"></field>
+            <record name="record" count="{num}">
+                <field name="length" size="1"></field>
+                <field name="data" size="{length}"></field>
+            </record>
+        </template>
+        """,
+        bytes([0x02, 0x01, 0xAA, 0x02, 0xBB, 0xCC]),
+    )
+    return binalyzer
+
+
+def test_trace_entries(binalyzer):
+    get_value = PropertyBase.get_value
+
+    with trace() as resolution_trace:
+        records = binalyzer.template.record
+        values = [record.data.value for record in records]
+
+    assert values == [bytes([0xAA]), bytes([0xBB, 0xCC])]
+    assert PropertyBase.get_value is get_value
+    entries = {
+        (entry.path, entry.attribute): entry for entry in resolution_trace.entries()
+    }
+    assert entries[("record", "count")].count >= 1
+    assert entries[("record-1.data", "size")].count >= 1
+    assert all(entry.self_time <= entry.total_time for entry in entries.values())
+    assert "record-1.data" in resolution_trace.format_table()
+
+
+def test_trace_chrome_export(binalyzer, tmp_path):
+    with trace() as resolution_trace:
+        binalyzer.template.record[1].data.value
+
+    trace_path = tmp_path / "trace.json"
+    resolution_trace.write_chrome_trace(str(trace_path))
+    events = json.loads(trace_path.read_text())["traceEvents"]
+
+    assert events
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+    assert "record-1.data:size" in {event["name"] for event in events}
+
+
+def test_trace_without_events(binalyzer):
+    with trace(events=False) as resolution_trace:
+        binalyzer.template.record
+
+    assert resolution_trace.entries()
+    with pytest.raises(RuntimeError):
+        resolution_trace.chrome_trace()
+
+
+def test_trace_not_nested():
+    with trace():
+        with pytest.raises(RuntimeError) as excinfo:
+            with trace():
+                pass
+    assert "Tracing is already active." in str(excinfo.value)
+
+
+def test_trace_other_thread(binalyzer):
+    with trace() as resolution_trace:
+        thread = threading.Thread(target=lambda: binalyzer.template.record)
+        thread.start()
+        thread.join()
+
+    assert resolution_trace.entries() == []
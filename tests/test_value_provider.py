@@ -0,0 +1,153 @@
+"""
+    test_value_provider
+    ~~~~~~~~~~~~~~~~~~~
+
+    This module implements tests for precompiled integer decoders.
+"""
+import io
+import pytest
+
+from binalyzer_core import Binalyzer
+from binalyzer_template_provider import XMLTemplateProviderExtension
+from binalyzer_template_provider.data_provider import IntegerCachingDataProvider
+from binalyzer_template_provider.value_provider import (
+    BigEndianTemplateValueProvider,
+    LittleEndianTemplateValueProvider,
+    integer_decoder,
+)
+
+
+@pytest.fixture
+def binalyzer():
+    binalyzer = Binalyzer()
+    XMLTemplateProviderExtension(binalyzer)
+    return binalyzer
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 4, 5, 8, 9])
+@pytest.mark.parametrize("byteorder", ["little", "big"])
+def test_integer_decoder(size, byteorder):
+    data = bytes(range(1, size + 2))
+    decode = integer_decoder(size, byteorder)
+
+    assert decode(data, 1) == int.from_bytes(data[1 : size + 1], byteorder)
+    assert integer_decoder(size, byteorder) is decode
+
+
+def test_integer_decoder_invalid_byteorder():
+    with pytest.raises(RuntimeError):
+        integer_decoder(2, "middle")
+
+
+def test_reference_provider_byteorder(binalyzer):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <field name="little" size="2"></field>
+            <field name="big" size="2"></field>
+            <field name="a" size="{little}"></field>
+            <field name="b" size="{big, byteorder=big}"></field>
+        </template>
+        """,
+        bytes([0x01, 0x00, 0x00, 0x02, 0xAA, 0xBB, 0xCC]),
+    )
+    template = binalyzer.template
+
+    assert isinstance(
+        template.a.size_property.value_provider, LittleEndianTemplateValueProvider
+    )
+    assert isinstance(
+        template.b.size_property.value_provider, BigEndianTemplateValueProvider
+    )
+    assert template.a.value == bytes([0xAA])
+    assert template.b.value == bytes([0xBB, 0xCC])
+
+
+def test_reference_provider_survives_count(binalyzer):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <field name="num" size="1"></field>
+            <record name="record" count="{num}">
+                <field name="length" size="2"></field>
+                <field name="data" size="{length, byteorder=big}"></field>
+            </record>
+        </template>
+        """,
+        bytes([0x02, 0x00, 0x01, 0xAA, 0x00, 0x02, 0xBB, 0xCC]),
+    )
+    records = binalyzer.template.record
+
+    assert [record.data.value for record in records] == [
+        bytes([0xAA]),
+        bytes([0xBB, 0xCC]),
+    ]
+
+
+def test_invalid_byteorder(binalyzer):
+    with pytest.raises(RuntimeError) as excinfo:
+        binalyzer.xml.from_str(
+            """
+            <template>
+                <field name="length" size="1"></field>
+                <field name="data" size="{length, byteorder=middle}"></field>
+            </template>
+            """
+        )
+    assert "Expected 'little' or 'big'." in str(excinfo.value)
+
+
+def test_integer_caching_data_provider():
+    data_provider = IntegerCachingDataProvider(io.BytesIO(bytes([0x01, 0x02, 0x03])))
+
+    assert data_provider.read_integer(0, 2, "little") == 0x0201
+    assert data_provider.read_integer(1, 2, "big") == 0x0203
+    assert data_provider.read_integer(2, 3, "little") == 0x03
+
+    data_provider.data = io.BytesIO(bytes([0x04, 0x05]))
+    assert data_provider.read_integer(0, 2, "little") == 0x0504
+
+
+def test_integer_caching_data_provider_write(binalyzer):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <field name="length" size="1"></field>
+            <field name="data" size="{length}"></field>
+        </template>
+        """,
+        bytes([0x01, 0xAA, 0xBB]),
+    )
+    template = binalyzer.template
+    data_provider = binalyzer.data_provider
+
+    assert isinstance(data_provider, IntegerCachingDataProvider)
+    assert data_provider.read_integer(0, 1) == 0x01
+    template.length.value = bytes([0x02])
+    assert data_provider.read_integer(0, 1) == 0x02
+
+
+def test_integer_caching_data_provider_direct_write(binalyzer):
+    binalyzer.xml.from_str(
+        """
+        <template>
+            <field name="length" size="1"></field>
+            <field name="data" size="{length}"></field>
+        </template>
+        """,
+        bytes([0x01, 0xAA, 0xBB]),
+    )
+    data_provider = binalyzer.data_provider
+    assert data_provider.read_integer(0, 1) == 0x01
+
+    binalyzer.data.seek(0)
+    binalyzer.data.write(bytes([0x02]))
+    assert data_provider.read_integer(0, 1) == 0x01
+    data_provider.clear_cache()
+    assert data_provider.read_integer(0, 1) == 0x02
+
+    with binalyzer.data.getbuffer() as buffer:
+        buffer[0] = 0x00
+    data_provider.clear_cache()
+    binalyzer.template.clear_cache()
+    assert binalyzer.template.data.size == 0